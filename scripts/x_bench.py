@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "tweepy>=4.14.0",
+# ]
+# ///
+"""Benchmarks for the skill, run entirely offline — no credentials, no API spend.
+
+e2e: runs every x_* command against the local mock API (x_mock_api.py) in a
+throwaway HOME and records wall time, API calls and bytes per command.
+
+store: builds synthetic tweet stores (1k to 1M records) and times the local hot
+paths every command goes through — load/save, store_tweets, top-k sorting,
+--hours filtering, rendering and timestamp parsing — plus peak RSS, and checks
+them against per-record thresholds.
+
+    uv run scripts/x_bench.py e2e --repeat 5 --latency 80
+    uv run scripts/x_bench.py e2e --output before.json
+    uv run scripts/x_bench.py e2e --compare before.json
+    uv run scripts/x_bench.py store --sizes 1000 10000 100000
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+from x_mock_api import ACCESS_TOKEN, OWN_HANDLE, OWN_ID, add_mock_args, start_server, state_from_args
+
+
+def e2e_commands(data) -> list[tuple[str, list[str]]]:
+    """(name, argv) for each command, in an order where later ones can use earlier ones' stores."""
+    recent_thread = next(t for t in data.timeline if data.tweets[t].get("referenced_tweets"))
+    old_thread = next((t for t in reversed(data.timeline) if data.tweets[t].get("referenced_tweets")),
+                      recent_thread)
+    return [
+        ("timeline recent", ["x_timeline.py", "--no-budget", "recent"]),
+        ("timeline recent --hours 24", ["x_timeline.py", "--no-budget", "recent", "--hours", "24"]),
+        ("timeline top", ["x_timeline.py", "--no-budget", "top"]),
+        ("timeline activity", ["x_timeline.py", "--no-budget", "activity"]),
+        ("timeline refresh", ["x_timeline.py", "--no-budget", "refresh", data.timeline[0]]),
+        ("mentions recent", ["x_mentions.py", "--no-budget", "recent"]),
+        ("mentions recent --context", ["x_mentions.py", "--no-budget", "--no-cache", "recent",
+                                       "--hours", "24", "--context"]),
+        ("mentions watch --polls 1", ["x_mentions.py", "--no-budget", "watch", "--polls", "1"]),
+        ("mentions triage", ["x_mentions.py", "triage", "--top", "10"]),
+        ("mentions handle", ["x_mentions.py", "handle", data.mentions[0]]),
+        ("bookmarks list", ["x_bookmarks.py", "--no-budget", "list"]),
+        ("read", ["x_read.py", "--no-budget", recent_thread]),
+        ("read (cached)", ["x_read.py", "--no-budget", recent_thread]),
+        ("read --thread", ["x_read.py", "--no-budget", "--no-cache", recent_thread, "--thread"]),
+        ("read --thread (old)", ["x_read.py", "--no-budget", "--no-cache", old_thread, "--thread"]),
+        ("user me", ["x_user.py", "--no-budget", "--no-cache", "me"]),
+        ("user me (cached)", ["x_user.py", "--no-budget", "me"]),
+        ("user lookup", ["x_user.py", "--no-budget", "lookup", "user1"]),
+        ("briefing --live", ["x_briefing.py", "--no-budget", "--live", "--no-cache"]),
+        ("briefing --prepare", ["x_briefing.py", "--no-budget", "--prepare"]),
+        ("briefing (prepared)", ["x_briefing.py", "--no-budget"]),
+        ("monitor add", ["x_monitor.py", "add", "bench", "design OR cache"]),
+        ("monitor poll", ["x_monitor.py", "--no-budget", "poll"]),
+        ("monitor show", ["x_monitor.py", "show", "bench"]),
+        ("watchlist add", ["x_watchlist.py", "--no-budget", "add", "user1", "user2", "user3"]),
+        ("watchlist poll", ["x_watchlist.py", "--no-budget", "poll", "--all"]),
+        ("query", ["x_query.py", "posts where likes > 5 order by likes desc limit 10"]),
+        ("query group by", ["x_query.py", "mentions where type = reply group by author "
+                                          "order by count desc limit 10"]),
+    ]
+
+
+def make_home(root: Path) -> Path:
+    """Fresh HOME with a config for the mock account."""
+    home = Path(tempfile.mkdtemp(prefix="home-", dir=root))
+    config_dir = home / ".openclaw" / "skills-config" / "x-twitter"
+    config_dir.mkdir(parents=True)
+    (config_dir / "config.json").write_text(json.dumps({
+        "api_key": "bench", "api_secret": "bench",
+        "access_token": ACCESS_TOKEN, "access_secret": "bench",
+        "bearer_token": "bench",
+        "handle": OWN_HANDLE, "user_id": OWN_ID,
+        "tier": "intense", "daily_budget": 100.0, "budget_mode": "unlimited",
+    }, indent=2))
+    return home
+
+
+def server_stats(base_url: str) -> dict:
+    with urllib.request.urlopen(f"{base_url}/__stats") as resp:
+        return json.loads(resp.read())
+
+
+def run_command(argv: list[str], env: dict, base_url: str) -> dict:
+    """Run one command with --profile json; return wall time, profile counters and server-side bytes."""
+    before = server_stats(base_url)
+    cmd = [sys.executable, str(SCRIPT_DIR / argv[0]), "--profile", "json", *argv[1:]]
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    after = server_stats(base_url)
+
+    profile = {}
+    for line in reversed(proc.stderr.splitlines()):
+        if line.startswith("{"):
+            profile = json.loads(line)
+            break
+    counters = profile.get("counters", {})
+    phases = profile.get("phases", {})
+    calls = sum(v["calls"] for v in after.values()) - sum(v["calls"] for v in before.values())
+    bytes_out = sum(v["bytes_out"] for v in after.values()) - sum(v["bytes_out"] for v in before.values())
+    # Most failures print "Error: ..." and still exit 0 (see handle_api_error)
+    error = next((line for line in (proc.stdout + proc.stderr).splitlines() if line.startswith("Error:")), "")
+    if proc.returncode and not error and proc.stderr.strip():
+        error = proc.stderr.strip().splitlines()[-1]
+    return {
+        "ok": proc.returncode == 0 and not error,
+        "wall_ms": wall * 1000,
+        "in_process_ms": profile.get("total_seconds", 0) * 1000,
+        "import_ms": phases.get("import", {}).get("seconds", 0) * 1000,
+        "http_ms": phases.get("http", {}).get("seconds", 0) * 1000,
+        "api_calls": calls,
+        "connections": profile.get("transport", {}).get("connections", 0),
+        "api_bytes": bytes_out,
+        "output_bytes": len(proc.stdout.encode()),
+        "store_bytes_written": counters.get("bytes_written", 0),
+        "error": error,
+    }
+
+
+def summarize(name: str, runs: list[dict]) -> dict:
+    walls = [r["wall_ms"] for r in runs]
+    last = runs[-1]
+    return {
+        "name": name,
+        "runs": len(runs),
+        "ok": all(r["ok"] for r in runs),
+        "wall_ms_median": statistics.median(walls),
+        "wall_ms_min": min(walls),
+        "in_process_ms_median": statistics.median(r["in_process_ms"] for r in runs),
+        "http_ms_median": statistics.median(r["http_ms"] for r in runs),
+        "import_ms_median": statistics.median(r["import_ms"] for r in runs),
+        "api_calls": last["api_calls"],
+        "connections": last["connections"],
+        "api_bytes": last["api_bytes"],
+        "output_bytes": last["output_bytes"],
+        "store_bytes_written": last["store_bytes_written"],
+        "error": next((r["error"] for r in runs if r["error"]), ""),
+    }
+
+
+def print_results(results: list[dict], baseline: dict | None):
+    print(f"{'command':<28} {'wall ms':>9} {'http ms':>8} {'calls':>5} {'conns':>5} {'API bytes':>10} {'out bytes':>9}"
+          + ("   vs baseline" if baseline else ""))
+    print("-" * (80 + (15 if baseline else 0)))
+    for r in results:
+        line = (f"{r['name']:<28} {r['wall_ms_median']:9.1f} {r['http_ms_median']:8.1f} {r['api_calls']:5d} "
+                f"{r['connections']:5d} {r['api_bytes']:10,} {r['output_bytes']:9,}")
+        if baseline and r["name"] in baseline:
+            b = baseline[r["name"]]
+            change = (r["wall_ms_median"] - b["wall_ms_median"]) / b["wall_ms_median"] * 100
+            line += f"   {change:+6.1f}%"
+            if r["api_calls"] != b["api_calls"]:
+                line += f" calls {b['api_calls']}->{r['api_calls']}"
+        if not r["ok"]:
+            line += f"   FAILED: {r['error']}"
+        print(line)
+    total_wall = sum(r["wall_ms_median"] for r in results)
+    total_calls = sum(r["api_calls"] for r in results)
+    print("-" * (80 + (15 if baseline else 0)))
+    print(f"{'total':<28} {total_wall:9.1f} {'':>8} {total_calls:5d}")
+
+
+def cmd_e2e(args):
+    state = state_from_args(args)
+    server = start_server(state)
+    commands = e2e_commands(state.data)
+    if args.only:
+        commands = [c for c in commands if any(o in c[0] for o in args.only)]
+
+    runs = {name: [] for name, _ in commands}
+    with tempfile.TemporaryDirectory(prefix="x-bench-") as tmp:
+        for i in range(args.repeat):
+            # Each pass starts cold; commands within a pass share stores like a real session
+            env = {**os.environ, "HOME": str(make_home(Path(tmp))), "X_API_BASE_URL": server.base_url}
+            env.pop("PYTHONDONTWRITEBYTECODE", None)
+            env.pop("X_ACCOUNT", None)  # x_common binds the account at import; bench the throwaway one
+            urllib.request.urlopen(urllib.request.Request(f"{server.base_url}/__reset", method="POST")).close()
+            for name, argv in commands:
+                runs[name].append(run_command(argv, env, server.base_url))
+            print(f"  pass {i + 1}/{args.repeat} done", file=sys.stderr)
+    server.shutdown()
+
+    results = [summarize(name, runs[name]) for name, _ in commands]
+    baseline = None
+    if args.compare:
+        baseline = {r["name"]: r for r in json.loads(Path(args.compare).read_text())["results"]}
+
+    print(f"e2e against mock API — {args.repeat} pass(es), latency {args.latency:g}ms"
+          f"{f' ±{args.jitter:g}ms' if args.jitter else ''}, error rate {args.error_rate:g}")
+    print_results(results, baseline)
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            "kind": "e2e",
+            "python": sys.version.split()[0],
+            "latency_ms": args.latency,
+            "repeat": args.repeat,
+            "results": results,
+        }, indent=2))
+        print(f"\nResults written to {args.output}")
+    if not all(r["ok"] for r in results):
+        sys.exit(1)
+
+
+# === Store micro/macro benchmarks ===
+
+STORE_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+# Regression thresholds in microseconds per record (rss: bytes per record). Set at
+# roughly 3x what a 2023 laptop measures, so only real regressions trip them.
+STORE_THRESHOLDS = {
+    "load_store": 25.0,
+    "save_store": 40.0,
+    "store_tweets": 40.0,
+    "top": 40.0,
+    "hours_filter": 10.0,
+    "render": 60.0,
+    "parse_time": 25.0,
+    "rss": 3000,
+}
+
+# Per-record cost may grow this much from 10k records to the largest size before it
+# counts as superlinear scaling (sorting's log factor alone is ~1.5x up to 1M)
+MAX_SCALING = 3.0
+
+
+def synthetic_store(n: int, seed: int = 1) -> dict:
+    """n timeline records shaped like x_timeline's store, spread over the last 90 days."""
+    from datetime import datetime, timedelta, timezone
+
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    words = "ship build launch agent model cache budget thread reply metrics growth design".split()
+    store = {}
+    base_id = 1_800_000_000_000_000_000
+    for i in range(n):
+        created = now - timedelta(seconds=rng.random() * 90 * 86400)
+        impressions = int(rng.lognormvariate(6, 1.3))
+        tid = str(base_id + i)
+        store[tid] = {
+            "id": tid,
+            "text": " ".join(rng.choice(words) for _ in range(rng.randint(5, 40))),
+            "created_at": created.isoformat(),
+            "metrics": {
+                "retweet_count": int(impressions * rng.random() * 0.004),
+                "reply_count": int(impressions * rng.random() * 0.003),
+                "like_count": int(impressions * rng.random() * 0.02),
+                "quote_count": int(impressions * rng.random() * 0.001),
+                "bookmark_count": int(impressions * rng.random() * 0.002),
+                "impression_count": impressions,
+            },
+            "stored_at": (created + timedelta(minutes=rng.randint(1, 600))).isoformat(),
+        }
+    return store
+
+
+def _timed(fn, *args) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def store_child(n: int, generate: bool) -> dict:
+    """Run the store benchmarks for one size.
+
+    Runs twice per size in fresh processes: once to generate the store file, then
+    once to measure, so peak RSS reflects loading the store and nothing else.
+    """
+    import io
+    from argparse import Namespace
+    from contextlib import redirect_stdout
+    from datetime import datetime, timezone
+
+    import tweepy
+    import x_common
+    import x_timeline
+
+    if generate:
+        x_common.DATA_DIR.mkdir(parents=True, exist_ok=True)
+        x_common.CONFIG_PATH.write_text(json.dumps({"handle": "bench", "user_id": "42"}))
+        x_timeline.save_store(synthetic_store(n))
+        return {"size": n}
+
+    result = {"size": n, "us_per_record": {}, "store_bytes": x_timeline.TWEETS_PATH.stat().st_size}
+    per = result["us_per_record"]
+
+    rss_before_load = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    seconds, store = _timed(x_timeline.load_store)
+    per["load_store"] = seconds / n * 1e6
+    rss_after_load = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    seconds, _ = _timed(x_timeline.save_store, store)
+    per["save_store"] = seconds / n * 1e6
+
+    # store_tweets on API-shaped objects, capped so the 1M run doesn't spend its time building them
+    sample = list(store.values())[:min(n, 100_000)]
+    api_tweets = [tweepy.Tweet({
+        "id": t.id, "text": t.text,
+        "created_at": datetime.fromtimestamp(t.created_ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        "public_metrics": t.metrics, "edit_history_tweet_ids": [t.id],
+    }) for t in sample]
+    seconds, _ = _timed(x_timeline.store_tweets, api_tweets, {})
+    per["store_tweets"] = seconds / len(api_tweets) * 1e6
+    del api_tweets
+
+    # cmd_top end to end: config, store load, sort, top-20 render
+    sink = io.StringIO()
+    with redirect_stdout(sink):
+        seconds, _ = _timed(x_timeline.cmd_top, Namespace(days=None, max=20))
+    per["top"] = seconds / n * 1e6
+
+    seconds, recent = _timed(x_common.local_records, store, 24)
+    per["hours_filter"] = seconds / n * 1e6
+
+    render = sample[:min(n, 20_000)]
+    seconds, _ = _timed(lambda: [x_timeline.format_tweet(t, i, "bench") for i, t in enumerate(render, 1)])
+    per["render"] = seconds / len(render) * 1e6
+
+    seconds, _ = _timed(lambda: [(x_common.time_ago(t.created_ts), x_common.format_time(t.created_ts))
+                                 for t in render])
+    per["parse_time"] = seconds / len(render) * 1e6
+
+    # ru_maxrss is KB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    result["rss_peak_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    result["rss_load_bytes"] = max(rss_after_load - rss_before_load, 0) * scale
+    per["rss"] = result["rss_load_bytes"] / n
+    result["recent_24h"] = len(recent)
+    return result
+
+
+def check_store_results(results: list[dict], thresholds: dict) -> list[str]:
+    failures = []
+    for r in results:
+        for metric, limit in thresholds.items():
+            value = r["us_per_record"].get(metric)
+            if value is not None and value > limit:
+                unit = "B" if metric == "rss" else "us"
+                failures.append(f"{metric} at {r['size']:,}: {value:.1f}{unit}/record > {limit:g}{unit}")
+    # Below 10k records fixed costs and timer noise dominate the per-record numbers
+    small = next((r for r in results if r["size"] >= 10_000), results[0]) if results else None
+    large = results[-1] if results else None
+    if small and large and large["size"] > small["size"]:
+        for metric in thresholds:
+            if metric == "rss":
+                continue
+            a, b = small["us_per_record"].get(metric), large["us_per_record"].get(metric)
+            if a and b and b / a > MAX_SCALING:
+                failures.append(f"{metric} scales superlinearly: {a:.1f}us -> {b:.1f}us per record "
+                                f"({small['size']:,} -> {large['size']:,})")
+    return failures
+
+
+def cmd_store(args):
+    if args.child_size:
+        print(json.dumps(store_child(args.child_size, args.generate)))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="x-bench-store-") as tmp:
+        for n in args.sizes:
+            env = {**os.environ, "HOME": tempfile.mkdtemp(dir=tmp)}
+            env.pop("X_ACCOUNT", None)
+            for phase in (["--generate"], []):
+                proc = subprocess.run([sys.executable, __file__, "store", "--child-size", str(n), *phase],
+                                      env=env, capture_output=True, text=True)
+                if proc.returncode:
+                    break
+            if proc.returncode:
+                print(f"store benchmark at {n:,} failed:\n{proc.stderr}", file=sys.stderr)
+                sys.exit(1)
+            results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+            print(f"  {n:,} records done", file=sys.stderr)
+
+    thresholds = dict(STORE_THRESHOLDS)
+    if args.thresholds:
+        thresholds.update(json.loads(Path(args.thresholds).read_text()))
+
+    metrics = ["load_store", "save_store", "store_tweets", "top", "hours_filter", "render", "parse_time"]
+    print("Store benchmarks — microseconds per record (lower is better)")
+    print(f"{'records':>10} {'file MB':>8} " + " ".join(f"{m:>12}" for m in metrics) + f" {'RSS B/rec':>10}")
+    for r in results:
+        per = r["us_per_record"]
+        print(f"{r['size']:>10,} {r['store_bytes'] / 1e6:8.1f} "
+              + " ".join(f"{per[m]:12.2f}" for m in metrics) + f" {per['rss']:10,.0f}")
+    print(f"{'threshold':>10} {'':>8} " + " ".join(f"{thresholds[m]:12g}" for m in metrics)
+          + f" {thresholds['rss']:10,}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"kind": "store", "python": sys.version.split()[0],
+                                                 "thresholds": thresholds, "results": results}, indent=2))
+        print(f"\nResults written to {args.output}")
+
+    failures = check_store_results(results, thresholds)
+    if failures:
+        print("\nREGRESSIONS:")
+        for f in failures:
+            print(f"  {f}")
+        sys.exit(1)
+    print("\nAll within thresholds.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the X skill scripts")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    e2e_p = subparsers.add_parser("e2e", help="Run every command against the local mock API")
+    e2e_p.add_argument("--repeat", type=int, default=3, help="Cold passes over all commands (default: 3)")
+    e2e_p.add_argument("--only", nargs="+", metavar="NAME", help="Only commands whose name contains NAME")
+    e2e_p.add_argument("--output", metavar="FILE", help="Write results as JSON")
+    e2e_p.add_argument("--compare", metavar="FILE", help="Show change against a previous --output file")
+    add_mock_args(e2e_p)
+
+    store_p = subparsers.add_parser("store", help="Store load/save, sorting and rendering at 1k-1M records")
+    store_p.add_argument("--sizes", type=int, nargs="+", default=STORE_SIZES,
+                         help="Store sizes in records (default: 1000 10000 100000 1000000)")
+    store_p.add_argument("--thresholds", metavar="FILE", help="JSON overrides for the per-record thresholds")
+    store_p.add_argument("--output", metavar="FILE", help="Write results as JSON")
+    store_p.add_argument("--child-size", type=int, help=argparse.SUPPRESS)
+    store_p.add_argument("--generate", action="store_true", help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+    if args.command == "e2e":
+        cmd_e2e(args)
+    elif args.command == "store":
+        cmd_store(args)
+
+
+if __name__ == "__main__":
+    main()
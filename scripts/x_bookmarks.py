@@ -8,39 +8,87 @@
 """X (Twitter) bookmarks — save, list, and manage bookmarked posts."""
 
 import argparse
-import json
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
-import tweepy
-
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 from x_common import (
-    DATA_DIR, load_config, get_client,
-    track_usage, budget_warning, check_budget,
-    format_time, time_ago, format_number, handle_api_error,
+    TweetRecord, load_record_store, save_record_store, to_epoch, now_epoch,
+    load_users, save_users, remember_users, join_authors, fields_for, merge_record,
+    add_account_args, add_profile_args, setup_profiling, add_cassette_args, setup_cassette,
+    add_deadline_args, setup_deadline,
+    add_output_args, setup_output, emit, emit_summary,
+    DATA_DIR, API_ERRORS, load_config, get_client,
+    track_usage, today_usage, budget_warning, check_budget, CALL_COSTS, budget_refusal,
+    offline_reason, staleness_label, print_offline_header,
+    new_plan, plan_step, get_step, print_plan, plan_cost,
+    format_number, handle_api_error, cost_line,
 )
 
 BOOKMARKS_PATH = DATA_DIR / "bookmarks.json"
 
-TWEET_FIELDS = [
-    "created_at", "public_metrics", "text", "author_id",
-    "conversation_id", "referenced_tweets",
-]
-
-USER_FIELDS = ["username", "name", "public_metrics"]
-
 
 def load_store() -> dict:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    if BOOKMARKS_PATH.exists():
-        return json.loads(BOOKMARKS_PATH.read_text())
-    return {}
+    return load_record_store(BOOKMARKS_PATH)
 
 
 def save_store(store: dict):
-    BOOKMARKS_PATH.write_text(json.dumps(store, indent=2))
+    save_record_store(BOOKMARKS_PATH, store)
+
+
+def print_bookmark(b: TweetRecord, index: int, label: str | None = None):
+    """Print a single bookmark. `label` marks served-from-store staleness."""
+    tid = b.id
+    author_handle = b.author_username or "unknown"
+
+    date_str = ""
+    if b.created_ts is not None:
+        date_str = datetime.fromtimestamp(b.created_ts, timezone.utc).strftime("%b %d, %Y")
+
+    text = b.text
+    if len(text) > 200:
+        text = text[:197] + "..."
+
+    likes, retweets, replies, impressions = b.likes, b.retweets, b.replies, b.impressions
+
+    metrics_parts = []
+    if likes:
+        metrics_parts.append(f"♥ {format_number(likes)}")
+    if retweets:
+        metrics_parts.append(f"🔁 {format_number(retweets)}")
+    if replies:
+        metrics_parts.append(f"💬 {format_number(replies)}")
+    if impressions:
+        metrics_parts.append(f"📊 {format_number(impressions)}")
+
+    print(f"{index}. @{author_handle} · {date_str}")
+    print(f"   \"{text}\"")
+    if metrics_parts:
+        print(f"   {'  '.join(metrics_parts)}")
+    if label:
+        print(f"   ({label})")
+    print(f"   https://x.com/{author_handle}/status/{tid}")
+    print()
+
+
+def serve_list_offline(args, store: dict, reason: str):
+    """List bookmarks from the local store when the API can't be reached."""
+    print_offline_header(reason)
+    # Bookmark order is "most recently saved" — approximate with stored_at
+    stored = sorted(store.values(), key=lambda b: b.stored_ts or 0, reverse=True)[:args.max]
+    join_authors(stored, load_users())
+    if not stored:
+        print("No bookmarks in local store yet.")
+        return
+    print(f"Your Bookmarks (from local store, {len(stored)})")
+    print("=" * 50)
+    for i, b in enumerate(stored, 1):
+        print_bookmark(b, i, label=staleness_label(b))
+        emit("bookmark", b, label=staleness_label(b))
+    print(f"---\n(Served from local store — 0 API calls)")
+    print(f"Today's spend: ${today_usage().get('est_cost', 0):.3f}")
+    emit_summary(source="local")
 
 
 def cmd_list(args):
@@ -51,111 +99,78 @@ def cmd_list(args):
     force = args.force or args.no_budget
     suppress = args.no_budget
 
+    plan = new_plan("x_bookmarks.py list")
+    plan_step(plan, "bookmarks", "GET /2/users/:id/bookmarks", note=f"up to {min(args.max, 100)} bookmarks",
+              params=dict(
+                  max_results=min(args.max, 100),
+                  **fields_for("bookmarks"),
+                  user_auth=True,
+              ))
+
     if args.dry_run:
-        print("[DRY RUN] x_bookmarks.py list")
-        print(f"  Would cost: ~$0.005 (1 tweet read)")
+        print_plan(plan)
         budget_warning(config, suppress=suppress)
         return
 
-    if not check_budget(config, force):
+    store = load_store()
+
+    if args.offline:
+        serve_list_offline(args, store, "--offline")
+        return
+
+    if not check_budget(config, force, plan_cost(plan)):
+        serve_list_offline(args, store, budget_refusal())
         return
 
     client = get_client(config)
-    store = load_store()
 
     try:
-        resp = client.get_bookmarks(
-            max_results=min(args.max, 100),
-            tweet_fields=TWEET_FIELDS,
-            expansions=["author_id"],
-            user_fields=USER_FIELDS,
-            user_auth=True,
-        )
-    except tweepy.errors.TweepyException as e:
+        resp = client.get_bookmarks(**get_step(plan, "bookmarks")["params"])
+    except API_ERRORS as e:
         handle_api_error(e)
+        reason = offline_reason(e)
+        if reason:
+            serve_list_offline(args, store, reason)
         return
 
     day_usage = track_usage(tweet_reads=1)
     budget_warning(config, suppress=suppress)
 
-    # Build author lookup
-    authors = {}
-    if resp.includes and "users" in resp.includes:
-        for user in resp.includes["users"]:
-            authors[str(user.id)] = {
-                "username": user.username,
-                "name": user.name,
-                "followers": user.public_metrics["followers_count"] if user.public_metrics else 0,
-            }
+    # Refresh the users table from includes
+    authors = remember_users(load_users(), resp)
+    save_users(authors)
 
     if not resp.data:
         print("No bookmarks found.")
-        print(f"\n---\nEst. API cost: ~$0.005 (1 tweet read)")
+        print(f"\n---\n{cost_line(CALL_COSTS['tweet'], '1 tweet read')}")
         print(f"Today's spend: ${day_usage['est_cost']:.3f}")
+        emit_summary(1, CALL_COSTS["tweet"], bookmarks=0)
         return
 
     # Store and display
+    stored_ts = now_epoch()
     for tweet in resp.data:
         tid = str(tweet.id)
         author = authors.get(str(tweet.author_id), {})
-        store[tid] = {
-            "id": tid,
-            "text": tweet.text,
-            "created_at": tweet.created_at.isoformat() if tweet.created_at else None,
-            "author_id": str(tweet.author_id) if tweet.author_id else "",
-            "author_username": author.get("username", "unknown"),
-            "author_name": author.get("name", ""),
-            "metrics": dict(tweet.public_metrics) if tweet.public_metrics else {},
-            "stored_at": datetime.now(timezone.utc).isoformat(),
-        }
+        merge_record(store, TweetRecord(
+            tid, tweet.text, to_epoch(tweet.created_at), stored_ts,
+            author_id=str(tweet.author_id) if tweet.author_id else "",
+            author_username=author.get("username", "unknown"),
+            author_name=author.get("name", ""),
+            metrics=tweet.public_metrics,
+        ), "bookmarks")
+        emit("bookmark", store[tid])
     save_store(store)
 
     print(f"Your Bookmarks ({len(resp.data)} saved)")
     print("=" * 50)
 
     for i, tweet in enumerate(resp.data, 1):
-        tid = str(tweet.id)
-        b = store[tid]
-        author_handle = b.get("author_username", "unknown")
-        created = b.get("created_at", "")
-
-        date_str = ""
-        if created:
-            try:
-                dt = datetime.fromisoformat(created.replace("Z", "+00:00"))
-                date_str = dt.strftime("%b %d, %Y")
-            except (ValueError, TypeError):
-                date_str = created
-
-        text = b.get("text", "")
-        if len(text) > 200:
-            text = text[:197] + "..."
-
-        pm = b.get("metrics", {})
-        likes = pm.get("like_count", 0)
-        retweets = pm.get("retweet_count", 0)
-        replies = pm.get("reply_count", 0)
-        impressions = pm.get("impression_count", 0)
-
-        metrics_parts = []
-        if likes:
-            metrics_parts.append(f"♥ {format_number(likes)}")
-        if retweets:
-            metrics_parts.append(f"🔁 {format_number(retweets)}")
-        if replies:
-            metrics_parts.append(f"💬 {format_number(replies)}")
-        if impressions:
-            metrics_parts.append(f"📊 {format_number(impressions)}")
-
-        print(f"{i}. @{author_handle} · {date_str}")
-        print(f"   \"{text}\"")
-        if metrics_parts:
-            print(f"   {'  '.join(metrics_parts)}")
-        print(f"   https://x.com/{author_handle}/status/{tid}")
-        print()
-
-    print(f"---\nEst. API cost: ~$0.005 (1 tweet read)")
+        print_bookmark(store[str(tweet.id)], i)
+
+    print(f"---\n{cost_line(CALL_COSTS['tweet'], '1 tweet read')}")
     print(f"Today's spend: ${day_usage['est_cost']:.3f}")
+    emit_summary(1, CALL_COSTS["tweet"], bookmarks=len(resp.data))
 
 
 def cmd_add(args):
@@ -174,13 +189,14 @@ def cmd_add(args):
 
     try:
         client.bookmark(args.tweet_id, user_auth=True)
-    except tweepy.errors.TweepyException as e:
+    except API_ERRORS as e:
         handle_api_error(e)
         return
 
     track_usage()  # Free action, but log it
     budget_warning(config, suppress=suppress)
     print(f"Bookmarked: https://x.com/i/status/{args.tweet_id}")
+    emit("bookmarked", id=args.tweet_id)
 
 
 def cmd_remove(args):
@@ -199,7 +215,7 @@ def cmd_remove(args):
 
     try:
         client.remove_bookmark(args.tweet_id, user_auth=True)
-    except tweepy.errors.TweepyException as e:
+    except API_ERRORS as e:
         handle_api_error(e)
         return
 
@@ -212,12 +228,14 @@ def cmd_remove(args):
     track_usage()  # Free action, but log it
     budget_warning(config, suppress=suppress)
     print(f"Removed bookmark: {args.tweet_id}")
+    emit("unbookmarked", id=args.tweet_id)
 
 
 def main():
     parser = argparse.ArgumentParser(description="X bookmarks — save and manage bookmarked posts")
     parser.add_argument("--force", action="store_true", help="Override daily budget guard")
     parser.add_argument("--no-budget", action="store_true", help="Skip all budget checks and warnings")
+    parser.add_argument("--offline", action="store_true", help="Serve from local store only, no API calls")
     parser.add_argument("--dry-run", action="store_true", help="Show estimated cost without making API calls")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
@@ -230,7 +248,16 @@ def main():
     remove_p = subparsers.add_parser("remove", help="Remove a bookmark")
     remove_p.add_argument("tweet_id", help="Tweet ID to remove from bookmarks")
 
+    add_output_args(parser)
+    add_account_args(parser)
+    add_profile_args(parser)
+    add_cassette_args(parser)
+    add_deadline_args(parser)
     args = parser.parse_args()
+    setup_output(args)
+    setup_profiling(args)
+    setup_cassette(args)
+    setup_deadline(args)
     if args.command == "list":
         cmd_list(args)
     elif args.command == "add":
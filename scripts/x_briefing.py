@@ -9,99 +9,110 @@
 
 import argparse
 import json
+import os
+import subprocess
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
-import tweepy
-
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 from x_common import (
-    DATA_DIR, load_config, save_config, get_client,
-    track_usage, budget_warning, check_budget,
-    format_number, handle_api_error,
+    TweetRecord, load_record_store, save_record_store, to_epoch, now_epoch,
+    load_users, save_users, remember_users, join_authors, read_json, write_json,
+    fields_for, merge_record, load_triage, triage_score, group_near_duplicates,
+    add_account_args, add_profile_args, setup_profiling, add_cassette_args, setup_cassette,
+    add_deadline_args, setup_deadline,
+    add_output_args, setup_output, emit, emit_summary,
+    DATA_DIR, PROFILE_FIELDS, load_config, save_config, get_client,
+    track_usage, budget_warning, check_budget, CALL_COSTS, budget_refusal,
+    profile_to_dict, load_cached_profile, save_cached_profile,
+    refresh_profile_in_background, deadline_hit, deadline_env, time_left,
+    API_ERRORS, offline_reason, local_records, staleness_label, print_offline_header,
+    new_plan, plan_step, plan_hit, plan_served, get_step, print_plan, plan_cost,
+    record_pages, expected_pages,
+    today_usage, format_time, time_ago, format_number, handle_api_error, cost_line, replaying,
+    account_dir, list_accounts,
 )
 
 TWEETS_PATH = DATA_DIR / "tweets.json"
 MENTIONS_PATH = DATA_DIR / "mentions.json"
+BRIEFING_CACHE_PATH = DATA_DIR / "briefing.json"
+BRIEFING_CACHE_VERSION = 1
 
-TWEET_FIELDS = [
-    "created_at", "public_metrics", "text", "author_id",
-    "conversation_id", "in_reply_to_user_id", "referenced_tweets",
-]
-
-USER_FIELDS = ["username", "name", "verified", "public_metrics"]
-
-PROFILE_FIELDS = [
-    "created_at", "description", "location", "public_metrics",
-    "profile_image_url", "url", "verified", "verified_type",
-]
+# Prepared briefings older than this (minutes) fall back to live fetching
+DEFAULT_BRIEFING_MAX_AGE = 120
 
 HIGH_FOLLOWER_THRESHOLD = 10_000
 
 
 def load_tweet_store() -> dict:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    if TWEETS_PATH.exists():
-        return json.loads(TWEETS_PATH.read_text())
-    return {}
+    return load_record_store(TWEETS_PATH)
 
 
 def save_tweet_store(store: dict):
-    TWEETS_PATH.write_text(json.dumps(store, indent=2))
+    save_record_store(TWEETS_PATH, store)
 
 
 def load_mention_store() -> dict:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    if MENTIONS_PATH.exists():
-        return json.loads(MENTIONS_PATH.read_text())
-    return {}
+    return load_record_store(MENTIONS_PATH)
 
 
 def save_mention_store(store: dict):
-    MENTIONS_PATH.write_text(json.dumps(store, indent=2))
+    save_record_store(MENTIONS_PATH, store)
 
 
-def cmd_briefing(args):
-    config = load_config()
-    if not config:
-        return
-
-    force = args.force or args.no_budget
-    suppress = args.no_budget
+def plan_briefing(config: dict, args, prepared: dict | None, use_cached_profile: bool,
+                  cached_profile: dict | None) -> dict:
     hours = args.hours
+    plan = new_plan(f"x_briefing.py (last {hours}h)")
+    if prepared:
+        plan_hit(plan, f"prepared briefing from {time_ago(prepared['generated_at'])}")
+        return plan
 
-    if args.dry_run:
-        print(f"[DRY RUN] x_briefing.py (last {hours}h)")
-        print(f"  Would cost: ~$0.020 (2 tweet reads + 1 user read)")
-        print(f"  Breakdown: timeline $0.005 + mentions $0.005 + profile $0.010")
-        budget_warning(config, suppress=suppress)
-        return
+    budget_mode = config.get("budget_mode", "guarded")
+    auto_paginate = budget_mode in ("relaxed", "unlimited") or args.no_budget
+    # Guarded mode fetches one page per section; otherwise project pages from past runs
+    max_calls = None if auto_paginate else 1
+    posts_pages = expected_pages("briefing.posts") if auto_paginate else 1
+    mention_pages = expected_pages("briefing.mentions") if auto_paginate else 1
+    note = f"last {hours}h, 100 per page" + ("" if auto_paginate else ", first page only")
+    plan_step(plan, "posts", "GET /2/users/:id/tweets", expected=max(posts_pages, 1),
+              max_calls=max_calls, note=note)
+    plan_step(plan, "mentions", "GET /2/users/:id/mentions", expected=max(mention_pages, 1),
+              max_calls=max_calls, note=note)
+    if use_cached_profile:
+        plan_hit(plan, f"profile (cached {time_ago(cached_profile['fetched_at'])})")
+    else:
+        plan_step(plan, "profile", "GET /2/users/me", kind="user")
+    return plan
 
-    if not check_budget(config, force):
-        return
 
-    client = get_client(config)
+def build_briefing(config: dict, args, client, plan: dict,
+                   cached_profile: dict | None, profile_fresh: bool) -> dict:
+    """Fetch posts, mentions and profile, and materialize the briefing model."""
     user_id = config["user_id"]
-    handle = config["handle"]
-    budget_mode = config.get("budget_mode", "guarded")
-    auto_paginate = budget_mode in ("relaxed", "unlimited") or args.no_budget
+    hours = args.hours
     start_time = datetime.now(timezone.utc) - timedelta(hours=hours)
     api_calls_tweet = 0
     api_calls_user = 0
+    notes = []
 
     tweet_store = load_tweet_store()
     mention_store = load_mention_store()
 
     # === 1. YOUR POSTS ===
     posts = []
+    post_pages = 0
+    max_calls = get_step(plan, "posts")["max_calls"]
     try:
         pagination_token = None
         while True:
             kwargs = dict(
                 id=user_id,
                 max_results=100,
-                tweet_fields=TWEET_FIELDS,
+                **fields_for("briefing.posts"),
                 exclude=["retweets"],
                 start_time=start_time,
                 user_auth=True,
@@ -110,43 +121,50 @@ def cmd_briefing(args):
                 kwargs["pagination_token"] = pagination_token
             resp = client.get_users_tweets(**kwargs)
             api_calls_tweet += 1
+            post_pages += 1
             if resp.data:
                 for tweet in resp.data:
                     tid = str(tweet.id)
-                    data = {
-                        "id": tid,
-                        "text": tweet.text,
-                        "created_at": tweet.created_at.isoformat() if tweet.created_at else None,
-                        "metrics": dict(tweet.public_metrics) if tweet.public_metrics else {},
-                        "stored_at": datetime.now(timezone.utc).isoformat(),
-                    }
-                    tweet_store[tid] = data
+                    record = TweetRecord(tid, tweet.text, to_epoch(tweet.created_at), now_epoch(),
+                                         metrics=tweet.public_metrics)
+                    merge_record(tweet_store, record, "briefing.posts")
+                    data = record.to_dict()
                     posts.append(data)
+                    emit("post", briefing_post(data))
                 save_tweet_store(tweet_store)
             # Paginate if more results exist
             if resp.meta and resp.meta.get("next_token"):
-                if auto_paginate:
+                if not max_calls or post_pages < max_calls:
                     pagination_token = resp.meta["next_token"]
                 else:
-                    print(f"  ⚠️  More than {len(posts)} posts in the last {hours}h — use relaxed/unlimited mode or --no-budget to fetch all")
+                    notes.append(f"⚠️  More than {len(posts)} posts in the last {hours}h — use relaxed/unlimited mode or --no-budget to fetch all")
                     break
             else:
                 break
-    except tweepy.errors.TweepyException as e:
+    except API_ERRORS as e:
         handle_api_error(e)
+        reason = offline_reason(e)
+        if reason and not posts:
+            posts = with_staleness(local_records(tweet_store, hours=hours, own_id=user_id))
+            notes.append(f"Posts served from local store ({reason})")
+            for p in posts:
+                emit("post", briefing_post(p))
 
     # === 2. MENTIONS ===
+    if post_pages:
+        record_pages("briefing.posts", post_pages)
+
     mentions = []
-    authors = {}
+    authors = load_users()
+    mention_pages = 0
+    max_calls = get_step(plan, "mentions")["max_calls"]
     try:
         pagination_token = None
         while True:
             kwargs = dict(
                 id=user_id,
                 max_results=100,
-                tweet_fields=TWEET_FIELDS,
-                expansions=["author_id"],
-                user_fields=USER_FIELDS,
+                **fields_for("briefing.mentions"),
                 start_time=start_time,
                 user_auth=True,
             )
@@ -154,69 +172,281 @@ def cmd_briefing(args):
                 kwargs["pagination_token"] = pagination_token
             resp = client.get_users_mentions(**kwargs)
             api_calls_tweet += 1
+            mention_pages += 1
 
-            if resp.includes and "users" in resp.includes:
-                for user in resp.includes["users"]:
-                    authors[str(user.id)] = {
-                    "username": user.username,
-                    "name": user.name,
-                    "followers": user.public_metrics["followers_count"] if user.public_metrics else 0,
-                }
+            remember_users(authors, resp)
 
             if resp.data:
                 for tweet in resp.data:
                     tid = str(tweet.id)
                     author = authors.get(str(tweet.author_id), {})
-                    data = {
-                        "id": tid,
-                        "text": tweet.text,
-                        "created_at": tweet.created_at.isoformat() if tweet.created_at else None,
-                        "author_id": str(tweet.author_id),
-                        "author_username": author.get("username", "unknown"),
-                        "author_name": author.get("name", ""),
-                        "author_followers": author.get("followers", 0),
-                        "metrics": dict(tweet.public_metrics) if tweet.public_metrics else {},
-                        "stored_at": datetime.now(timezone.utc).isoformat(),
-                    }
-                    mention_store[tid] = data
+                    record = TweetRecord(
+                        tid, tweet.text, to_epoch(tweet.created_at), now_epoch(),
+                        author_id=str(tweet.author_id),
+                        author_username=author.get("username", "unknown"),
+                        author_name=author.get("name", ""),
+                        author_followers=author.get("followers", 0),
+                        metrics=tweet.public_metrics,
+                    )
+                    merge_record(mention_store, record, "briefing.mentions")
+                    data = record.to_dict()
                     mentions.append(data)
+                    emit("mention", briefing_mention(data))
+                save_users(authors)
                 save_mention_store(mention_store)
             # Paginate if more results exist
             if resp.meta and resp.meta.get("next_token"):
-                if auto_paginate:
+                if not max_calls or mention_pages < max_calls:
                     pagination_token = resp.meta["next_token"]
                 else:
-                    print(f"  ⚠️  More than {len(mentions)} mentions in the last {hours}h — use relaxed/unlimited mode or --no-budget to fetch all")
+                    notes.append(f"⚠️  More than {len(mentions)} mentions in the last {hours}h — use relaxed/unlimited mode or --no-budget to fetch all")
                     break
             else:
                 break
-    except tweepy.errors.TweepyException as e:
+    except API_ERRORS as e:
         handle_api_error(e)
+        reason = offline_reason(e)
+        if reason and not mentions:
+            mentions = with_staleness(join_authors(local_records(mention_store, hours=hours), authors))
+            notes.append(f"Mentions served from local store ({reason})")
+            for m in mentions:
+                emit("mention", briefing_mention(m))
+
+    if mention_pages:
+        record_pages("briefing.mentions", mention_pages)
 
     # === 3. PROFILE ===
     profile = None
-    try:
-        resp = client.get_me(user_fields=PROFILE_FIELDS, user_auth=True)
-        api_calls_user += 1
-        if resp.data:
-            profile = resp.data
-    except tweepy.errors.TweepyException as e:
-        handle_api_error(e)
+    profile_note = ""
+    if not get_step(plan, "profile"):
+        profile = cached_profile
+        profile_note = f"cached {time_ago(cached_profile['fetched_at'])}"
+        if not profile_fresh and refresh_profile_in_background():
+            profile_note += ", refreshing"
+    else:
+        try:
+            resp = client.get_me(user_fields=PROFILE_FIELDS, user_auth=True)
+            api_calls_user += 1
+            if resp.data:
+                profile = profile_to_dict(resp.data)
+                save_cached_profile(profile)
+        except API_ERRORS as e:
+            handle_api_error(e)
+            reason = offline_reason(e)
+            if reason and cached_profile:
+                profile = cached_profile
+                profile_note = f"{staleness_label(cached_profile)}, {reason}"
 
     # Track usage
-    day_usage = track_usage(tweet_reads=api_calls_tweet, user_reads=api_calls_user)
-    total_cost = api_calls_tweet * 0.005 + api_calls_user * 0.01
+    track_usage(tweet_reads=api_calls_tweet, user_reads=api_calls_user)
+    if deadline_hit():
+        notes.append("⏱️  Deadline reached — this briefing is incomplete")
+
+    return {
+        "version": BRIEFING_CACHE_VERSION,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "hours": hours,
+        "handle": config["handle"],
+        "notes": notes,
+        "posts": [briefing_post(p) for p in posts],
+        "top_post": top_performer(posts),
+        "mentions": rank_mentions([briefing_mention(m) for m in mentions]),
+        "profile": briefing_profile(profile, profile_note, config),
+        "cost": api_calls_tweet * CALL_COSTS["tweet"] + api_calls_user * CALL_COSTS["user"],
+        "api_calls": api_calls_tweet + api_calls_user,
+        "incomplete": deadline_hit(),
+    }
+
+
+def briefing_post(p: dict) -> dict:
+    post = {"id": p["id"], "text": p["text"], "created_at": p.get("created_at"),
+            "metrics": p.get("metrics", {})}
+    if p.get("label"):
+        post["label"] = p["label"]
+    return post
+
+
+def briefing_mention(m: dict) -> dict:
+    followers = m.get("author_followers", 0)
+    mention = {
+        "id": m["id"],
+        "text": m.get("text", ""),
+        "created_at": m.get("created_at"),
+        "author_username": m.get("author_username", "unknown"),
+        "author_followers": followers,
+        "high_profile": followers >= HIGH_FOLLOWER_THRESHOLD,
+    }
+    if m.get("label"):
+        mention["label"] = m["label"]
+    return mention
+
+
+def rank_mentions(mentions: list[dict]) -> list[dict]:
+    """Order mentions by triage priority; handled ones (off the queue) sink to the bottom.
+
+    Near-duplicates are marked against the highest-ranked mention of their cluster:
+    it gets `near_duplicates` (a count), the rest `duplicate_of` (its ID).
+    """
+    queue = load_triage()
+    now = now_epoch()
+    for m in mentions:
+        row = queue["rows"].get(m["id"])
+        m["priority"] = round(triage_score(row, now), 2) if row else None
+        if m["id"] in queue["handled"]:
+            m["handled"] = True
+        m.pop("near_duplicates", None)
+        m.pop("duplicate_of", None)
+    ranked = sorted(mentions, key=lambda m: (m["priority"] is None, -(m["priority"] or 0)))
+    for first, *rest in group_near_duplicates(ranked):
+        if rest:
+            first["near_duplicates"] = len(rest)
+        for m in rest:
+            m["duplicate_of"] = first["id"]
+    return ranked
+
+
+def with_staleness(records: list[TweetRecord]) -> list[dict]:
+    return [{**r.to_dict(), "label": staleness_label(r)} for r in records]
+
+
+def offline_briefing(config: dict, hours: int, reason: str) -> dict:
+    """Briefing model built purely from the local stores and cached profile."""
+    posts = with_staleness(local_records(load_tweet_store(), hours=hours, own_id=config["user_id"]))
+    mentions = with_staleness(join_authors(local_records(load_mention_store(), hours=hours), load_users()))
+    cached_profile, _ = load_cached_profile(config)
+    return {
+        "version": BRIEFING_CACHE_VERSION,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "hours": hours,
+        "handle": config["handle"],
+        "notes": [],
+        "offline": reason,
+        "posts": [briefing_post(p) for p in posts],
+        "top_post": top_performer(posts),
+        "mentions": rank_mentions([briefing_mention(m) for m in mentions]),
+        "profile": briefing_profile(cached_profile, staleness_label(cached_profile) if cached_profile else "",
+                                    config, track=False),
+        "cost": 0.0,
+        "api_calls": 0,
+    }
+
+
+def top_performer(posts: list[dict]) -> dict | None:
+    """Post with the most impressions (only meaningful with 2+ posts)."""
+    top_post = None
+    top_impressions = 0
+    for p in posts:
+        impressions = p.get("metrics", {}).get("impression_count", 0)
+        if impressions > top_impressions:
+            top_impressions = impressions
+            top_post = p
+    if not top_post or len(posts) < 2:
+        return None
+    return {"id": top_post["id"], "text": top_post["text"], "impressions": top_impressions}
+
+
+def briefing_profile(profile: dict | None, note: str, config: dict, track: bool = True) -> dict | None:
+    """Follower counts + delta, and record today's entry in follower history."""
+    if not profile:
+        return None
+    pm = profile["public_metrics"]
+    followers = pm["followers_count"]
+    following = pm["following_count"]
+
+    # Follower delta
+    delta = None
+    delta_since = None
+    history = config.get("follower_history", [])
+    if history:
+        last = history[-1]
+        delta = followers - last["followers"]
+        delta_since = last["date"]
+
+    # Track follower history
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    if track and (not history or history[-1]["date"] != today):
+        history.append({
+            "date": today,
+            "followers": followers,
+            "following": following,
+            "posts": pm["tweet_count"],
+        })
+        config["follower_history"] = history[-90:]
+        save_config(config)
+
+    return {
+        "followers": followers,
+        "following": following,
+        "delta": delta,
+        "delta_since": delta_since,
+        "note": note,
+    }
+
+
+def save_briefing_cache(model: dict):
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = BRIEFING_CACHE_PATH.with_suffix(".tmp")
+    write_json(tmp, model, phase="save_cache", indent=None)
+    tmp.replace(BRIEFING_CACHE_PATH)
+
+
+def load_briefing_cache(hours: int, max_age_minutes: float) -> dict | None:
+    """Return the prepared briefing if it covers `hours` and is fresh enough."""
+    if not BRIEFING_CACHE_PATH.exists():
+        return None
+    try:
+        model = read_json(BRIEFING_CACHE_PATH, phase="load_cache")
+        generated = datetime.fromisoformat(model["generated_at"])
+    except (ValueError, KeyError):
+        return None
+    if model.get("version") != BRIEFING_CACHE_VERSION or model.get("hours") != hours:
+        return None
+    age = (datetime.now(timezone.utc) - generated).total_seconds() / 60
+    if age > max_age_minutes:
+        return None
+    return model
+
+
+def emit_briefing(model: dict, streamed: bool, prepared: bool):
+    """--json records for a briefing model. Live posts/mentions were streamed while fetching."""
+    if not streamed:
+        for p in model["posts"]:
+            emit("post", p)
+        for m in model["mentions"]:
+            emit("mention", m)
+    for note in model.get("notes", []):
+        emit("note", text=note)
+    if model.get("top_post"):
+        emit("top_post", model["top_post"])
+    if model.get("profile"):
+        emit("profile", model["profile"])
+    emit_summary(0 if prepared else model["api_calls"], 0.0 if prepared else model["cost"],
+                 hours=model["hours"], posts=len(model["posts"]), mentions=len(model["mentions"]),
+                 generated_at=model["generated_at"], prepared=prepared)
+
+
+def render_briefing(model: dict, config: dict, suppress: bool, prepared: bool = False,
+                    streamed: bool = False):
+    hours = model["hours"]
+    posts = model["posts"]
+    if prepared:
+        # Mentions handled since the briefing was prepared drop down the list
+        model["mentions"] = rank_mentions(model["mentions"])
+    mentions = model["mentions"]
+
+    if model.get("offline"):
+        print_offline_header(model["offline"])
+    for note in model.get("notes", []):
+        print(f"  {note}")
 
-    # === OUTPUT ===
     print(f"X BRIEFING — Last {hours} hours")
     print("=" * 50)
+    if prepared:
+        print(f"(Prepared {time_ago(model['generated_at'])} at {format_time(model['generated_at'])})")
 
     # Posts section
     print(f"\nYOUR POSTS ({len(posts)} posts)")
     if posts:
-        # Find top performer
-        top_post = None
-        top_impressions = 0
         for p in posts:
             text = p["text"]
             if len(text) > 60:
@@ -238,84 +468,251 @@ def cmd_briefing(args):
                 metrics_parts.append(f"📊 {format_number(impressions)}")
 
             metrics_str = "  ".join(metrics_parts) if metrics_parts else "no metrics yet"
-            print(f"  \"{text}\" — {metrics_str}")
+            label = f" ({p['label']})" if p.get("label") else ""
+            print(f"  \"{text}\" — {metrics_str}{label}")
 
-            if impressions > top_impressions:
-                top_impressions = impressions
-                top_post = p
-
-        if top_post and len(posts) > 1:
+        top_post = model.get("top_post")
+        if top_post:
             top_text = top_post["text"]
             if len(top_text) > 50:
                 top_text = top_text[:47] + "..."
-            print(f"  Top performer: \"{top_text}\" ({format_number(top_impressions)} impressions)")
+            print(f"  Top performer: \"{top_text}\" ({format_number(top_post['impressions'])} impressions)")
     else:
         print("  No posts in this period.")
 
     # Mentions section
-    print(f"\nMENTIONS ({len(mentions)} new)")
+    collapsed = sum(1 for m in mentions if m.get("duplicate_of"))
+    collapsed_note = f", {collapsed} near-duplicates collapsed" if collapsed else ""
+    print(f"\nMENTIONS ({len(mentions)} new{collapsed_note})")
     if mentions:
         for m in mentions:
+            if m.get("duplicate_of"):
+                continue
             username = m.get("author_username", "unknown")
             followers = m.get("author_followers", 0)
             text = m.get("text", "")
             if len(text) > 80:
                 text = text[:77] + "..."
 
-            flag = " [HIGH-PROFILE]" if followers >= HIGH_FOLLOWER_THRESHOLD else ""
-            marker = "  *" if followers >= HIGH_FOLLOWER_THRESHOLD else "  "
-            print(f"{marker}@{username} ({format_number(followers)} followers): \"{text}\"{flag}")
+            flag = " [HIGH-PROFILE]" if m.get("high_profile") else ""
+            marker = "  *" if m.get("high_profile") else "  "
+            label = f" ({m['label']})" if m.get("label") else ""
+            if m.get("handled"):
+                label += " [handled]"
+            if m.get("near_duplicates"):
+                label += f" [+{m['near_duplicates']} near-identical]"
+            print(f"{marker}@{username} ({format_number(followers)} followers): \"{text}\"{flag}{label}")
+        if any(m.get("priority") is not None for m in mentions):
+            print("  (Most worth a reply first — x_mentions.py triage; mark done with x_mentions.py handle ID)")
     else:
         print("  No new mentions.")
 
     # Profile section
+    profile = model.get("profile")
     if profile:
-        pm = profile.public_metrics
-        followers = pm["followers_count"]
-        following = pm["following_count"]
-
-        # Follower delta
         delta_str = ""
-        history = config.get("follower_history", [])
-        if history:
-            last = history[-1]
-            diff = followers - last["followers"]
-            if diff > 0:
-                delta_str = f" (+{diff} since {last['date']})"
-            elif diff < 0:
-                delta_str = f" ({diff} since {last['date']})"
-
-        print(f"\nPROFILE")
-        print(f"  Followers: {format_number(followers)}{delta_str}")
-        print(f"  Following: {format_number(following)}")
-
-        # Track follower history
-        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-        if not history or history[-1]["date"] != today:
-            history.append({
-                "date": today,
-                "followers": followers,
-                "following": following,
-                "posts": pm["tweet_count"],
-            })
-            config["follower_history"] = history[-90:]
-            save_config(config)
+        delta = profile.get("delta")
+        if delta:
+            sign = "+" if delta > 0 else ""
+            delta_str = f" ({sign}{delta} since {profile['delta_since']})"
+        note = f" ({profile['note']})" if profile.get("note") else ""
+
+        print(f"\nPROFILE{note}")
+        print(f"  Followers: {format_number(profile['followers'])}{delta_str}")
+        print(f"  Following: {format_number(profile['following'])}")
 
     # Footer
+    day_usage = today_usage()
     budget = config.get("daily_budget", 0.10)
     remaining = max(0, budget - day_usage.get("est_cost", 0))
-    print(f"\nBriefing cost: ${total_cost:.2f} | Today's total: ${day_usage['est_cost']:.3f} | Budget: ${remaining:.2f} remaining")
+    if prepared:
+        print(f"\n(Served from prepared briefing — 0 API calls, ${model['cost']:.2f} when prepared)")
+        print(f"Today's total: ${day_usage.get('est_cost', 0):.3f} | Budget: ${remaining:.2f} remaining")
+    else:
+        cost = f"${model['cost']:.2f}"
+        if replaying():
+            cost = f"$0.00 (replayed — recorded run ${model['cost']:.2f})"
+        print(f"\nBriefing cost: {cost} | Today's total: ${day_usage.get('est_cost', 0):.3f} | Budget: ${remaining:.2f} remaining")
+    emit_briefing(model, streamed, prepared)
     budget_warning(config, suppress=suppress)
 
 
+def cmd_briefing(args):
+    config = load_config()
+    if not config:
+        return
+
+    force = args.force or args.no_budget
+    suppress = args.no_budget
+    hours = args.hours
+    stale_ok = args.stale_ok or config.get("profile_swr", False)
+    max_age = args.max_age if args.max_age is not None else config.get(
+        "briefing_max_age", DEFAULT_BRIEFING_MAX_AGE)
+
+    prepared = None
+    if not args.prepare and not args.live:
+        prepared = load_briefing_cache(hours, max_age)
+
+    cached_profile, profile_fresh = (None, False) if args.no_cache else load_cached_profile(config)
+    use_cached_profile = cached_profile is not None and (profile_fresh or stale_ok)
+
+    plan = plan_briefing(config, args, prepared, use_cached_profile, cached_profile)
+
+    if args.dry_run:
+        print_plan(plan)
+        budget_warning(config, suppress=suppress)
+        return
+
+    if prepared:
+        render_briefing(prepared, config, suppress, prepared=True)
+        plan_served(plan)
+        return
+
+    if args.offline:
+        render_briefing(offline_briefing(config, hours, "--offline"), config, suppress)
+        return
+
+    if not check_budget(config, force, plan_cost(plan)):
+        render_briefing(offline_briefing(config, hours, budget_refusal()), config, suppress)
+        return
+
+    client = get_client(config)
+    model = build_briefing(config, args, client, plan, cached_profile, profile_fresh)
+    plan_served(plan)
+
+    if args.prepare:
+        if model["incomplete"]:
+            # Don't let later runs serve a cut-short briefing as if it were whole
+            print("Deadline reached — briefing not prepared; what was fetched is in the local store.")
+            emit_summary(model["api_calls"], model["cost"], posts=len(model["posts"]),
+                         mentions=len(model["mentions"]))
+            return
+        save_briefing_cache(model)
+        print(f"Prepared briefing: {len(model['posts'])} posts, {len(model['mentions'])} mentions "
+              f"(last {hours}h) -> {BRIEFING_CACHE_PATH}")
+        print(f"{cost_line(model['cost'])} | Today's spend: ${today_usage().get('est_cost', 0):.3f}")
+        emit_summary(model["api_calls"], model["cost"], prepared_path=str(BRIEFING_CACHE_PATH),
+                     posts=len(model["posts"]), mentions=len(model["mentions"]))
+        return
+
+    render_briefing(model, config, suppress, streamed=True)
+
+
+def child_argv(args) -> list[str]:
+    """The briefing options to pass on to each account's run under --all."""
+    argv = ["--hours", str(args.hours)]
+    for flag in ("force", "no_budget", "no_cache", "stale_ok", "prepare", "live", "offline", "dry_run"):
+        if getattr(args, flag):
+            argv.append("--" + flag.replace("_", "-"))
+    if args.max_age is not None:
+        argv += ["--max-age", str(args.max_age)]
+    return argv
+
+
+def cmd_briefing_all(args):
+    """Brief every configured account at once and render one combined report.
+
+    Each account runs as its own --json child process, since an account's paths,
+    budget and cursors are fixed per process. The children fetch in parallel, each
+    over its own connection pool (the shared session is per process, so accounts
+    don't share connections); their reports print in account order, followed by
+    combined totals.
+    """
+    names = list_accounts()
+    if not names:
+        print("No accounts configured. Run x_setup.py (add more with --account NAME).")
+        return
+    argv = child_argv(args)
+    env = {k: v for k, v in os.environ.items() if k != "X_ACCOUNT"}
+    # Children share this run's deadline; the grace covers their startup and rendering
+    env.update(deadline_env())
+    left = time_left()
+    timeout = max(left, 0) + 10 if left is not None else None
+
+    def run(name: str):
+        cmd = [sys.executable, str(Path(__file__).resolve()), "--account", name, "--json", *argv]
+        try:
+            proc = subprocess.run(cmd, env=env, capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired as e:
+            stderr = e.stderr.decode() if isinstance(e.stderr, bytes) else (e.stderr or "")
+            proc = subprocess.CompletedProcess(cmd, -9, "", stderr + "\n[killed: past the deadline]")
+        records = [json.loads(line) for line in proc.stdout.splitlines() if line.startswith("{")]
+        return name, proc, records
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(names)) as pool:
+        results = list(pool.map(run, names))
+    elapsed = time.perf_counter() - start
+
+    totals = {"api_calls": 0, "est_cost": 0.0, "today_spend": 0.0, "posts": 0, "mentions": 0}
+    failed = []
+    incomplete = []
+    for name, proc, records in results:
+        handle = json.loads((account_dir(name) / "config.json").read_text()).get("handle", "?")
+        print("━" * 50)
+        print(f"{name.upper()} — @{handle}")
+        print("━" * 50)
+        print(proc.stderr.rstrip())
+        print()
+        if proc.returncode:
+            failed.append(name)
+        for record in records:
+            kind = record.pop("record")
+            if kind == "summary":
+                # One closing summary for the whole run; per-account ones are renamed
+                kind = "account_summary"
+                for key in totals:
+                    totals[key] += record.get(key, 0)
+                if record.get("incomplete"):
+                    incomplete.append(name)
+            emit(kind, record, account=name, handle=handle)
+
+    print("=" * 50)
+    print(f"ALL ACCOUNTS ({len(names)}): {totals['posts']} posts | {totals['mentions']} mentions | "
+          f"fetched in {elapsed:.1f}s")
+    print(f"Briefing cost: ${totals['est_cost']:.3f} ({totals['api_calls']} calls) | "
+          f"Today's total: ${totals['today_spend']:.3f} across accounts")
+    if failed:
+        print(f"[!] Briefing failed for: {', '.join(failed)}")
+    if incomplete:
+        print(f"[incomplete: deadline reached for {', '.join(incomplete)}]")
+    emit("summary", **{k: round(v, 4) if isinstance(v, float) else v for k, v in totals.items()},
+         accounts=len(names), failed=failed, incomplete=incomplete, elapsed_ms=round(elapsed * 1000, 1))
+
+
 def main():
     parser = argparse.ArgumentParser(description="X briefing — morning summary")
     parser.add_argument("--hours", type=int, default=24, help="Lookback period in hours (default: 24)")
     parser.add_argument("--force", action="store_true", help="Override daily budget guard")
     parser.add_argument("--no-budget", action="store_true", help="Skip all budget checks and warnings")
+    parser.add_argument("--no-cache", action="store_true", help="Skip profile cache, always fetch profile")
+    parser.add_argument("--stale-ok", action="store_true",
+                        help="Use an expired cached profile and refresh it in the background")
+    parser.add_argument("--prepare", action="store_true",
+                        help="Fetch now and save a prepared briefing for instant rendering (for cron)")
+    parser.add_argument("--live", action="store_true", help="Ignore any prepared briefing, always fetch")
+    parser.add_argument("--offline", action="store_true", help="Build the briefing from local data only, no API calls")
+    parser.add_argument("--max-age", type=float,
+                        help=f"Max age in minutes of a prepared briefing (default: {DEFAULT_BRIEFING_MAX_AGE})")
     parser.add_argument("--dry-run", action="store_true", help="Show estimated cost without making API calls")
+    parser.add_argument("--all", action="store_true",
+                        help="Brief every configured account in parallel, in one combined report")
+    add_output_args(parser)
+    add_account_args(parser)
+    add_profile_args(parser)
+    add_cassette_args(parser)
+    add_deadline_args(parser)
     args = parser.parse_args()
-    cmd_briefing(args)
+    setup_output(args)
+    setup_profiling(args)
+    setup_cassette(args)
+    setup_deadline(args)
+    if args.all:
+        if args.account:
+            parser.error("--all covers every account; drop --account")
+        cmd_briefing_all(args)
+    else:
+        cmd_briefing(args)
 
 
 if __name__ == "__main__":
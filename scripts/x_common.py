@@ -1,63 +1,2077 @@
 """Shared utilities for x-twitter skill scripts."""
 
+import argparse
+import atexit
+import base64
+import bisect
+import gzip
+import hashlib
 import json
+import math
+import os
+import re
+import struct
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit
 
+import requests
 import tweepy
+import urllib3
+
+try:
+    import fcntl  # the budget ledger's file lock; not on Windows, where only the in-process lock applies
+except ImportError:
+    fcntl = None
+
+try:
+    import zstandard  # optional: smaller, faster cold segments than gzip
+except ImportError:
+    zstandard = None
+
+# Scripts import tweepy before this module, so interpreter startup and imports
+# are measured as the CPU time the process has used by the time we get here.
+_IMPORT_START = time.perf_counter()
+_IMPORT_SECONDS = time.process_time()
+
+# Named accounts (x_setup.py --account NAME) each get a directory under accounts/
+# with the same layout as the default account: their own config — credentials,
+# cursors, budget — and their own data/ partition.
+BASE_CONFIG_DIR = Path.home() / ".openclaw" / "skills-config" / "x-twitter"
+ACCOUNTS_DIR = BASE_CONFIG_DIR / "accounts"
+DEFAULT_ACCOUNT = "default"
+ACCOUNT_NAME_RE = re.compile(r"[A-Za-z0-9_-]{1,40}")
+
+
+def _selected_account() -> str:
+    """--account NAME from the command line, else $X_ACCOUNT, else the default account.
+
+    Read at import, ahead of argparse, because every path below depends on it —
+    so a process serves one account. Anything importing this module (x_bench.py's
+    children too) gets the account its argv and environment name; runs spanning
+    accounts, like x_briefing.py --all, start a process per account.
+    """
+    name = os.environ.get("X_ACCOUNT") or DEFAULT_ACCOUNT
+    argv = sys.argv[1:]
+    for i, arg in enumerate(argv):
+        if arg == "--account" and i + 1 < len(argv):
+            name = argv[i + 1]
+        elif arg.startswith("--account="):
+            name = arg.split("=", 1)[1]
+    if not ACCOUNT_NAME_RE.fullmatch(name):
+        sys.exit(f"Error: invalid account name '{name}' (letters, digits, '-' or '_')")
+    return name
+
+
+def account_dir(name: str) -> Path:
+    return BASE_CONFIG_DIR if name == DEFAULT_ACCOUNT else ACCOUNTS_DIR / name
+
+
+def list_accounts() -> list[str]:
+    """Configured accounts: the default one (if set up) first, then named ones."""
+    names = [DEFAULT_ACCOUNT] if (BASE_CONFIG_DIR / "config.json").exists() else []
+    if ACCOUNTS_DIR.exists():
+        names += sorted(p.parent.name for p in ACCOUNTS_DIR.glob("*/config.json"))
+    return names
+
 
 # Paths
-CONFIG_DIR = Path.home() / ".openclaw" / "skills-config" / "x-twitter"
+ACCOUNT = _selected_account()
+CONFIG_DIR = account_dir(ACCOUNT)
 CONFIG_PATH = CONFIG_DIR / "config.json"
 DATA_DIR = CONFIG_DIR / "data"
 USAGE_PATH = DATA_DIR / "usage.json"
+PROFILE_PATH = DATA_DIR / "profile.json"
+LEDGER_PATH = DATA_DIR / "ledger.json"
 SCRIPT_DIR = Path(__file__).resolve().parent
 
 VERSION = "2.0.1"
 
+# Cost per request by kind (pay-per-use pricing)
+CALL_COSTS = {"tweet": 0.005, "user": 0.01, "write": 0.0}
+
+# Page counts remembered per paginated call, for projecting future runs
+LEDGER_WINDOW = 20
+
+# Anything the API layer can raise — tweepy errors plus raw network failures
+API_ERRORS = (tweepy.errors.TweepyException, requests.exceptions.RequestException)
+
+PROFILE_FIELDS = [
+    "created_at", "description", "location", "public_metrics",
+    "profile_image_url", "url", "verified", "verified_type",
+]
+
+# Profile reads are the most expensive call ($0.01) — reuse for this long (seconds)
+DEFAULT_PROFILE_TTL = 3600
+
+
+# === Instrumentation ===
+#
+# Phase timers and counters are always collected (they're cheap); --profile
+# decides whether they get reported.
+
+_STATS = {"phases": {}, "counters": {}}
+_PROFILE = {"mode": None}
+
+
+@contextmanager
+def timed(phase: str):
+    """Accumulate monotonic wall time spent in `phase`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_phase_time(phase, time.perf_counter() - start)
+
+
+def add_phase_time(phase: str, seconds: float):
+    entry = _STATS["phases"].setdefault(phase, {"seconds": 0.0, "count": 0})
+    entry["seconds"] += seconds
+    entry["count"] += 1
+
+
+def stat_count(name: str, n: int = 1):
+    _STATS["counters"][name] = _STATS["counters"].get(name, 0) + n
+
+
+def read_json(path: Path, phase: str = "load_store", object_hook=None):
+    """json.loads(path.read_text()) that records time and bytes read."""
+    with timed(phase):
+        raw = path.read_bytes()
+        stat_count("bytes_read", len(raw))
+        return json.loads(raw, object_hook=object_hook)
+
+
+def write_json(path: Path, data, phase: str = "save_store", indent: int | None = 2):
+    """Write JSON to `path`, recording time and bytes written."""
+    with timed(phase):
+        raw = json.dumps(data, indent=indent, separators=None if indent else (",", ":"))
+        path.write_text(raw)
+        stat_count("bytes_written", len(raw.encode()))
+
+
+def load_json_store(path: Path) -> dict:
+    """Load a persistent id -> record store ({} if it doesn't exist yet)."""
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        return read_json(path)
+    return {}
+
+
+def save_json_store(path: Path, store: dict):
+    write_json(path, store)
+    observe_store(path, len(store))
+
+
+# === Typed records ===
+#
+# Tweets, mentions and bookmarks are held as TweetRecord: __slots__, epoch-second
+# timestamps and flat metric fields, so display and filter loops never reparse
+# ISO strings. On disk they keep the same JSON shape as always.
+
+def to_epoch(value) -> int | None:
+    """ISO string or datetime -> epoch seconds (None passes through)."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        if value[-1] == "Z":
+            value = value[:-1] + "+00:00"
+        value = datetime.fromisoformat(value)
+    return int(value.timestamp())
+
+
+def epoch_to_iso(ts: int | None) -> str | None:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts is not None else None
+
+
+def now_epoch() -> int:
+    return int(time.time())
+
+
+_METRIC_FIELDS = (
+    ("retweet_count", "retweets"), ("reply_count", "replies"), ("like_count", "likes"),
+    ("quote_count", "quotes"), ("bookmark_count", "bookmarks"), ("impression_count", "impressions"),
+)
+
+# Stored key -> attribute, for keys held as-is
+_PLAIN_KEYS = {
+    "id": "id", "text": "text", "author_id": "author_id", "author_username": "author_username",
+    "author_name": "author_name", "author_followers": "author_followers",
+    "conversation_id": "conversation_id", "type": "kind", "context_text": "context_text",
+}
+_RECORD_KEYS = frozenset(_PLAIN_KEYS) | {"created_at", "stored_at", "metrics", "referenced_tweets", "note_tweet"}
+
+
+class TweetRecord:
+    """A stored tweet, mention or bookmark.
+
+    Hot paths read attributes (created_ts, likes, ...). Everything else can keep
+    using dict-style access — record["text"], record.get("metrics") — which
+    returns the same values the JSON dicts did; unset fields read as missing.
+    """
+
+    __slots__ = (
+        "id", "text", "created_ts", "stored_ts",
+        "author_id", "author_username", "author_name", "author_followers",
+        "conversation_id", "kind", "referenced", "note_text", "context_text",
+        "retweets", "replies", "likes", "quotes", "bookmarks", "impressions",
+        "extra",
+    )
+
+    def __init__(self, id: str, text: str = "", created_ts: int | None = None, stored_ts: int | None = None,
+                 author_id: str | None = None, author_username: str | None = None,
+                 author_name: str | None = None, author_followers: int | None = None,
+                 conversation_id: str | None = None, kind: str | None = None,
+                 referenced: tuple | None = None, note_text: str | None = None,
+                 context_text: str | None = None, metrics: dict | None = None, extra: dict | None = None):
+        self.id = id
+        self.text = text
+        self.created_ts = created_ts
+        self.stored_ts = stored_ts
+        self.author_id = author_id
+        self.author_username = author_username
+        self.author_name = author_name
+        self.author_followers = author_followers
+        self.conversation_id = conversation_id
+        self.kind = kind
+        self.referenced = referenced
+        self.note_text = note_text
+        self.context_text = context_text
+        m = metrics or {}
+        self.retweets = m.get("retweet_count", 0)
+        self.replies = m.get("reply_count", 0)
+        self.likes = m.get("like_count", 0)
+        self.quotes = m.get("quote_count", 0)
+        self.bookmarks = m.get("bookmark_count", 0)
+        self.impressions = m.get("impression_count", 0)
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "TweetRecord":
+        refs = d.get("referenced_tweets")
+        note = d.get("note_tweet")
+        extra = None if _RECORD_KEYS.issuperset(d) else {k: v for k, v in d.items() if k not in _RECORD_KEYS}
+        return cls(
+            d["id"], d.get("text", ""), to_epoch(d.get("created_at")), to_epoch(d.get("stored_at")),
+            d.get("author_id"), d.get("author_username"), d.get("author_name"), d.get("author_followers"),
+            d.get("conversation_id"), d.get("type"),
+            tuple((r["type"], r["id"]) for r in refs) if refs is not None else None,
+            note.get("text") if note else None, d.get("context_text"), d.get("metrics"), extra,
+        )
+
+    def to_dict(self) -> dict:
+        """The stored JSON shape."""
+        d = {"id": self.id, "text": self.text, "created_at": epoch_to_iso(self.created_ts)}
+        for key in ("author_id", "author_username", "author_name", "author_followers", "type",
+                    "conversation_id"):
+            value = getattr(self, _PLAIN_KEYS[key])
+            if value is not None:
+                d[key] = value
+        if self.referenced is not None:
+            d["referenced_tweets"] = [{"type": t, "id": i} for t, i in self.referenced]
+        d["metrics"] = self.metrics
+        if self.note_text is not None:
+            d["note_tweet"] = {"text": self.note_text}
+        if self.context_text is not None:
+            d["context_text"] = self.context_text
+        if self.extra:
+            d.update(self.extra)
+        if self.stored_ts is not None:
+            d["stored_at"] = epoch_to_iso(self.stored_ts)
+        return d
+
+    @property
+    def metrics(self) -> dict:
+        values = {key: getattr(self, attr) for key, attr in _METRIC_FIELDS}
+        return values if any(values.values()) else {}
+
+    @property
+    def engagement(self) -> int:
+        return self.likes + self.retweets + self.replies + self.quotes
+
+    # Dict-style access, for code written against the JSON dicts
+
+    def get(self, key: str, default=None):
+        attr = _PLAIN_KEYS.get(key)
+        if attr:
+            value = getattr(self, attr)
+        elif key in _RECORD_KEYS:
+            value = self.to_dict().get(key)
+        else:
+            value = self.extra.get(key) if self.extra else None
+        return default if value is None else value
+
+    def __getitem__(self, key: str):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value):
+        attr = _PLAIN_KEYS.get(key)
+        if attr:
+            setattr(self, attr, value)
+        elif key in ("created_at", "stored_at"):
+            setattr(self, "created_ts" if key == "created_at" else "stored_ts", to_epoch(value))
+        elif key in _RECORD_KEYS:
+            merged = self.to_dict()
+            merged[key] = value
+            replacement = TweetRecord.from_dict(merged)
+            for slot in self.__slots__:
+                setattr(self, slot, getattr(replacement, slot))
+        else:
+            self.extra = {**(self.extra or {}), key: value}
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def keys(self):
+        return [k for k, v in self.to_dict().items() if v is not None]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __repr__(self):
+        return f"TweetRecord({self.id!r}, {self.text[:30]!r})"
+
+
+def _record_hook(d: dict):
+    # json object_hook: tweet-shaped dicts become records as they're parsed, so
+    # the dicts never all exist at once. Nested dicts (metrics, references) lack id+text.
+    if "id" in d and "text" in d:
+        return TweetRecord.from_dict(d)
+    return d
+
+
+def load_record_store(path: Path) -> dict:
+    """Load an id -> TweetRecord store ({} if it doesn't exist yet)."""
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        return read_json(path, object_hook=_record_hook)
+    return {}
+
+
+def save_record_store(path: Path, store: dict):
+    """Save a record store. Author details live in the users table, not on each record."""
+    users = None
+    out = {}
+    for k, r in store.items():
+        d = r.to_dict() if isinstance(r, TweetRecord) else dict(r)
+        if "author_username" in d or "author_name" in d or "author_followers" in d:
+            username, name, followers = (d.pop(key, None) for key in _AUTHOR_KEYS)
+            author_id = d.get("author_id")
+            if author_id and username and username != "unknown":
+                # Stores written before the users table carry authors inline: seed from them
+                if users is None:
+                    users = load_users()
+                    seeded = len(users)
+                users.setdefault(author_id, {"username": username, "name": name or "",
+                                             "followers": followers or 0, "updated_at": d.get("stored_at")})
+        out[k] = d
+    save_json_store(path, out)
+    if users is not None and len(users) > seeded:
+        save_users(users)
+    _index_pending(path, store)
+
+
+# === Users ===
+#
+# One row per author (id -> username, name, followers), refreshed from every
+# includes.users payload. Records keep only author_id; the name and follower
+# count are joined on at render time, so a single fresh fetch updates them all.
+
+USERS_PATH = DATA_DIR / "users.json"
+
+_AUTHOR_KEYS = ("author_username", "author_name", "author_followers")
+
+
+def load_users() -> dict:
+    return load_json_store(USERS_PATH)
+
+
+def save_users(users: dict):
+    save_json_store(USERS_PATH, users)
+
+
+def user_row(user) -> dict:
+    """Convert a tweepy User into a users-table row."""
+    return {
+        "username": user.username,
+        "name": user.name,
+        "followers": user.public_metrics["followers_count"] if user.public_metrics else 0,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def remember_users(users: dict, resp) -> dict:
+    """Merge a response's includes.users into the users table. Returns the table.
+
+    Calls that didn't ask for public_metrics keep the follower count on file.
+    """
+    if resp.includes and "users" in resp.includes:
+        for user in resp.includes["users"]:
+            uid = str(user.id)
+            row = user_row(user)
+            if not user.public_metrics and uid in users:
+                row["followers"] = users[uid].get("followers", 0)
+            users[uid] = row
+    return users
+
+
+def join_authors(records, users: dict):
+    """Fill author username/name/followers on records from the users table."""
+    for r in records:
+        row = users.get(r.author_id) if r.author_id else None
+        if row:
+            r.author_username = row["username"]
+            r.author_name = row.get("name", "")
+            r.author_followers = row.get("followers", 0)
+    return records
+
+
+def tweet_to_record(t, authors: dict, command: str | None = None) -> TweetRecord:
+    """Convert a tweepy Tweet into a stored tweet record.
+
+    With `command`, fields outside its projection (see COMMAND_FIELDS) stay unset
+    instead of reading as empty, so merge_record keeps what the store has.
+    """
+    fields = COMMAND_FIELDS[command] if command else FIELD_SOURCES
+    note = getattr(t, "note_tweet", None)
+    return TweetRecord(
+        str(t.id), t.text, to_epoch(t.created_at), now_epoch(),
+        author_id=str(t.author_id) if t.author_id else "",
+        author_username=authors.get(str(t.author_id), {}).get("username"),
+        conversation_id=str(t.conversation_id) if t.conversation_id else None,
+        referenced=(tuple((r.type, str(r.id)) for r in (t.referenced_tweets or []))
+                    if "referenced" in fields else None),
+        note_text=note.get("text") if note else None,
+        metrics=t.public_metrics,
+    )
+
+
+# === Field projection ===
+#
+# Each command declares the record fields it actually reads; fields_for() turns
+# that into the smallest tweet_fields / expansions / user_fields for its call.
+# The API always returns a tweet's id and text and a user's id, username and
+# name. A record built from a partial response leaves the other fields unset,
+# and merge_record() keeps whatever the store already had for them.
+
+# Record field -> (tweet_fields, expansions, user_fields) that fill it
+FIELD_SOURCES = {
+    "created": (("created_at",), (), ()),
+    "metrics": (("public_metrics",), (), ()),
+    "author": (("author_id",), ("author_id",), ()),
+    "followers": ((), (), ("public_metrics",)),
+    "conversation": (("conversation_id",), (), ()),
+    "referenced": (("referenced_tweets",), (), ()),
+    "context": (("referenced_tweets",), ("referenced_tweets.id", "referenced_tweets.id.author_id"), ()),
+    "note": (("note_tweet",), (), ()),
+    "lang": (("lang",), (), ()),
+}
+
+# Record field -> the TweetRecord slots it fills
+_FIELD_SLOTS = {
+    "created": ("created_ts",),
+    "metrics": tuple(attr for _, attr in _METRIC_FIELDS),
+    "author": ("author_id", "author_username", "author_name"),
+    "followers": ("author_followers",),
+    "conversation": ("conversation_id",),
+    "referenced": ("referenced", "kind"),
+    "note": ("note_text",),
+}
+_MERGE_SLOTS = tuple(s for s in TweetRecord.__slots__ if s not in ("id", "text", "stored_ts", "extra"))
+
+COMMAND_FIELDS = {
+    "timeline.recent": ("created", "metrics"),
+    "timeline.refresh": ("created", "metrics"),
+    "timeline.activity": ("created",),
+    "mentions": ("created", "metrics", "author", "followers", "conversation", "referenced"),
+    "mentions.context": (),  # just the parent's text
+    "briefing.posts": ("created", "metrics"),
+    "briefing.mentions": ("created", "metrics", "author", "followers"),
+    "bookmarks": ("created", "metrics", "author"),
+    "read": ("created", "metrics", "author", "followers", "conversation", "referenced", "note", "context"),
+    "read.thread": ("created", "metrics", "author", "followers", "conversation", "referenced", "note"),
+    "monitor": ("created", "author", "referenced", "lang"),
+    "watchlist": ("created", "metrics", "author"),
+    "watchlist.add": ("followers",),
+}
+
+
+def fields_for(command: str) -> dict:
+    """The tweet_fields / expansions / user_fields kwargs for a command's call (non-empty ones only)."""
+    parts = ([], [], [])
+    for field in COMMAND_FIELDS[command]:
+        for names, part in zip(FIELD_SOURCES[field], parts):
+            part.extend(n for n in names if n not in part)
+    return {key: part for key, part in zip(("tweet_fields", "expansions", "user_fields"), parts) if part}
+
+
+def merge_record(store: dict, record: TweetRecord, command: str) -> TweetRecord:
+    """Put a record fetched with `command`'s projection into the store. Returns it.
+
+    Fields the projection fetched replace the stored ones; fields it left out are
+    carried over from the stored record rather than blanked.
+    """
+    old = store.get(record.id)
+    if old is not None:
+        fetched = {slot for field in COMMAND_FIELDS[command] for slot in _FIELD_SLOTS.get(field, ())}
+        for slot in _MERGE_SLOTS:
+            if slot not in fetched and getattr(record, slot) in (None, 0, ""):
+                value = getattr(old, slot)
+                if value is not None:
+                    setattr(record, slot, value)
+        if old.extra:
+            record.extra = {**old.extra, **(record.extra or {})}
+    store[record.id] = record
+    _UNINDEXED[record.id] = record
+    return record
+
+# === Retention & cold segments ===
+#
+# With config "retention_days" set (an int, or a dict per store name), `x_setup.py
+# --compact` keeps that many days in the hot store and moves older records into
+# compressed monthly segments under data/cold/. Commands only load the hot store;
+# cold segments are read when a query's time range reaches past the hot window.
+
+COLD_DIR = DATA_DIR / "cold"
+
+RECORD_STORES = {
+    "tweets": DATA_DIR / "tweets.json",
+    "mentions": DATA_DIR / "mentions.json",
+    "bookmarks": DATA_DIR / "bookmarks.json",
+    # x_monitor.py search hits: strangers' posts, kept apart from the tweets store
+    "monitor": DATA_DIR / "monitor_hits.json",
+}
+
+# X snowflake IDs carry their creation time: ms since this epoch, shifted left 22 bits
+SNOWFLAKE_EPOCH_MS = 1288834974657
+
+
+def retention_days(config: dict | None, name: str) -> int | None:
+    """Days kept hot for store `name`, or None if retention isn't configured."""
+    value = (config or {}).get("retention_days")
+    if isinstance(value, dict):
+        value = value.get(name)
+    return int(value) if value else None
+
+
+def _tier_ts(name: str, record: TweetRecord) -> int | None:
+    # Bookmarks age from when they were saved, everything else from when it was posted
+    return record.stored_ts if name == "bookmarks" else record.created_ts
+
+
+def _month(ts: int) -> str:
+    return time.strftime("%Y-%m", time.gmtime(ts))
+
+
+def snowflake_ts(tweet_id: str) -> int | None:
+    try:
+        return ((int(tweet_id) >> 22) + SNOWFLAKE_EPOCH_MS) // 1000
+    except ValueError:
+        return None
+
+
+def cold_segments(name: str) -> dict:
+    """month ("YYYY-MM") -> segment path for store `name`."""
+    if not COLD_DIR.exists():
+        return {}
+    segments = {}
+    for path in COLD_DIR.glob(f"{name}-*.json.*"):
+        if path.suffix not in (".gz", ".zst"):
+            continue
+        month = path.name[len(name) + 1:len(name) + 8]
+        segments[month] = path
+    return dict(sorted(segments.items()))
+
+
+def _read_segment(path: Path) -> dict:
+    with timed("load_cold"):
+        raw = path.read_bytes()
+        stat_count("bytes_read", len(raw))
+        if path.suffix == ".zst":
+            if zstandard is None:
+                raise RuntimeError(f"{path.name} is zstd-compressed; install zstandard to read it")
+            raw = zstandard.ZstdDecompressor().decompress(raw)
+        else:
+            raw = gzip.decompress(raw)
+        return json.loads(raw, object_hook=_record_hook)
+
+
+def _write_segment(name: str, month: str, records: dict) -> Path:
+    """Merge `records` into the month's segment, rewriting it atomically."""
+    COLD_DIR.mkdir(parents=True, exist_ok=True)
+    existing = cold_segments(name).get(month)
+    merged = _read_segment(existing) if existing else {}
+    merged.update(records)
+    raw = json.dumps({k: r.to_dict() for k, r in merged.items()}, separators=(",", ":")).encode()
+    if zstandard is not None:
+        path, data = COLD_DIR / f"{name}-{month}.json.zst", zstandard.ZstdCompressor(level=10).compress(raw)
+    else:
+        path, data = COLD_DIR / f"{name}-{month}.json.gz", gzip.compress(raw, compresslevel=6)
+    with timed("save_cold"):
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        stat_count("bytes_written", len(data))
+    if existing and existing != path:
+        existing.unlink()
+    return path
+
+
+def load_cold_records(name: str, since_ts: int | None = None) -> dict:
+    """Records from cold segments, reading only the months at or after `since_ts`."""
+    since_month = _month(since_ts) if since_ts is not None else ""
+    records = {}
+    for month, path in cold_segments(name).items():
+        if month >= since_month:
+            records.update(_read_segment(path))
+    return records
+
+
+def with_cold(store: dict, name: str, config: dict | None, since_ts: int | None) -> dict:
+    """`store` plus any cold records a query reaching back to `since_ts` (None = all time) needs."""
+    days = retention_days(config, name)
+    if not days or (since_ts is not None and since_ts >= now_epoch() - days * 86400):
+        return store
+    cold = load_cold_records(name, since_ts)
+    return {**cold, **store} if cold else store
+
+
+def cold_record(name: str, tweet_id: str) -> TweetRecord | None:
+    """One archived tweet, found by reading only the segment for the month its ID encodes."""
+    ts = snowflake_ts(tweet_id)
+    path = cold_segments(name).get(_month(ts)) if ts else None
+    return _read_segment(path).get(tweet_id) if path else None
+
+
+def compact_store(name: str, days: int | None) -> dict:
+    """Move records older than `days` to cold segments and rewrite the hot store.
+
+    Returns before/after size and load time, so the caller can report what it saved.
+    """
+    path = RECORD_STORES[name]
+    result = {"store": name, "bytes_before": path.stat().st_size if path.exists() else 0}
+    start = time.perf_counter()
+    store = load_record_store(path)
+    result["load_ms_before"] = (time.perf_counter() - start) * 1000
+    result["records_before"] = len(store)
+
+    moved = {}
+    if days:
+        cutoff = now_epoch() - days * 86400
+        for key, record in list(store.items()):
+            ts = _tier_ts(name, record)
+            if ts is not None and ts < cutoff:
+                moved.setdefault(_month(ts), {})[key] = store.pop(key)
+    for month, records in moved.items():
+        _write_segment(name, month, records)
+
+    if path.exists():
+        save_record_store(path, store)
+    result["bytes_after"] = path.stat().st_size if path.exists() else 0
+    start = time.perf_counter()
+    load_record_store(path)
+    result["load_ms_after"] = (time.perf_counter() - start) * 1000
+    segments = cold_segments(name)
+    result.update(records_after=len(store), moved=sum(len(r) for r in moved.values()),
+                  months=sorted(moved), cold_segments=len(segments),
+                  cold_bytes=sum(p.stat().st_size for p in segments.values()))
+    return result
+
+
+# === Reply graph ===
+#
+# data/graph.json indexes how stored tweets connect, across every record store:
+# "children" maps a tweet ID to the stored replies to it, "conversations" maps a
+# conversation ID to its stored members, and "located" names the store holding
+# each indexed tweet. merge_record() queues every record it stores and
+# save_record_store() folds the queued ones into the index, so a write costs what
+# it added rather than a rescan. A missing graph.json is rebuilt once from all
+# stores, cold segments included. "searched" remembers the newest post seen by
+# each thread search, so x_read.py can ask the API only for what came after.
+
+GRAPH_PATH = DATA_DIR / "graph.json"
+GRAPH_VERSION = 1
+
+# Records merge_record() stored since their store was last saved: id -> record
+_UNINDEXED = {}
+
+
+def replied_to(record: TweetRecord) -> str | None:
+    """ID of the tweet this one replies to, if any."""
+    return next((rid for rtype, rid in record.referenced or () if rtype == "replied_to"), None)
+
+
+def _add_edges(graph: dict, records, name: str):
+    for r in records:
+        parent, conv = replied_to(r), r.conversation_id
+        if parent is None and not conv:
+            continue  # fetched without thread fields: nothing to connect
+        graph["located"][r.id] = name
+        if parent is not None:
+            siblings = graph["children"].setdefault(parent, [])
+            if r.id not in siblings:
+                siblings.append(r.id)
+        if conv:
+            members = graph["conversations"].setdefault(conv, [])
+            if r.id not in members:
+                members.append(r.id)
+
+
+def rebuild_graph() -> dict:
+    """Index every record store from scratch, hot and cold."""
+    graph = {"version": GRAPH_VERSION, "children": {}, "conversations": {}, "located": {}, "searched": {}}
+    with timed("graph"):
+        for name, path in RECORD_STORES.items():
+            records = {**load_cold_records(name), **load_record_store(path)}
+            _add_edges(graph, records.values(), name)
+    stat_count("graph_rebuilds")
+    return graph
+
+
+def load_graph() -> dict:
+    """The reply graph, rebuilt and saved first if there isn't a current one."""
+    if GRAPH_PATH.exists():
+        graph = read_json(GRAPH_PATH, phase="load_graph")
+        if graph.get("version") == GRAPH_VERSION:
+            return graph
+    graph = rebuild_graph()
+    save_graph(graph)
+    return graph
+
+
+def save_graph(graph: dict):
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    write_json(GRAPH_PATH, graph, phase="save_graph", indent=None)
+
+
+def thread_nodes(graph: dict, tweet_id: str, conv_id: str, lookup) -> tuple[dict, dict]:
+    """A conversation as far as the local stores know it.
+
+    `lookup(id)` returns a stored record or None. Returns (id -> record for every
+    member found, missing id -> [IDs of the stored replies to it]) — the missing
+    ones being parents and the root that aren't stored. Follows reply chains up
+    from `tweet_id` too, in case an ancestor was stored without a conversation ID.
+    """
+    wanted = [conv_id, tweet_id, *graph["conversations"].get(conv_id, ())]
+    found, missing, seen = {}, {}, set()
+    while wanted:
+        tid = wanted.pop()
+        if tid in seen:
+            continue
+        seen.add(tid)
+        record = lookup(tid)
+        if record is None:
+            continue
+        found[tid] = record
+        parent = replied_to(record)
+        if parent and parent not in seen:
+            wanted.append(parent)
+        wanted.extend(c for c in graph["children"].get(tid, ()) if c not in seen)
+    for tid, record in found.items():
+        parent = replied_to(record)
+        if parent and parent not in found:
+            missing.setdefault(parent, []).append(tid)
+    if conv_id not in found:
+        missing.setdefault(conv_id, [])
+    return found, missing
+
+
+# === Mention triage ===
+#
+# data/triage.json is a priority queue of mentions not yet handled, kept sorted
+# so the top N is a slice. A mention's priority is the sum of
+#   ln(1 + author followers) + 1.5 * ln(1 + engagement per hour when stored)
+#   + ln(kind weight) - (age / half-life) * ln 2
+# and only the age term changes with time. It changes the same way for every
+# mention, so the queue is sorted once, on the age-free key
+# (created_ts / half-life * ln 2 in place of -age / half-life * ln 2), and never
+# needs re-sorting. New mentions are inserted as the mentions store is saved.
+# Handled ones leave the queue, and the queue is capped at TRIAGE_LIMIT, with the
+# lowest-priority mentions dropped first, so reading it costs the same however
+# many mentions have piled up.
+
+TRIAGE_PATH = DATA_DIR / "triage.json"
+TRIAGE_VERSION = 1
+TRIAGE_LIMIT = 2000
+TRIAGE_HALF_LIFE = 12 * 3600  # a mention's priority halves every 12h
+TRIAGE_KIND_WEIGHTS = {"reply": 1.0, "mention": 0.8, "quote": 0.6}
+TRIAGE_VELOCITY_WEIGHT = 1.5
+# Handled IDs are remembered this long, so a re-fetch doesn't queue them again
+TRIAGE_HANDLED_DAYS = 30
+_DECAY = math.log(2) / TRIAGE_HALF_LIFE
+
+
+def triage_row(record: TweetRecord) -> dict:
+    """The queue entry for a mention: its sort key plus what `triage` displays."""
+    created = record.created_ts or snowflake_ts(record.id) or now_epoch()
+    hours = max(((record.stored_ts or now_epoch()) - created) / 3600, 0.25)
+    velocity = record.engagement / hours
+    kind = record.kind or "mention"
+    followers = record.author_followers or 0
+    key = (math.log1p(followers) + TRIAGE_VELOCITY_WEIGHT * math.log1p(velocity)
+           + math.log(TRIAGE_KIND_WEIGHTS.get(kind, 0.8)) + created * _DECAY)
+    return {"id": record.id, "key": key, "created_ts": created, "kind": kind,
+            "author_id": record.author_id, "author_username": record.author_username,
+            "followers": followers, "velocity": round(velocity, 2), "text": record.text[:200]}
+
+
+def triage_score(row: dict, now: int | None = None) -> float:
+    """A row's priority right now (its key with the age term applied)."""
+    return row["key"] - (now or now_epoch()) * _DECAY
+
+
+def _new_triage() -> dict:
+    return {"version": TRIAGE_VERSION, "order": [], "rows": {}, "handled": {}}
+
+
+def load_triage() -> dict:
+    """The triage queue, built from the mentions store first if there isn't one."""
+    if TRIAGE_PATH.exists():
+        queue = read_json(TRIAGE_PATH, phase="load_triage")
+        if queue.get("version") == TRIAGE_VERSION:
+            return queue
+    queue = _new_triage()
+    mentions = load_record_store(RECORD_STORES["mentions"]).values()
+    _triage_insert(queue, join_authors(mentions, load_users()))
+    save_triage(queue)
+    return queue
+
+
+def save_triage(queue: dict):
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    write_json(TRIAGE_PATH, queue, phase="save_triage", indent=None)
+
+
+def _triage_remove(queue: dict, mention_id: str) -> dict | None:
+    row = queue["rows"].pop(mention_id, None)
+    if row is not None:
+        order = queue["order"]
+        # The popped ID still sorts by its own key, via the default
+        i = bisect.bisect_left(order, -row["key"], key=lambda m: -queue["rows"].get(m, row)["key"])
+        while order[i] != mention_id:  # equal keys: step past the ties
+            i += 1
+        del order[i]
+    return row
+
+
+def _triage_insert(queue: dict, records):
+    """Queue (or re-score) mentions, skipping handled ones; trims to TRIAGE_LIMIT."""
+    rows, order = queue["rows"], queue["order"]
+    for record in records:
+        if record.id in queue["handled"]:
+            continue
+        _triage_remove(queue, record.id)
+        row = triage_row(record)
+        rows[record.id] = row
+        bisect.insort(order, record.id, key=lambda m: -rows[m]["key"])
+    for mention_id in order[TRIAGE_LIMIT:]:
+        del rows[mention_id]
+    del order[TRIAGE_LIMIT:]
+
+
+def triage_add(records):
+    """Insert newly stored mentions into the persisted queue."""
+    queue = load_triage()
+    _triage_insert(queue, records)
+    save_triage(queue)
+
+
+def triage_top(queue: dict, n: int) -> list[dict]:
+    """The `n` mentions most worth responding to, highest priority first."""
+    return [queue["rows"][m] for m in queue["order"][:n]]
+
+
+def triage_handle(queue: dict, mention_ids) -> list[str]:
+    """Take mentions off the queue for good. Returns the ones that were queued."""
+    now = now_epoch()
+    cutoff = now - TRIAGE_HANDLED_DAYS * 86400
+    queue["handled"] = {m: ts for m, ts in queue["handled"].items() if ts >= cutoff}
+    removed = []
+    for mention_id in mention_ids:
+        if _triage_remove(queue, mention_id) is not None:
+            removed.append(mention_id)
+        queue["handled"][mention_id] = now
+    return removed
+
+
+# === Near-duplicate mentions ===
+#
+# data/dupes.json clusters mentions whose text is nearly the same (reply bots,
+# copy-paste replies) so output can show each cluster once with a count.
+# A mention's text is normalised (lowercase, no @handles or links), cut into
+# character shingles, and summarised by a MinHash signature: for each of
+# DUPE_PERMUTATIONS hash functions, the lowest hash over its shingles. Two
+# signatures agree in a position with probability equal to the texts' Jaccard
+# similarity. Signatures are split into DUPE_BANDS bands; mentions sharing any
+# whole band are candidates, so finding a mention's cluster is a few dict
+# lookups rather than a comparison with every stored mention. A candidate joins
+# the cluster whose first mention's signature agrees in at least DUPE_SIMILARITY
+# of positions. Only that first signature is kept per cluster.
+
+DUPES_PATH = DATA_DIR / "dupes.json"
+DUPES_VERSION = 1
+DUPES_LIMIT = 5000  # clusters kept; the least recently seen are dropped first
+DUPE_PERMUTATIONS = 64
+DUPE_BANDS = 16  # 16 bands of 4: texts ~60% alike are candidates 3 times in 4
+DUPE_SHINGLE = 5
+DUPE_SIMILARITY = 0.6
+
+_DUPE_STRIP = re.compile(r"https?://\S+|@\w+")
+_DUPE_NON_WORD = re.compile(r"[\W_]+")
+_DUPE_ROWS = DUPE_PERMUTATIONS // DUPE_BANDS
+
+
+def dupe_signature(text: str) -> bytes | None:
+    """MinHash signature of a mention's text (None when nothing is left to compare)."""
+    norm = _DUPE_NON_WORD.sub(" ", _DUPE_STRIP.sub(" ", text.lower())).strip()
+    if not norm:
+        return None
+    shingles = {norm[i:i + DUPE_SHINGLE] for i in range(max(len(norm) - DUPE_SHINGLE + 1, 1))}
+    # One shake digest per shingle yields all its 16-bit hashes at once
+    unpack = struct.Struct(f"<{DUPE_PERMUTATIONS}H").unpack
+    hashes = [unpack(hashlib.shake_128(sh.encode()).digest(DUPE_PERMUTATIONS * 2)) for sh in shingles]
+    return struct.pack(f"<{DUPE_PERMUTATIONS}H", *map(min, zip(*hashes)))
+
+
+def _dupe_bands(sig: bytes) -> list[tuple[int, bytes]]:
+    width = _DUPE_ROWS * 2
+    return [(b, sig[b * width:(b + 1) * width]) for b in range(DUPE_BANDS)]
+
+
+def _dupe_similarity(a: bytes, b: bytes) -> float:
+    pairs = zip(struct.unpack(f"<{DUPE_PERMUTATIONS}H", a), struct.unpack(f"<{DUPE_PERMUTATIONS}H", b))
+    return sum(x == y for x, y in pairs) / DUPE_PERMUTATIONS
+
+
+def _index_dupes(index: dict, cluster_id: str, cluster: dict):
+    """Add a loaded or new cluster to the in-memory lookup tables."""
+    index["clusters"][cluster_id] = cluster
+    for mention_id in cluster["ids"]:
+        index["member"][mention_id] = cluster_id
+    if cluster["sig"] is not None:
+        for band in _dupe_bands(cluster["sig"]):
+            index["buckets"].setdefault(band, []).append(cluster_id)
+
+
+def load_dupes() -> dict:
+    """The near-duplicate index, built from the mentions store first if there isn't one.
+
+    Adds the lookup tables, `member` (mention ID -> cluster) and `buckets`
+    (band -> clusters), which save_dupes() leaves out of the file.
+    """
+    index = {"clusters": {}, "member": {}, "buckets": {}}
+    if DUPES_PATH.exists():
+        data = read_json(DUPES_PATH, phase="load_dupes")
+        if data.get("version") == DUPES_VERSION:
+            for cluster_id, c in data["clusters"].items():
+                sig = base64.b64decode(c["sig"]) if c["sig"] else None
+                _index_dupes(index, cluster_id, {**c, "sig": sig})
+            return index
+    mentions = load_record_store(RECORD_STORES["mentions"]).values()
+    dupes_insert(index, sorted(mentions, key=lambda r: r.created_ts or 0))
+    save_dupes(index)
+    return index
+
+
+def save_dupes(index: dict):
+    clusters = index["clusters"]
+    if len(clusters) > DUPES_LIMIT:
+        for cluster_id in sorted(clusters, key=lambda c: clusters[c]["seen"])[:len(clusters) - DUPES_LIMIT]:
+            del clusters[cluster_id]
+    data = {"version": DUPES_VERSION, "clusters": {
+        cluster_id: {**c, "sig": base64.b64encode(c["sig"]).decode() if c["sig"] else None}
+        for cluster_id, c in clusters.items()}}
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    write_json(DUPES_PATH, data, phase="save_dupes", indent=None)
+
+
+def dupe_cluster(index: dict, mention_id: str, text: str, sig: bytes | None = None) -> str | None:
+    """The cluster a mention belongs to, or None if it's like nothing indexed.
+
+    A mention already indexed answers from `member`; otherwise its signature is
+    checked against the clusters sharing one of its bands.
+    """
+    if mention_id in index["member"]:
+        return index["member"][mention_id]
+    sig = sig or dupe_signature(text)
+    if sig is None:
+        return None
+    best, best_sim = None, DUPE_SIMILARITY
+    candidates = {c for band in _dupe_bands(sig) for c in index["buckets"].get(band, ())}
+    for cluster_id in candidates:
+        cluster = index["clusters"].get(cluster_id)
+        if cluster is None:
+            continue
+        sim = _dupe_similarity(sig, cluster["sig"])
+        if sim >= best_sim:
+            best, best_sim = cluster_id, sim
+    return best
+
+
+def dupes_insert(index: dict, records):
+    """Cluster newly stored mentions: each joins its nearest cluster or starts one."""
+    now = now_epoch()
+    for record in records:
+        if record.id in index["member"]:
+            continue
+        sig = dupe_signature(record.text)
+        cluster_id = dupe_cluster(index, record.id, record.text, sig)
+        if cluster_id is None:
+            _index_dupes(index, record.id, {"sig": sig, "ids": [record.id], "seen": now})
+        else:
+            cluster = index["clusters"][cluster_id]
+            cluster["ids"].append(record.id)
+            cluster["seen"] = now
+            index["member"][record.id] = cluster_id
+
+
+def group_near_duplicates(items: list, index: dict | None = None) -> list[list]:
+    """Group mentions (TweetRecords or dicts with id and text) by near-duplicate
+    cluster, keeping the order in which each cluster first appears."""
+    index = index if index is not None else load_dupes()
+    groups = {}
+    for item in items:
+        mention_id, text = (item["id"], item.get("text", "")) if isinstance(item, dict) else (item.id, item.text)
+        key = dupe_cluster(index, mention_id, text) or mention_id
+        groups.setdefault(key, []).append(item)
+    return list(groups.values())
+
+
+def _index_pending(path: Path, store: dict):
+    """Fold the records merged into `store` since it was last saved into the indexes."""
+    name = next((n for n, p in RECORD_STORES.items() if p == path), None)
+    if name is None or not _UNINDEXED:
+        return
+    batch = [r for rid, r in _UNINDEXED.items() if store.get(rid) is r]
+    if not batch:
+        return
+    for r in batch:
+        del _UNINDEXED[r.id]
+    if any(r.conversation_id or r.referenced for r in batch):
+        graph = load_graph()
+        _add_edges(graph, batch, name)
+        save_graph(graph)
+    if name == "mentions":
+        dupes = load_dupes()
+        dupes_insert(dupes, batch)
+        save_dupes(dupes)
+        triage_add(batch)
+
+
+def _http_hook(response, *args, **kwargs):
+    """requests response hook: time, bytes and count for every API call."""
+    start = time.perf_counter()
+    body = response.content
+    stat_count("api_calls")
+    stat_count("cache_misses")
+    stat_count("http_bytes_in", len(body or b""))
+    # Content-Length is the size on the wire; with Content-Encoding it's the compressed size
+    stat_count("http_bytes_wire", int(response.headers.get("Content-Length") or len(body or b"")))
+    if response.headers.get("Content-Encoding"):
+        stat_count("http_compressed")
+    add_phase_time("http", response.elapsed.total_seconds() + time.perf_counter() - start)
+    observe_api_call(response)
+
+
+class _CountingStdout:
+    """Wraps stdout to time and count output when profiling."""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, text):
+        start = time.perf_counter()
+        n = self._stream.write(text)
+        add_phase_time("output", time.perf_counter() - start)
+        stat_count("bytes_output", len(text))
+        return n
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def add_account_args(parser):
+    """Shared --account option (call before parse_args). The value is read at import —
+    see _selected_account — so this only documents and validates it."""
+    def account_name(value: str) -> str:
+        if not ACCOUNT_NAME_RE.fullmatch(value):
+            raise argparse.ArgumentTypeError("use letters, digits, '-' or '_' (max 40)")
+        return value
+    parser.add_argument("--account", type=account_name, metavar="NAME",
+                        help="Use a named account from x_setup.py --account (default: $X_ACCOUNT or the main one)")
+
+
+def add_profile_args(parser):
+    """Shared --profile options (call before parse_args)."""
+    parser.add_argument("--profile", nargs="?", const="text", choices=["text", "json"],
+                        help="Print a per-phase timing report to stderr (text or json)")
+    parser.add_argument("--profile-dump", metavar="FILE",
+                        help="With --profile, also write cProfile stats for the command to FILE")
+    parser.add_argument("--profile-mem", action="store_true",
+                        help="With --profile, also trace memory allocations (tracemalloc)")
+
+
+def setup_profiling(args):
+    """Start profiling if requested; the report is printed at exit."""
+    mode = getattr(args, "profile", None)
+    if not mode:
+        return
+    _PROFILE["mode"] = mode
+    _PROFILE["start"] = time.perf_counter()
+    sys.stdout = _CountingStdout(sys.stdout)
+    if args.profile_mem:
+        import tracemalloc
+        tracemalloc.start()
+        _PROFILE["tracemalloc"] = tracemalloc
+    if args.profile_dump:
+        import cProfile
+        _PROFILE["cprofile"] = cProfile.Profile()
+        _PROFILE["dump"] = args.profile_dump
+        _PROFILE["cprofile"].enable()
+    atexit.register(_profile_report)
+
+
+def profile_snapshot() -> dict:
+    """Current timing breakdown and counters."""
+    now = time.perf_counter()
+    phases = {"import": {"seconds": _IMPORT_SECONDS, "count": 1}}
+    phases.update({k: dict(v) for k, v in _STATS["phases"].items()})
+    total = _IMPORT_SECONDS + now - _IMPORT_START
+    accounted = sum(v["seconds"] for v in phases.values())
+    phases["other"] = {"seconds": max(total - accounted, 0.0), "count": 1}
+    snapshot = {"total_seconds": total, "phases": phases, "counters": dict(_STATS["counters"])}
+    transport = transport_stats()
+    if transport:
+        snapshot["transport"] = transport
+    return snapshot
+
+
+def _profile_report():
+    if "cprofile" in _PROFILE:
+        _PROFILE["cprofile"].disable()
+        _PROFILE["cprofile"].dump_stats(_PROFILE["dump"])
+    report = profile_snapshot()
+    if "tracemalloc" in _PROFILE:
+        tm = _PROFILE["tracemalloc"]
+        current, peak = tm.get_traced_memory()
+        top = tm.take_snapshot().statistics("lineno")[:10]
+        report["memory"] = {
+            "current_bytes": current,
+            "peak_bytes": peak,
+            "top": [{"where": str(st.traceback), "bytes": st.size, "count": st.count} for st in top],
+        }
+        tm.stop()
+
+    out = sys.stderr
+    if _PROFILE["mode"] == "json":
+        out.write(json.dumps(report) + "\n")
+        return
+    out.write(f"\n--- profile: {report['total_seconds'] * 1000:.1f} ms total ---\n")
+    for name, v in sorted(report["phases"].items(), key=lambda kv: -kv[1]["seconds"]):
+        out.write(f"  {name:<12} {v['seconds'] * 1000:9.1f} ms  x{v['count']}\n")
+    for name, n in sorted(report["counters"].items()):
+        out.write(f"  {name:<16} {n:,}\n")
+    if "transport" in report:
+        t = report["transport"]
+        out.write(f"  connections      {t['connections']:,} opened, {t['reused']:,} of {t['requests']:,}"
+                  f" requests reused one ({t['protocol']})\n")
+    if "memory" in report:
+        mem = report["memory"]
+        out.write(f"  memory peak     {mem['peak_bytes']:,} bytes\n")
+        for st in mem["top"][:5]:
+            out.write(f"    {st['bytes']:>10,}  {st['where']}\n")
+    if "dump" in _PROFILE:
+        out.write(f"  cProfile stats written to {_PROFILE['dump']}\n")
+
+
+# === Machine-readable output ===
+#
+# With --json, stdout carries only NDJSON records (one JSON object per line,
+# each with a "record" naming its kind) and the human-readable text is sent to stderr. Records
+# are the store dicts as-is, written and flushed as soon as they're available.
+
+_OUTPUT = {"json": False, "stream": None}
+
+
+def add_output_args(parser):
+    """Shared --json option (call before parse_args)."""
+    parser.add_argument("--json", action="store_true",
+                        help="Emit NDJSON records on stdout; human-readable text goes to stderr")
+
+
+def setup_output(args):
+    if getattr(args, "json", False):
+        _OUTPUT["json"] = True
+        _OUTPUT["stream"] = sys.stdout
+        sys.stdout = sys.stderr
+
+
+def json_output() -> bool:
+    return _OUTPUT["json"]
+
+
+def emit(kind: str, record=None, **fields):
+    """Write one NDJSON record of type `kind` (no-op without --json)."""
+    if not _OUTPUT["json"]:
+        return
+    if isinstance(record, TweetRecord):
+        record = record.to_dict()
+    line = json.dumps({"record": kind, **(record or {}), **fields}, default=str) + "\n"
+    with timed("output"):
+        _OUTPUT["stream"].write(line)
+        _OUTPUT["stream"].flush()
+    stat_count("bytes_output", len(line))
+
+
+def cost_line(cost: float, detail: str = "") -> str:
+    """The "Est. API cost" footer. Replayed calls cost nothing, so under --replay it
+    says $0 and shows the recorded run's cost as such."""
+    detail = f", {detail}" if detail else ""
+    if replaying():
+        return f"Est. API cost: $0.000 (replayed — recorded run ~${cost:.3f}{detail})"
+    return f"Est. API cost: ~${cost:.3f}" + (f" ({detail[2:]})" if detail else "")
+
+
+def emit_summary(api_calls: int = 0, cost: float = 0.0, **fields):
+    """Closing record for a command: calls made, their cost and today's spend.
+
+    Marks the output incomplete if the deadline cancelled any call. Under --replay
+    the cost is 0 and the recorded run's goes in `recorded_cost`.
+    """
+    if deadline_hit():
+        print(f"[incomplete: {_DEADLINE['hit']} API call(s) cancelled at the {_DEADLINE['seconds']:g}s deadline]")
+        fields["incomplete"] = True
+    if replaying():
+        fields["recorded_cost"] = round(cost, 4)
+        cost = 0.0
+    if _OUTPUT["json"]:
+        emit("summary", api_calls=api_calls, est_cost=round(cost, 4),
+             today_spend=round(today_usage().get("est_cost", 0.0), 4), **fields)
+
+
+# === Metrics (Prometheus textfile) ===
+#
+# Per-run observations are merged into a cumulative state file at exit and
+# rendered to the .prom file named by config "metrics_textfile", for
+# node_exporter's textfile collector. Nothing is written unless it's set.
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_METRICS = {"endpoints": {}, "quota": {}, "cost": {}, "stores": {}, "last_status": {}}
+
+
+def endpoint_label(path: str) -> str:
+    """/2/tweets/123?x=1 -> /2/tweets/:id, so labels stay low-cardinality."""
+    parts = path.split("?", 1)[0].split("/")
+    return "/".join(":id" if i > 1 and p.isdigit() else p for i, p in enumerate(parts))
+
+
+def observe_api_call(response):
+    """Record latency, status and rate-limit quota for one API response."""
+    endpoint = endpoint_label(response.request.path_url)
+    status = response.status_code
+    ep = _METRICS["endpoints"].setdefault(endpoint, {
+        "calls": 0, "errors": 0, "rate_limited": 0, "retries": 0,
+        "latency_sum": 0.0, "buckets": [0] * len(LATENCY_BUCKETS),
+    })
+    latency = response.elapsed.total_seconds()
+    ep["calls"] += 1
+    ep["latency_sum"] += latency
+    for i, bound in enumerate(LATENCY_BUCKETS):
+        if latency <= bound:
+            ep["buckets"][i] += 1
+    if status == 429:
+        ep["rate_limited"] += 1
+    elif status >= 400:
+        ep["errors"] += 1
+    # tweepy re-issues a call after sleeping out a 429
+    if _METRICS["last_status"].get(endpoint) == 429:
+        ep["retries"] += 1
+    _METRICS["last_status"][endpoint] = status
+
+    headers = response.headers
+    if "x-rate-limit-remaining" in headers:
+        try:
+            _METRICS["quota"][endpoint] = {
+                "remaining": int(headers["x-rate-limit-remaining"]),
+                "limit": int(headers.get("x-rate-limit-limit", 0)),
+                "reset": int(headers.get("x-rate-limit-reset", 0)),
+            }
+        except ValueError:
+            pass
+
+
+class RateScheduler:
+    """Gate concurrent calls on the rate-limit quota the API reports.
+
+    observe_api_call records each endpoint's x-rate-limit-remaining/reset; a call
+    may start only while the quota, less calls already in flight and `reserve`,
+    allows it. Otherwise the caller waits for the window to reset instead of
+    tripping a 429 and tweepy's sleep-and-retry.
+    """
+
+    def __init__(self, reserve: int = 0):
+        self.reserve = reserve
+        self.waited = 0.0
+        self._in_flight = {}
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self, endpoint: str):
+        self.acquire(endpoint)
+        try:
+            yield
+        finally:
+            self.release(endpoint)
+
+    def acquire(self, endpoint: str):
+        with self._cond:
+            while True:
+                quota = _METRICS["quota"].get(endpoint)
+                in_flight = self._in_flight.get(endpoint, 0)
+                now = time.time()
+                if quota is None or now >= quota["reset"] or quota["remaining"] - in_flight > self.reserve:
+                    self._in_flight[endpoint] = in_flight + 1
+                    return
+                left = time_left()
+                if left is not None and left <= 0:
+                    raise deadline_exceeded(why=f"waiting for the {endpoint} rate-limit window "
+                                                f"outlasted the {_DEADLINE['seconds']:g}s deadline")
+                # Re-check at least every second: a finishing call may report a fresh window
+                self._cond.wait(min(quota["reset"] - now, 1.0, left if left is not None else 1.0))
+                self.waited += time.time() - now
+
+    def release(self, endpoint: str):
+        with self._cond:
+            self._in_flight[endpoint] -= 1
+            self._cond.notify_all()
+
+
+def observe_cost(kind: str, calls: int):
+    """Record estimated spend for `calls` billed reads of `kind`."""
+    if calls:
+        _METRICS["cost"][kind] = _METRICS["cost"].get(kind, 0.0) + calls * CALL_COSTS.get(kind, 0.0)
+
+
+def observe_store(path: Path, records: int):
+    _METRICS["stores"][path.stem] = {"records": records}
+
+
+def _merge_metrics(state: dict) -> dict:
+    for endpoint, ep in _METRICS["endpoints"].items():
+        total = state["endpoints"].setdefault(endpoint, {
+            "calls": 0, "errors": 0, "rate_limited": 0, "retries": 0,
+            "latency_sum": 0.0, "buckets": [0] * len(LATENCY_BUCKETS),
+        })
+        for key in ("calls", "errors", "rate_limited", "retries", "latency_sum"):
+            total[key] += ep[key]
+        if len(total["buckets"]) != len(LATENCY_BUCKETS):
+            total["buckets"] = [0] * len(LATENCY_BUCKETS)
+        total["buckets"] = [a + b for a, b in zip(total["buckets"], ep["buckets"])]
+    state["quota"].update(_METRICS["quota"])
+    for kind, dollars in _METRICS["cost"].items():
+        state["cost"][kind] = state["cost"].get(kind, 0.0) + dollars
+    for key in ("cache_hits", "cache_misses", "http_bytes_in", "http_bytes_wire"):
+        state["counters"][key] = state["counters"].get(key, 0) + _STATS["counters"].get(key, 0)
+    transport = transport_stats()
+    if transport:
+        for key in ("requests", "connections"):
+            counter = f"http_{key}"
+            state["counters"][counter] = state["counters"].get(counter, 0) + transport[key]
+    for phase, v in _STATS["phases"].items():
+        total = state["phases"].setdefault(phase, {"seconds": 0.0, "count": 0})
+        total["seconds"] += v["seconds"]
+        total["count"] += v["count"]
+    for name, v in _METRICS["stores"].items():
+        state["stores"].setdefault(name, {}).update(v)
+    state["runs"] = state.get("runs", 0) + 1
+    return state
+
+
+def render_metrics(state: dict, config: dict) -> str:
+    """Prometheus text exposition of the cumulative metrics state."""
+    out = []
+
+    def family(name, kind, help_text, samples):
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+            out.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+
+    endpoints = sorted(state["endpoints"].items())
+    family("x_api_requests_total", "counter", "API calls by endpoint.",
+           [({"endpoint": e}, v["calls"]) for e, v in endpoints])
+    family("x_api_errors_total", "counter", "API calls that returned a non-429 error status.",
+           [({"endpoint": e}, v["errors"]) for e, v in endpoints])
+    family("x_api_rate_limited_total", "counter", "API calls answered with 429.",
+           [({"endpoint": e}, v["rate_limited"]) for e, v in endpoints])
+    family("x_api_retries_total", "counter", "API calls re-issued after a 429.",
+           [({"endpoint": e}, v["retries"]) for e, v in endpoints])
+
+    out.append("# HELP x_api_request_duration_seconds API call latency by endpoint.")
+    out.append("# TYPE x_api_request_duration_seconds histogram")
+    for e, v in endpoints:
+        for bound, n in zip(LATENCY_BUCKETS, v["buckets"]):
+            out.append(f'x_api_request_duration_seconds_bucket{{endpoint="{e}",le="{bound}"}} {n}')
+        out.append(f'x_api_request_duration_seconds_bucket{{endpoint="{e}",le="+Inf"}} {v["calls"]}')
+        out.append(f'x_api_request_duration_seconds_sum{{endpoint="{e}"}} {v["latency_sum"]:.6f}')
+        out.append(f'x_api_request_duration_seconds_count{{endpoint="{e}"}} {v["calls"]}')
+
+    family("x_api_estimated_cost_dollars_total", "counter", "Estimated API spend by read kind.",
+           [({"kind": k}, f"{v:.4f}") for k, v in sorted(state["cost"].items())])
+    family("x_api_quota_remaining", "gauge", "x-rate-limit-remaining from the last response.",
+           [({"endpoint": e}, q["remaining"]) for e, q in sorted(state["quota"].items())])
+    family("x_api_quota_limit", "gauge", "x-rate-limit-limit from the last response.",
+           [({"endpoint": e}, q["limit"]) for e, q in sorted(state["quota"].items())])
+    family("x_api_quota_reset_timestamp_seconds", "gauge", "When the rate-limit window resets.",
+           [({"endpoint": e}, q["reset"]) for e, q in sorted(state["quota"].items())])
+
+    family("x_cache_hits_total", "counter", "Cache hits served from local data instead of the API.",
+           [({}, state["counters"].get("cache_hits", 0))])
+    family("x_cache_misses_total", "counter", "API requests local data couldn't answer.",
+           [({}, state["counters"].get("cache_misses", 0))])
+    counters = state["counters"]
+    family("x_http_requests_total", "counter", "HTTP requests sent to the API.",
+           [({}, counters.get("http_requests", 0))])
+    family("x_http_connections_total", "counter",
+           "Connections opened to the API; the other requests reused a kept-alive one.",
+           [({}, counters.get("http_connections", 0))])
+    family("x_http_response_bytes_total", "counter", "API response bytes, as received and decompressed.",
+           [({"encoding": "wire"}, counters.get("http_bytes_wire", 0)),
+            ({"encoding": "decoded"}, counters.get("http_bytes_in", 0))])
+    family("x_phase_seconds_total", "counter", "Wall time spent per phase (http, load_store, ...).",
+           [({"phase": p}, f"{v['seconds']:.6f}") for p, v in sorted(state["phases"].items())])
+    family("x_phase_operations_total", "counter", "Operations per phase.",
+           [({"phase": p}, v["count"]) for p, v in sorted(state["phases"].items())])
+
+    stores = []
+    for path in sorted(DATA_DIR.glob("*.json")):
+        stores.append(({"store": path.stem}, path.stat().st_size))
+    family("x_store_bytes", "gauge", "Size of each local store file.", stores)
+    family("x_store_records", "gauge", "Records in each local store as of its last save.",
+           [({"store": n}, v["records"]) for n, v in sorted(state["stores"].items()) if "records" in v])
+
+    usage = today_usage()
+    family("x_spend_today_dollars", "gauge", "Estimated spend so far today (UTC).",
+           [({}, f"{usage.get('est_cost', 0.0):.4f}")])
+    family("x_budget_daily_dollars", "gauge", "Configured daily budget.",
+           [({}, config.get("daily_budget", 0.25))])
+    family("x_runs_total", "counter", "Script invocations that recorded metrics.",
+           [({}, state.get("runs", 0))])
+    return "\n".join(out) + "\n"
+
+
+def flush_metrics(config: dict):
+    """Fold this run into the cumulative state and rewrite the .prom file atomically."""
+    target = config.get("metrics_textfile")
+    if not target:
+        return
+    state_path = DATA_DIR / "metrics.json"
+    state = {"endpoints": {}, "quota": {}, "cost": {}, "counters": {}, "phases": {}, "stores": {}}
+    try:
+        if state_path.exists():
+            state.update(read_json(state_path, phase="metrics"))
+        state = _merge_metrics(state)
+        write_json(state_path, state, phase="metrics", indent=None)
+        target = Path(target).expanduser()
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        tmp.write_text(render_metrics(state, config))
+        os.replace(tmp, target)
+    except (OSError, ValueError) as e:
+        print(f"Warning: could not write metrics to {target}: {e}", file=sys.stderr)
+
 
 def load_config() -> dict | None:
     if not CONFIG_PATH.exists():
         print(f"Error: No config found at {CONFIG_PATH}")
         print(f"Run: uv run {SCRIPT_DIR / 'x_setup.py'}")
         return None
-    return json.loads(CONFIG_PATH.read_text())
+    config = read_json(CONFIG_PATH, phase="load_config")
+    if config.get("metrics_textfile") and not _METRICS.get("registered"):
+        _METRICS["registered"] = True
+        atexit.register(flush_metrics, config)
+    return config
 
 
 def save_config(config: dict):
-    CONFIG_PATH.write_text(json.dumps(config, indent=2))
+    write_json(CONFIG_PATH, config, phase="save_config")
+
+
+# tweepy always builds URLs on this host
+X_API_HOST = "https://api.twitter.com"
+
+HTTP_POOL_SIZE = 16           # kept-alive connections; covers x_watchlist's default 8 workers
+HTTP_TIMEOUT = (5.0, 30.0)    # connect, read — tweepy sets none, so a stalled socket would hang
+# Hop-by-hop headers requests adds that HTTP/2 forbids
+_H1_ONLY_HEADERS = {"connection", "keep-alive", "proxy-connection", "transfer-encoding", "upgrade"}
+
+
+class _Transport(requests.adapters.HTTPAdapter):
+    """Keep-alive connection pool for API calls, shared by every client in the process.
+
+    Sends to `base_url` instead of api.twitter.com when set (e.g. the local mock API).
+    Given an httpx.Client with http2=True, calls go through it instead, so concurrent
+    calls multiplex as streams over one connection rather than opening one each.
+    """
+
+    def __init__(self, base_url: str | None = None, pool_size: int = HTTP_POOL_SIZE,
+                 timeout=HTTP_TIMEOUT, h2_client=None):
+        super().__init__(pool_connections=2, pool_maxsize=pool_size)
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.timeout = timeout
+        self.h2_client = h2_client
+        self._h2_requests = 0
+        self._h2_protocol = "HTTP/2"
+        self._h2_streams = set()
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        left = time_left()
+        if left is not None and left <= 0:
+            raise deadline_exceeded(request)
+        mode = _CASSETTE["mode"]
+        key = cassette_key(request) if mode else None
+        if mode == "replay":
+            return replay_response(request, key, self)
+        if self.base_url:
+            request.url = self.base_url + request.url[len(X_API_HOST):]
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        if left is not None:
+            kwargs["timeout"] = _clamp_timeout(kwargs["timeout"], left)
+        try:
+            if self.h2_client is not None:
+                response = self._send_h2(request, kwargs["timeout"])
+            else:
+                response = super().send(request, **kwargs)
+        except requests.exceptions.Timeout:
+            if left is not None and time_left() <= 0.1:
+                raise deadline_exceeded(request) from None
+            raise
+        if mode == "record":
+            record_response(key, request, response)
+        if response.status_code == 429 and left is not None:
+            # tweepy would sleep until the window resets; don't if that's past the deadline
+            reset = int(response.headers.get("x-rate-limit-reset") or 0)
+            if reset - time.time() + 1 > time_left():
+                response.close()
+                until = datetime.fromtimestamp(reset).strftime("%H:%M:%S")
+                raise deadline_exceeded(request, f"rate limited until {until}, past the "
+                                                 f"{_DEADLINE['seconds']:g}s deadline")
+        return response
+
+    def _send_h2(self, request, timeout):
+        import httpx  # already loaded by _h2_client
+
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in _H1_ONLY_HEADERS}
+        try:
+            resp = self.h2_client.request(request.method, request.url, headers=headers,
+                                          content=request.body, timeout=httpx.Timeout(read, connect=connect))
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(e, request=request)
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(e, request=request)
+        with self._lock:
+            self._h2_requests += 1
+            self._h2_protocol = resp.http_version  # plain-http hosts (the mock) stay on HTTP/1.1
+            self._h2_streams.add(id(resp.extensions.get("network_stream")))
+        # httpx has already decoded the body; hand tweepy an ordinary requests.Response
+        return _make_response(request, resp.status_code, resp.reason_phrase, resp.headers, resp.content, self)
+
+    def stats(self) -> dict:
+        """Requests sent and connections opened so far; the difference rode a kept-alive one."""
+        if self.h2_client is not None:
+            return {"protocol": self._h2_protocol, "requests": self._h2_requests, "connections": len(self._h2_streams)}
+        requests_sent = connections = 0
+        for key in self.poolmanager.pools.keys():
+            pool = self.poolmanager.pools.get(key)
+            if pool is not None:
+                requests_sent += pool.num_requests
+                connections += pool.num_connections
+        return {"protocol": "HTTP/1.1", "requests": requests_sent, "connections": connections}
+
+    def close(self):
+        super().close()
+        if self.h2_client is not None:
+            self.h2_client.close()
+
+
+def _make_response(request, status: int, reason: str, headers, content: bytes, adapter) -> requests.Response:
+    """A requests.Response around an already-read, already-decoded body."""
+    response = requests.Response()
+    response.status_code = status
+    response.reason = reason
+    response.headers = requests.structures.CaseInsensitiveDict(headers)
+    response._content = content
+    response._content_consumed = True
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.url = request.url
+    response.request = request
+    response.connection = adapter
+    return response
+
+
+# === Deadline ===
+#
+# `--deadline SECONDS` (or config "deadline") bounds a whole command. Each API call
+# gets at most the time left as its timeout, a call due to start after the deadline
+# fails at once instead, and a 429 is only waited out if its window resets in time.
+# The failure is a DeadlineExceeded — a requests Timeout — so the scripts' usual
+# error handling applies: pages already fetched are kept and stored, sections with
+# nothing fall back to the local store, and the summary is marked incomplete.
+# The deadline is an absolute time, handed to child processes as $X_DEADLINE_AT.
+
+_DEADLINE = {"start": time.time(), "seconds": None, "at": None, "off": False, "hit": 0, "reported": False}
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """The command's --deadline ran out before an API call could finish."""
+
+
+def add_deadline_args(parser):
+    """Shared --deadline option (call before parse_args)."""
+    parser.add_argument("--deadline", type=float, metavar="SECONDS",
+                        help="Stop waiting on the API after this many seconds and show what was fetched "
+                             "(default: config \"deadline\", none; 0 turns it off)")
+
+
+def setup_deadline(args):
+    """Arm --deadline, or inherit a parent command's via $X_DEADLINE_AT."""
+    seconds = getattr(args, "deadline", None)
+    if seconds is not None:
+        if seconds <= 0:
+            _DEADLINE["off"] = True
+        else:
+            arm_deadline(seconds, start=_DEADLINE["start"])
+    elif os.environ.get("X_DEADLINE_AT"):
+        at = float(os.environ["X_DEADLINE_AT"])
+        _DEADLINE.update(at=at, seconds=round(at - _DEADLINE["start"], 1))
+
+
+def arm_deadline(seconds: float, start: float | None = None):
+    """Start (or restart) the deadline: `seconds` from `start`, default now."""
+    start = time.time() if start is None else start
+    _DEADLINE.update(seconds=seconds, at=start + seconds, hit=0, reported=False)
+
+
+def restart_deadline():
+    """Give the next unit of work (a watch-mode poll) the full deadline again; no-op without one."""
+    if _DEADLINE["seconds"] is not None and not _DEADLINE["off"]:
+        arm_deadline(_DEADLINE["seconds"])
+
+
+def config_deadline(config: dict):
+    """Apply config "deadline" unless --deadline or a parent command already set one."""
+    if _DEADLINE["at"] is None and not _DEADLINE["off"] and config.get("deadline"):
+        arm_deadline(float(config["deadline"]), start=_DEADLINE["start"])
+
+
+def time_left() -> float | None:
+    """Seconds until the deadline, or None without one."""
+    if _DEADLINE["at"] is None:
+        return None
+    return _DEADLINE["at"] - time.time()
+
+
+def deadline_hit() -> bool:
+    """Whether the deadline cut any call short — i.e. results are incomplete."""
+    return _DEADLINE["hit"] > 0
+
+
+def deadline_env() -> dict:
+    """Environment entries that pass the deadline on to a child command."""
+    return {"X_DEADLINE_AT": repr(_DEADLINE["at"])} if _DEADLINE["at"] is not None else {}
+
+
+def deadline_exceeded(request=None, why: str | None = None) -> DeadlineExceeded:
+    """Count a cancelled call and build its exception."""
+    _DEADLINE["hit"] += 1
+    stat_count("deadline_cancelled")
+    return DeadlineExceeded(why or f"the {_DEADLINE['seconds']:g}s deadline ran out", request=request)
+
+
+def _clamp_timeout(timeout, left: float):
+    if isinstance(timeout, tuple):
+        return tuple(min(t, left) if t is not None else left for t in timeout)
+    return left if timeout is None else min(timeout, left)
+
+
+# === Record / replay ===
+#
+# `--record DIR` saves every API response (status, headers, decoded body) to DIR as
+# one JSON file per request, named by a hash of the request; `--replay DIR` answers
+# from those files and never touches the network, so a run against real payloads
+# can be repeated for free. Request headers (they carry the OAuth signature) are
+# never written. Query parameters that change from run to run on their own — the
+# time window and the since_id cursor — are left out of the hash so a replayed
+# command finds the response its recorded run got.
+
+CASSETTE_IGNORED_PARAMS = frozenset({"start_time", "end_time", "since_id"})
+
+_CASSETTE = {"mode": None, "dir": None}
+
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """--replay has no recorded response for a request."""
+
+
+def add_cassette_args(parser):
+    """Shared --record/--replay options (call before parse_args)."""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record", metavar="DIR", default=os.environ.get("X_RECORD"),
+                       help="Save every API response to DIR for --replay (or set $X_RECORD)")
+    group.add_argument("--replay", metavar="DIR", default=os.environ.get("X_REPLAY"),
+                       help="Answer API calls from responses saved with --record; no network, $0")
+
+
+def setup_cassette(args):
+    """Turn on recording or replay. Exported to the environment so child processes follow."""
+    record, replay = getattr(args, "record", None), getattr(args, "replay", None)
+    if record and replay:
+        sys.exit("Error: --record and --replay (or $X_RECORD and $X_REPLAY) can't be combined")
+    if not (record or replay):
+        return
+    mode, directory = ("record", record) if record else ("replay", replay)
+    directory = Path(directory).expanduser()
+    if mode == "replay" and not directory.is_dir():
+        sys.exit(f"Error: no recorded responses at {directory}")
+    directory.mkdir(parents=True, exist_ok=True)
+    _CASSETTE.update(mode=mode, dir=directory)
+    os.environ["X_RECORD" if record else "X_REPLAY"] = str(directory)
+
+
+def replaying() -> bool:
+    return _CASSETTE["mode"] == "replay"
+
+
+def cassette_key(request) -> str:
+    """Hash of method, path, the stable query parameters and the body."""
+    url = urlsplit(request.url)
+    params = sorted((k, v) for k, v in parse_qsl(url.query, keep_blank_values=True)
+                    if k not in CASSETTE_IGNORED_PARAMS)
+    body = request.body or b""
+    if isinstance(body, str):
+        body = body.encode()
+    digest = hashlib.sha256(f"{request.method} {url.path}?{urlencode(params)}\n".encode() + body)
+    return digest.hexdigest()[:32]
+
+
+def record_response(key: str, request, response):
+    """Write one response to the cassette. 429s aren't kept: replaying one would loop tweepy's retry."""
+    if response.status_code == 429:
+        return
+    body = response.content
+    try:
+        body_fields = {"body": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        body_fields = {"body_b64": base64.b64encode(body).decode()}
+    entry = {
+        "request": {"method": request.method, "path": urlsplit(request.url).path,
+                    "query": urlsplit(request.url).query},
+        "status": response.status_code,
+        "reason": response.reason,
+        "headers": {k: v for k, v in response.headers.items() if k.lower() != "set-cookie"},
+        **body_fields,
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+    }
+    path = _CASSETTE["dir"] / f"{key}.json"
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(entry, indent=1))
+    os.replace(tmp, path)
+    stat_count("cassette_recorded")
+
+
+def replay_response(request, key: str, adapter) -> requests.Response:
+    path = _CASSETTE["dir"] / f"{key}.json"
+    try:
+        entry = json.loads(path.read_text())
+    except FileNotFoundError:
+        url = urlsplit(request.url)
+        raise CassetteMiss(f"no recorded response for {request.method} {url.path} in {_CASSETTE['dir']}",
+                           request=request) from None
+    body = entry["body"].encode() if "body" in entry else base64.b64decode(entry["body_b64"])
+    stat_count("cassette_replayed")
+    return _make_response(request, entry["status"], entry.get("reason", ""), entry["headers"], body, adapter)
+
+
+_HTTP = {"session": None, "transport": None, "clients": {}}
+_HTTP_LOCK = threading.Lock()
+
+
+def _h2_client(pool_size: int):
+    """An HTTP/2 httpx.Client, or None (with a warning) when httpx or h2 isn't installed."""
+    # Imported here, not at the top: httpx adds ~0.3 s of startup to every command
+    try:
+        import httpx
+    except ImportError:
+        print("Warning: http2 needs the httpx and h2 packages; using HTTP/1.1", file=sys.stderr)
+        return None
+    try:
+        return httpx.Client(http2=True, limits=httpx.Limits(max_connections=pool_size,
+                                                            max_keepalive_connections=pool_size))
+    except ImportError:
+        print("Warning: http2 needs the h2 package; using HTTP/1.1", file=sys.stderr)
+        return None
+
+
+def http_session(config: dict | None = None) -> requests.Session:
+    """The process-wide API session: one connection pool every client shares.
+
+    Built once, on first use: keep-alive pool of config "http_pool_size" connections,
+    "http_timeout" seconds (or [connect, read]), compressed responses always requested,
+    and HTTP/2 via httpx with "http2": true or X_HTTP2=1. Routed to X_API_BASE_URL (env)
+    or config "api_base_url" when set.
+    """
+    with _HTTP_LOCK:
+        if _HTTP["session"] is not None:
+            return _HTTP["session"]
+        config = config or {}
+        pool_size = int(config.get("http_pool_size", HTTP_POOL_SIZE))
+        timeout = config.get("http_timeout", HTTP_TIMEOUT)
+        timeout = tuple(timeout) if isinstance(timeout, list) else timeout
+        h2 = None
+        if config.get("http2") or os.environ.get("X_HTTP2", "") not in ("", "0"):
+            h2 = _h2_client(pool_size)
+        transport = _Transport(os.environ.get("X_API_BASE_URL") or config.get("api_base_url"),
+                               pool_size=pool_size, timeout=timeout, h2_client=h2)
+        session = requests.Session()
+        # Whatever decoders are installed: gzip and deflate always, br and zstd if available
+        session.headers["Accept-Encoding"] = urllib3.util.make_headers(accept_encoding=True)["accept-encoding"]
+        session.mount(X_API_HOST, transport)
+        session.hooks["response"].append(_http_hook)
+        _HTTP["session"], _HTTP["transport"] = session, transport
+        return session
+
+
+def transport_stats() -> dict | None:
+    """Connection reuse so far: protocol, requests, connections opened, requests that reused one."""
+    transport = _HTTP["transport"]
+    if transport is None:
+        return None
+    stats = transport.stats()
+    stats["reused"] = max(stats["requests"] - stats["connections"], 0)
+    return stats
 
 
 def get_client(config: dict) -> tweepy.Client:
-    return tweepy.Client(
-        bearer_token=config.get("bearer_token"),
-        consumer_key=config["api_key"],
-        consumer_secret=config["api_secret"],
-        access_token=config["access_token"],
-        access_token_secret=config["access_secret"],
-        wait_on_rate_limit=True,
-    )
+    """The tweepy client for these credentials — built once per process, on the shared session."""
+    config_deadline(config)
+    key = (config["api_key"], config["access_token"], config.get("bearer_token"))
+    with timed("get_client"):
+        client = _HTTP["clients"].get(key)
+        if client is None:
+            client = tweepy.Client(
+                bearer_token=config.get("bearer_token"),
+                consumer_key=config["api_key"],
+                consumer_secret=config["api_secret"],
+                access_token=config["access_token"],
+                access_token_secret=config["access_secret"],
+                wait_on_rate_limit=True,
+            )
+            client.session.close()
+            client.session = http_session(config)
+            _HTTP["clients"][key] = client
+    return client
 
 
-def track_usage(tweet_reads: int = 0, user_reads: int = 0, posts_created: int = 0) -> dict:
+def profile_to_dict(user) -> dict:
+    """Convert a tweepy User into the cached profile dict."""
+    return {
+        "id": str(user.id),
+        "username": user.username,
+        "name": user.name,
+        "description": getattr(user, "description", None),
+        "location": getattr(user, "location", None),
+        "created_at": user.created_at.isoformat() if getattr(user, "created_at", None) else None,
+        "url": getattr(user, "url", None),
+        "verified": getattr(user, "verified", None),
+        "verified_type": getattr(user, "verified_type", None),
+        "public_metrics": dict(user.public_metrics) if user.public_metrics else {},
+        "fetched_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def save_cached_profile(profile: dict):
     DATA_DIR.mkdir(parents=True, exist_ok=True)
+    write_json(PROFILE_PATH, profile, phase="save_cache")
+
+
+def load_cached_profile(config: dict) -> tuple[dict | None, bool]:
+    """Return (profile, is_fresh). Fresh means younger than config's profile_ttl."""
+    if not PROFILE_PATH.exists():
+        return None, False
+    try:
+        profile = read_json(PROFILE_PATH, phase="load_cache")
+        fetched = datetime.fromisoformat(profile["fetched_at"])
+    except (ValueError, KeyError):
+        return None, False
+    if config.get("user_id") and profile.get("id") != str(config["user_id"]):
+        return None, False
+    ttl = config.get("profile_ttl", DEFAULT_PROFILE_TTL)
+    age = (datetime.now(timezone.utc) - fetched).total_seconds()
+    return profile, age < ttl
+
+
+def refresh_profile_in_background() -> bool:
+    """Stale-while-revalidate: re-fetch the profile cache in a detached process.
+
+    Skipped if another refresh started in the last minute. Returns True if spawned.
+    """
+    lock = DATA_DIR / "profile.refresh.lock"
+    if lock.exists():
+        age = datetime.now(timezone.utc).timestamp() - lock.stat().st_mtime
+        if age < 60:
+            return False
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    lock.touch()
+    try:
+        subprocess.Popen(
+            # The same account this process runs as: its profile, its cache, its budget
+            [sys.executable, str(SCRIPT_DIR / "x_user.py"), "--account", ACCOUNT, "me", "--refresh-cache"],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        lock.unlink(missing_ok=True)
+        return False
+    return True
+
+
+# === Budget ledger ===
+#
+# Spend lives in usage.json; money that running commands are about to spend lives
+# in reservations.json. check_budget() looks at both and reserves the command's
+# planned cost in one step under an exclusive lock (data/usage.lock), so concurrent
+# commands can't all see the same headroom and overshoot together. track_usage()
+# commits actual spend against the reservation under the same lock, and whatever
+# is left is refunded when the process exits. Reservations of processes that died
+# are dropped the next time anyone looks.
+
+RESERVATIONS_PATH = DATA_DIR / "reservations.json"
+USAGE_LOCK_PATH = DATA_DIR / "usage.lock"
+# A reservation older than this is treated as abandoned (seconds)
+RESERVATION_TTL = 3600
+
+_LEDGER = {"token": f"{os.getpid()}-{os.urandom(4).hex()}", "lock": threading.RLock(), "registered": False,
+           "refusal": "daily budget exceeded"}
+
+
+@contextmanager
+def usage_lock():
+    """Exclusive access to usage.json and reservations.json, across threads and processes."""
+    with _LEDGER["lock"]:
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        with open(USAGE_LOCK_PATH, "a") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid() or os.name == "nt":  # on Windows os.kill would terminate it; rely on the TTL
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def live_reservations() -> dict:
+    """token -> {"pid", "day", "cost", "at"}, without abandoned ones. Call under usage_lock()."""
+    if not RESERVATIONS_PATH.exists():
+        return {}
+    now = time.time()
+    return {token: r for token, r in read_json(RESERVATIONS_PATH, phase="usage").items()
+            if now - r["at"] < RESERVATION_TTL and _pid_alive(r["pid"])}
+
+
+def _set_reservation(reservations: dict, cost: float):
+    token = _LEDGER["token"]
+    if cost <= 0 and token not in reservations:
+        return
+    if cost > 0:
+        reservations[token] = {"pid": os.getpid(), "day": datetime.now(timezone.utc).strftime("%Y-%m-%d"),
+                               "cost": round(cost, 6), "at": time.time()}
+        if not _LEDGER["registered"]:
+            _LEDGER["registered"] = True
+            atexit.register(release_reservation)
+    else:
+        reservations.pop(token, None)
+    write_json(RESERVATIONS_PATH, reservations, phase="usage", indent=None)
+
+
+def release_reservation():
+    """Refund whatever this process reserved and didn't spend (runs at exit)."""
+    with usage_lock():
+        reservations = live_reservations()
+        if _LEDGER["token"] in reservations:
+            _set_reservation(reservations, 0.0)
+
+
+def reserved_today(reservations: dict, exclude_self: bool = False) -> float:
+    """Dollars that `reservations` (from live_reservations) hold against today's budget."""
     today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    usage = {}
-    if USAGE_PATH.exists():
-        usage = json.loads(USAGE_PATH.read_text())
-    if today not in usage:
-        usage[today] = {"tweet_reads": 0, "user_reads": 0, "posts_created": 0, "est_cost": 0.0}
-    if "posts_created" not in usage[today]:
-        usage[today]["posts_created"] = 0
-    usage[today]["tweet_reads"] += tweet_reads
-    usage[today]["user_reads"] += user_reads
-    usage[today]["posts_created"] += posts_created
-    usage[today]["est_cost"] = (usage[today]["tweet_reads"] * 0.005 +
-                                 usage[today]["user_reads"] * 0.01)
-    USAGE_PATH.write_text(json.dumps(usage, indent=2))
+    return sum(r["cost"] for token, r in reservations.items()
+               if r["day"] == today and not (exclude_self and token == _LEDGER["token"]))
+
+
+def track_usage(tweet_reads: int = 0, user_reads: int = 0, posts_created: int = 0) -> dict:
+    """Commit spend: add it to today's usage and draw down this process's reservation."""
+    if replaying():
+        # Replayed calls cost nothing: leave today's spend alone
+        return {"tweet_reads": 0, "user_reads": 0, "posts_created": 0, "est_cost": 0.0, **today_usage()}
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    observe_cost("tweet", tweet_reads)
+    observe_cost("user", user_reads)
+    with usage_lock():
+        usage = {}
+        if USAGE_PATH.exists():
+            usage = read_json(USAGE_PATH, phase="usage")
+        if today not in usage:
+            usage[today] = {"tweet_reads": 0, "user_reads": 0, "posts_created": 0, "est_cost": 0.0}
+        if "posts_created" not in usage[today]:
+            usage[today]["posts_created"] = 0
+        usage[today]["tweet_reads"] += tweet_reads
+        usage[today]["user_reads"] += user_reads
+        usage[today]["posts_created"] += posts_created
+        usage[today]["est_cost"] = (usage[today]["tweet_reads"] * CALL_COSTS["tweet"] +
+                                     usage[today]["user_reads"] * CALL_COSTS["user"])
+        write_json(USAGE_PATH, usage, phase="usage")
+
+        spent = tweet_reads * CALL_COSTS["tweet"] + user_reads * CALL_COSTS["user"]
+        reservations = live_reservations()
+        mine = reservations.get(_LEDGER["token"])
+        if mine and spent:
+            _set_reservation(reservations, mine["cost"] - spent)
     return usage[today]
 
 
+def today_usage() -> dict:
+    """Today's usage totals without recording anything."""
+    if not USAGE_PATH.exists():
+        return {}
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    return read_json(USAGE_PATH, phase="usage").get(today, {})
+
+
 def budget_warning(config: dict, suppress: bool = False):
     """Print budget warning at 50%, 80%, 100% thresholds."""
     mode = config.get("budget_mode", "guarded")
@@ -67,7 +2081,7 @@ def budget_warning(config: dict, suppress: bool = False):
     budget = config.get("daily_budget", 0.25)
     if not USAGE_PATH.exists() or budget <= 0:
         return
-    usage = json.loads(USAGE_PATH.read_text())
+    usage = read_json(USAGE_PATH, phase="usage")
     if today not in usage:
         return
     cost = usage[today].get("est_cost", 0.0)
@@ -80,23 +2094,60 @@ def budget_warning(config: dict, suppress: bool = False):
         print(f"[i] Budget note: ${cost:.3f} / ${budget:.2f} ({pct:.0f}%) used today")
 
 
-def check_budget(config: dict, force: bool = False) -> bool:
-    """Check if daily budget is exceeded. Returns True if OK to proceed."""
-    mode = config.get("budget_mode", "guarded")
-    if force or mode in ("relaxed", "unlimited"):
+def check_budget(config: dict, force: bool = False, cost: float = 0.0) -> bool:
+    """Check the daily budget and reserve `cost` (the command's planned spend) against it.
+
+    Returns True if OK to proceed. Spend so far, other commands' reservations and
+    `cost` must fit in the budget; the check and the reservation are one step under
+    the usage lock. --force and relaxed/unlimited modes skip the check but still
+    reserve, so guarded commands running alongside see the money as taken.
+    """
+    if replaying():
         return True
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    if USAGE_PATH.exists():
-        usage = json.loads(USAGE_PATH.read_text())
-        if today in usage and usage[today]["est_cost"] >= config.get("daily_budget", 0.25):
-            print(f"Daily budget exceeded (${usage[today]['est_cost']:.3f} / ${config['daily_budget']:.2f})")
-            print("Use --force to override.")
-            return False
+    mode = config.get("budget_mode", "guarded")
+    budget = config.get("daily_budget", 0.25)
+    with usage_lock():
+        spent = today_usage().get("est_cost", 0.0)
+        reservations = live_reservations()
+        if not (force or mode in ("relaxed", "unlimited")):
+            others = reserved_today(reservations, exclude_self=True)
+            if spent >= budget:
+                print(f"Daily budget exceeded (${spent:.3f} / ${budget:.2f})")
+                print("Use --force to override.")
+                _LEDGER["refusal"] = "daily budget exceeded"
+                return False
+            if spent + others + cost > budget + 1e-9:
+                held = f" + ${others:.3f} reserved by running commands" if others else ""
+                print(f"Not enough budget left: ${spent:.3f} spent{held}, this needs ~${cost:.3f}"
+                      f" (budget ${budget:.2f})")
+                print("Use --force to override.")
+                if spent + cost > budget + 1e-9:
+                    _LEDGER["refusal"] = "not enough budget left today"
+                else:
+                    # Under budget on actual spend: only running commands' holds are in the way
+                    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+                    runs = sum(1 for token, r in reservations.items()
+                               if r["day"] == today and r["cost"] > 0 and token != _LEDGER["token"])
+                    _LEDGER["refusal"] = f"budget reserved by {runs} in-flight run{'s' if runs != 1 else ''}"
+                return False
+        _set_reservation(reservations, cost)
     return True
 
 
+def budget_refusal() -> str:
+    """Why check_budget() last said no, for offline fallback headers."""
+    return _LEDGER["refusal"]
+
+
+def budget_freed_by_others() -> bool:
+    """True if the last refusal was only other runs' reservations, which free up as they finish."""
+    return _LEDGER["refusal"].startswith("budget reserved")
+
+
 def format_time(dt) -> str:
-    """Format datetime to readable local time."""
+    """Format datetime (or ISO string, or epoch seconds) to readable local time."""
+    if isinstance(dt, (int, float)):
+        return time.strftime("%Y-%m-%d %H:%M %Z", time.localtime(dt))
     if isinstance(dt, str):
         dt = datetime.fromisoformat(dt.replace("Z", "+00:00"))
     local = dt.astimezone()
@@ -104,18 +2155,20 @@ def format_time(dt) -> str:
 
 
 def time_ago(dt) -> str:
-    """Human-readable time ago."""
-    if isinstance(dt, str):
-        dt = datetime.fromisoformat(dt.replace("Z", "+00:00"))
-    now = datetime.now(timezone.utc)
-    diff = now - dt
-    if diff.total_seconds() < 60:
-        return f"{int(diff.total_seconds())}s ago"
-    if diff.total_seconds() < 3600:
-        return f"{int(diff.total_seconds() / 60)}m ago"
-    if diff.total_seconds() < 86400:
-        return f"{int(diff.total_seconds() / 3600)}h ago"
-    return f"{diff.days}d ago"
+    """Human-readable time ago, from a datetime, ISO string or epoch seconds."""
+    if isinstance(dt, (int, float)):
+        seconds = time.time() - dt
+    else:
+        if isinstance(dt, str):
+            dt = datetime.fromisoformat(dt.replace("Z", "+00:00"))
+        seconds = (datetime.now(timezone.utc) - dt).total_seconds()
+    if seconds < 60:
+        return f"{int(seconds)}s ago"
+    if seconds < 3600:
+        return f"{int(seconds / 60)}m ago"
+    if seconds < 86400:
+        return f"{int(seconds / 3600)}h ago"
+    return f"{int(seconds // 86400)}d ago"
 
 
 def format_number(n: int) -> str:
@@ -130,13 +2183,190 @@ def format_number(n: int) -> str:
 def handle_api_error(e: Exception) -> None:
     """Consistent error handling: 401, 402, 403, 429."""
     msg = str(e)
-    if "401" in msg:
-        print("Error: Invalid credentials (401). Re-run x_setup.py or check your API keys.")
+    if isinstance(e, DeadlineExceeded):
+        # Every call after the deadline fails the same way; say it once
+        if _DEADLINE["reported"]:
+            return
+        _DEADLINE["reported"] = True
+        text = f"Deadline reached: {e}. Showing what was fetched so far."
+    elif isinstance(e, CassetteMiss):
+        text = f"Error: {e} (record it first with --record)."
+    elif isinstance(e, requests.exceptions.RequestException):
+        text = f"Error: Could not reach the X API ({type(e).__name__})."
+    elif "401" in msg:
+        text = "Error: Invalid credentials (401). Re-run x_setup.py or check your API keys."
     elif "402" in msg:
-        print("Error: No API credits. Add credits at https://developer.x.com")
+        text = "Error: No API credits. Add credits at https://developer.x.com"
     elif "403" in msg:
-        print("Error: Forbidden (403). Check your app permissions at developer.x.com")
+        text = "Error: Forbidden (403). Check your app permissions at developer.x.com"
     elif "429" in msg:
-        print("Error: Rate limited (429). Wait 15 minutes and try again.")
+        text = "Error: Rate limited (429). Wait 15 minutes and try again."
+    else:
+        text = f"Error: {e}"
+    print(text)
+    emit("error", message=text, exception=type(e).__name__)
+
+
+def offline_reason(e: Exception) -> str | None:
+    """Why the API can't answer right now, or None if the error isn't transient.
+
+    Budget, rate-limit, credit and network failures mean "serve from the local
+    store"; bad credentials or a bad request should surface as-is.
+    """
+    if isinstance(e, tweepy.errors.TooManyRequests):
+        return "rate limited"
+    if isinstance(e, tweepy.errors.TwitterServerError):
+        return "X API unavailable"
+    if isinstance(e, DeadlineExceeded):
+        return "deadline reached"
+    if isinstance(e, CassetteMiss):
+        return "not in the replay recording"
+    if isinstance(e, requests.exceptions.RequestException):
+        return "network unavailable"
+    if "402" in str(e):
+        return "no API credits"
+    return None
+
+
+def own_posts(records, own_id: str) -> list:
+    """Only your own posts. tweets.json also holds other people's tweets, cached
+    by x_read.py and x_watchlist.py (your timeline posts carry no author_id)."""
+    return [t for t in records if t.author_id in (None, "", str(own_id))]
+
+
+def local_records(store: dict, hours: int | None = None, limit: int | None = None,
+                  own_id: str | None = None) -> list[dict]:
+    """Newest-first records from a local store, optionally only the last N hours.
+
+    `own_id` keeps only your own posts (see own_posts).
+    """
+    records = list(store.values())
+    if own_id:
+        records = own_posts(records, own_id)
+    if hours:
+        cutoff = now_epoch() - hours * 3600
+        records = [t for t in records if (t.created_ts or 0) >= cutoff]
+    records.sort(key=lambda t: t.created_ts or 0, reverse=True)
+    if limit:
+        records = records[:limit]
+    return records
+
+
+def staleness_label(record: dict) -> str:
+    """How old the local copy of a record is, e.g. 'cached 3h ago'."""
+    if isinstance(record, TweetRecord):
+        stored = record.stored_ts
     else:
-        print(f"Error: {e}")
+        stored = record.get("stored_at") or record.get("fetched_at")
+    if not stored:
+        return "cached, age unknown"
+    return f"cached {time_ago(stored)}"
+
+
+def print_offline_header(reason: str):
+    print(f"[offline: {reason}] Serving from local store — data may be stale")
+    emit("offline", reason=reason)
+
+
+# === Call planning ===
+#
+# Commands build a plan of the calls they will make (after consulting local
+# caches), print it for --dry-run, and execute the same plan for real runs.
+
+def new_plan(label: str) -> dict:
+    return {"label": label, "steps": [], "cache_hits": []}
+
+
+def plan_step(plan: dict, name: str, endpoint: str, kind: str = "tweet", calls: int = 1,
+              expected: float | None = None, max_calls: int | None = None,
+              note: str = "", params: dict | None = None) -> dict:
+    """Add a call step. `calls` are certain; `expected` projects paginated/conditional ones."""
+    step = {
+        "name": name,
+        "endpoint": endpoint,
+        "kind": kind,
+        "calls": calls,
+        "expected": calls if expected is None else expected,
+        "max_calls": max_calls,
+        "note": note,
+        "params": params or {},
+    }
+    plan["steps"].append(step)
+    return step
+
+
+def plan_hit(plan: dict, what: str):
+    """Record something the plan serves from local data instead of the API."""
+    plan["cache_hits"].append(what)
+
+
+def plan_served(plan: dict):
+    """Count the plan's cache hits for --metrics, once its output has been served.
+
+    Dry runs and runs that fall back to the offline store don't call this.
+    """
+    stat_count("cache_hits", len(plan["cache_hits"]))
+
+
+def get_step(plan: dict, name: str) -> dict | None:
+    return next((s for s in plan["steps"] if s["name"] == name), None)
+
+
+def plan_cost(plan: dict) -> float:
+    return sum(s["expected"] * CALL_COSTS[s["kind"]] for s in plan["steps"])
+
+
+def print_plan(plan: dict):
+    """Dry-run output: the exact calls, cache hits and projected cost."""
+    print(f"[DRY RUN] {plan['label']}")
+    tweet_reads = sum(s["expected"] for s in plan["steps"] if s["kind"] == "tweet")
+    user_reads = sum(s["expected"] for s in plan["steps"] if s["kind"] == "user")
+    parts = []
+    if tweet_reads:
+        parts.append(f"{tweet_reads:g} tweet read{'s' if tweet_reads != 1 else ''}")
+    if user_reads:
+        parts.append(f"{user_reads:g} user read{'s' if user_reads != 1 else ''}")
+    cost = plan_cost(plan)
+    if cost:
+        print(f"  Would cost: ~${cost:.3f} ({' + '.join(parts)})")
+    else:
+        print(f"  Would cost: $0 (served locally)")
+    for s in plan["steps"]:
+        count = f"{s['calls']} call{'s' if s['calls'] != 1 else ''}"
+        if s["expected"] != s["calls"]:
+            count = f"~{s['expected']:g} call{'s' if s['expected'] != 1 else ''}"
+        if s["max_calls"]:
+            count += f" (max {s['max_calls']})"
+        note = f" — {s['note']}" if s["note"] else ""
+        print(f"    {s['endpoint']}: {count}, ${s['expected'] * CALL_COSTS[s['kind']]:.3f}{note}")
+    for hit in plan["cache_hits"]:
+        print(f"    cache hit: {hit} ($0)")
+    emit("plan", label=plan["label"], est_cost=round(cost, 4), steps=plan["steps"],
+         cache_hits=plan["cache_hits"])
+
+
+def _load_ledger() -> dict:
+    if LEDGER_PATH.exists():
+        try:
+            return read_json(LEDGER_PATH, phase="usage")
+        except ValueError:
+            return {}
+    return {}
+
+
+def record_pages(key: str, pages: int):
+    """Remember how many calls a paginated/conditional step actually took."""
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    ledger = _load_ledger()
+    history = ledger.get(key, [])
+    history.append(pages)
+    ledger[key] = history[-LEDGER_WINDOW:]
+    write_json(LEDGER_PATH, ledger, phase="usage", indent=None)
+
+
+def expected_pages(key: str, default: float = 1.0) -> float:
+    """Average calls per run for a step, from the ledger (default when unseen)."""
+    history = _load_ledger().get(key)
+    if not history:
+        return default
+    return round(sum(history) / len(history), 2)
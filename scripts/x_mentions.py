@@ -8,39 +8,144 @@
 """X (Twitter) mentions — who's replying to and talking about you."""
 
 import argparse
-import json
+import re
 import sys
+import time
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
-import tweepy
-
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 from x_common import (
-    DATA_DIR, USAGE_PATH, load_config, save_config, get_client,
-    track_usage, budget_warning, check_budget,
-    format_time, time_ago, format_number, handle_api_error,
+    TweetRecord, load_record_store, save_record_store, to_epoch, now_epoch,
+    load_users, save_users, remember_users, join_authors, with_cold, fields_for, merge_record,
+    add_account_args, add_profile_args, setup_profiling, add_cassette_args, setup_cassette,
+    add_deadline_args, setup_deadline, restart_deadline,
+    load_triage, save_triage, triage_top, triage_handle, triage_score, group_near_duplicates,
+    add_output_args, setup_output, emit, emit_summary,
+    DATA_DIR, API_ERRORS, load_config, save_config, get_client,
+    CALL_COSTS, track_usage, today_usage, budget_warning, check_budget,
+    budget_refusal, budget_freed_by_others,
+    offline_reason, local_records, staleness_label, print_offline_header,
+    new_plan, plan_step, plan_hit, plan_served, get_step, print_plan, plan_cost, record_pages, expected_pages,
+    format_time, time_ago, format_number, handle_api_error, cost_line,
 )
 
 MENTIONS_PATH = DATA_DIR / "mentions.json"
+TWEETS_PATH = DATA_DIR / "tweets.json"
 
-TWEET_FIELDS = [
-    "created_at", "public_metrics", "text", "author_id",
-    "conversation_id", "in_reply_to_user_id", "referenced_tweets",
-]
+# Replies per run whose parent tweet --context shows (one batch lookup covers them)
+CONTEXT_LIMIT = 5
 
-USER_FIELDS = ["username", "name", "verified", "public_metrics"]
+# watch: starting poll interval and its bounds (seconds)
+WATCH_INTERVAL = 300
+WATCH_MIN_INTERVAL = 60
+WATCH_MAX_INTERVAL = 3600
 
 
 def load_store() -> dict:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    if MENTIONS_PATH.exists():
-        return json.loads(MENTIONS_PATH.read_text())
-    return {}
+    return load_record_store(MENTIONS_PATH)
 
 
 def save_store(store: dict):
-    MENTIONS_PATH.write_text(json.dumps(store, indent=2))
+    save_record_store(MENTIONS_PATH, store)
+
+
+def serve_recent_offline(args, store: dict, config: dict, reason: str | None = None) -> bool:
+    """Answer `recent` from the local store. Returns False if there was nothing to show."""
+    if reason:
+        print_offline_header(reason)
+    if args.hours:
+        store = with_cold(store, "mentions", config, now_epoch() - args.hours * 3600)
+    stored = join_authors(local_records(store, hours=args.hours, limit=args.max), load_users())
+    if not stored:
+        if reason:
+            print("No mentions in local store yet.")
+        return False
+    print(f"Your Mentions (from local store, {len(stored)})")
+    print("=" * 50)
+    for m in stored:
+        emit("mention", m, label=staleness_label(m))
+    collapsed = print_mentions(stored, args.expand, label=staleness_label)
+    print(f"---\n(Served from local store — 0 API calls)")
+    if collapsed:
+        print(f"{collapsed} near-duplicate mention(s) collapsed — --expand shows each")
+    print(f"Today's spend: ${today_usage().get('est_cost', 0):.3f}")
+    emit_summary(source="local", near_duplicates=collapsed)
+    return True
+
+
+def mention_record(tweet, authors: dict, stored_ts: int) -> TweetRecord:
+    """Build the stored record for one mention from the API response."""
+    author = authors.get(str(tweet.author_id), {})
+    ref_type = "mention"
+    if tweet.referenced_tweets:
+        for ref in tweet.referenced_tweets:
+            if ref.type == "replied_to":
+                ref_type = "reply"
+            elif ref.type == "quoted":
+                ref_type = "quote"
+    return TweetRecord(
+        str(tweet.id), tweet.text, to_epoch(tweet.created_at), stored_ts,
+        author_id=str(tweet.author_id),
+        author_username=author.get("username", "unknown"),
+        author_name=author.get("name", ""),
+        author_followers=author.get("followers", 0),
+        conversation_id=str(tweet.conversation_id) if tweet.conversation_id else None,
+        kind=ref_type,
+        referenced=tuple((r.type, str(r.id)) for r in tweet.referenced_tweets or ()),
+        metrics=tweet.public_metrics,
+    )
+
+
+def load_tweet_store() -> dict:
+    return load_record_store(TWEETS_PATH)
+
+
+def plan_recent(config: dict, args, label: str = "x_mentions.py recent") -> dict:
+    plan = new_plan(label)
+    kwargs = {
+        "id": config["user_id"],
+        "max_results": min(args.max, 100),
+        **fields_for("mentions"),
+        "user_auth": True,
+    }
+    note = f"up to {kwargs['max_results']} mentions"
+
+    if args.hours:
+        kwargs["start_time"] = datetime.now(timezone.utc) - timedelta(hours=args.hours)
+        note += f" from the last {args.hours}h"
+
+    since_id = config.get("last_mention_id")
+    if since_id and not args.hours and not args.no_cache:
+        kwargs["since_id"] = since_id
+        note += f", only newer than {since_id}"
+
+    plan_step(plan, "mentions", "GET /2/users/:id/mentions", note=note, params=kwargs)
+
+    if args.context:
+        # Which parents are stored is known only once the mentions are in;
+        # project from how often past runs needed the lookup
+        plan_step(plan, "context", "GET /2/tweets", calls=0,
+                  expected=min(expected_pages("mentions.context"), 1), max_calls=1,
+                  note="one batch lookup of the parent tweets not stored locally")
+    return plan
+
+
+def plan_context(plan: dict, parents: dict, tweet_store: dict):
+    """Replace the projected context step with what these mentions' parents need.
+
+    `parents` maps mention ID -> parent tweet ID.
+    """
+    plan["steps"] = [s for s in plan["steps"] if s["name"] != "context"]
+    missing = []
+    for parent_id in dict.fromkeys(parents.values()):
+        if parent_id in tweet_store:
+            plan_hit(plan, f"parent tweet {parent_id}")
+        else:
+            missing.append(parent_id)
+    if missing:
+        plan_step(plan, "context", "GET /2/tweets", note=f"{len(missing)} parent tweet(s) not stored locally",
+                  params=dict(ids=missing, **fields_for("mentions.context"), user_auth=True))
 
 
 def cmd_recent(args):
@@ -51,112 +156,69 @@ def cmd_recent(args):
     force = args.force or args.no_budget
     suppress = args.no_budget
 
+    plan = plan_recent(config, args)
+
     if args.dry_run:
-        cost = "$0.005" if not args.context else "$0.005-0.030"
-        print(f"[DRY RUN] x_mentions.py recent")
-        print(f"  Would cost: ~{cost} (1 tweet read{' + context lookups' if args.context else ''})")
+        print_plan(plan)
         if args.context:
-            print(f"  Tip: skip --context to save ~$0.025 — only adds parent tweet text")
+            print(f"  Tip: skip --context to save up to ${CALL_COSTS['tweet']:.3f} — only adds parent tweet text")
         budget_warning(config, suppress=suppress)
         return
 
-    if not check_budget(config, force):
-        return
-
     store = load_store()
-    client = get_client(config)
-    user_id = config["user_id"]
 
-    kwargs = {
-        "id": user_id,
-        "max_results": min(args.max, 100),
-        "tweet_fields": TWEET_FIELDS,
-        "expansions": ["author_id"],
-        "user_fields": USER_FIELDS,
-        "user_auth": True,
-    }
+    if args.offline:
+        serve_recent_offline(args, store, config, "--offline")
+        return
 
-    if args.hours:
-        kwargs["start_time"] = datetime.now(timezone.utc) - timedelta(hours=args.hours)
+    if not check_budget(config, force, plan_cost(plan)):
+        serve_recent_offline(args, store, config, budget_refusal())
+        return
 
+    client = get_client(config)
     since_id = config.get("last_mention_id")
-    if since_id and not args.hours and not args.no_cache:
-        kwargs["since_id"] = since_id
 
     api_calls = 0
     try:
-        resp = client.get_users_mentions(**kwargs)
+        resp = client.get_users_mentions(**get_step(plan, "mentions")["params"])
         api_calls = 1
-    except tweepy.errors.TweepyException as e:
+    except API_ERRORS as e:
         handle_api_error(e)
+        reason = offline_reason(e)
+        if reason:
+            serve_recent_offline(args, store, config, reason)
         return
 
     day_usage = track_usage(tweet_reads=api_calls)
     budget_warning(config, suppress=suppress)
 
-    # Build author lookup from includes
-    authors = {}
-    if resp.includes and "users" in resp.includes:
-        for user in resp.includes["users"]:
-            authors[str(user.id)] = {
-                "username": user.username,
-                "name": user.name,
-                "followers": user.public_metrics["followers_count"] if user.public_metrics else 0,
-            }
+    # Refresh the users table from includes
+    authors = remember_users(load_users(), resp)
+    save_users(authors)
 
     if not resp.data:
-        if not args.no_cache and store:
-            stored = sorted(store.values(), key=lambda t: t.get("created_at", ""), reverse=True)
-            if args.hours:
-                cutoff = (datetime.now(timezone.utc) - timedelta(hours=args.hours)).isoformat()
-                stored = [t for t in stored if t.get("created_at", "") >= cutoff]
-            stored = stored[:args.max]
-            if stored:
-                print(f"Your Mentions (from local store, {len(stored)})")
-                print("=" * 50)
-                for i, m in enumerate(stored, 1):
-                    print_mention(m, i)
-                print(f"---\n(Served from local store — 0 API calls)")
-                print(f"Today's spend: ${day_usage['est_cost']:.3f}")
-                return
+        if not args.no_cache and serve_recent_offline(args, store, config):
+            return
         print("No new mentions found.")
-        print(f"---\nEst. API cost: ~${api_calls * 0.005:.3f}")
+        print(f"---\n{cost_line(api_calls * CALL_COSTS['tweet'])}")
         print(f"Today's spend: ${day_usage['est_cost']:.3f}")
+        emit_summary(api_calls, api_calls * CALL_COSTS["tweet"], mentions=0)
         return
 
     # Store mentions
     mentions = []
+    stored_ts = now_epoch()
     for tweet in resp.data:
-        tid = str(tweet.id)
-        author = authors.get(str(tweet.author_id), {})
-        ref_type = "mention"
-        if tweet.referenced_tweets:
-            for ref in tweet.referenced_tweets:
-                if ref.type == "replied_to":
-                    ref_type = "reply"
-                elif ref.type == "quoted":
-                    ref_type = "quote"
-
-        data = {
-            "id": tid,
-            "text": tweet.text,
-            "created_at": tweet.created_at.isoformat() if tweet.created_at else None,
-            "author_id": str(tweet.author_id),
-            "author_username": author.get("username", "unknown"),
-            "author_name": author.get("name", ""),
-            "author_followers": author.get("followers", 0),
-            "type": ref_type,
-            "metrics": dict(tweet.public_metrics) if tweet.public_metrics else {},
-            "stored_at": datetime.now(timezone.utc).isoformat(),
-        }
-        store[tid] = data
+        data = merge_record(store, mention_record(tweet, authors, stored_ts), "mentions")
         mentions.append(data)
+        if not args.context:
+            emit("mention", data)
 
     save_store(store)
 
     # Update since_id
     if mentions:
-        max_id = max(m["id"] for m in mentions)
+        max_id = max(m.id for m in mentions)
         if not since_id or int(max_id) > int(since_id):
             config["last_mention_id"] = max_id
             save_config(config)
@@ -164,29 +226,33 @@ def cmd_recent(args):
     # Context fetching (optional)
     context_calls = 0
     if args.context:
-        context_limit = 5
-        for m in mentions[:context_limit]:
-            if m["type"] == "reply" and m.get("metrics", {}).get("reply_count", 0) >= 0:
-                # Try to get the tweet being replied to
-                try:
-                    for ref in resp.data:
-                        if str(ref.id) == m["id"] and ref.referenced_tweets:
-                            parent_id = ref.referenced_tweets[0].id
-                            parent_resp = client.get_tweet(
-                                id=parent_id,
-                                tweet_fields=["text", "author_id", "created_at"],
-                                user_auth=True,
-                            )
-                            context_calls += 1
-                            if parent_resp.data:
-                                m["context_text"] = parent_resp.data.text
-                            break
-                except Exception:
-                    pass
+        tweet_store = load_tweet_store()
+        replies = {str(t.id): t for t in resp.data if t.referenced_tweets}
+        parents = {m.id: str(replies[m.id].referenced_tweets[0].id)
+                   for m in mentions[:CONTEXT_LIMIT] if m.kind == "reply" and m.id in replies}
+        plan_context(plan, parents, tweet_store)
+        texts = {pid: tweet_store[pid].text for pid in parents.values() if pid in tweet_store}
+        context_step = get_step(plan, "context")
+        if context_step and not check_budget(config, force, CALL_COSTS["tweet"]):
+            print(f"Parent tweets not fetched: {budget_refusal()}")
+            context_step = None
+        if context_step:
+            try:
+                parent_resp = client.get_tweets(**context_step["params"])
+                context_calls = 1
+                for parent in parent_resp.data or []:
+                    texts[str(parent.id)] = parent.text
+            except API_ERRORS as e:
+                handle_api_error(e)
+        plan_served(plan)
+        for m in mentions:
+            if parents.get(m.id) in texts:
+                m.context_text = texts[parents[m.id]]
+            emit("mention", m)
+        record_pages("mentions.context", context_calls)
         if context_calls:
             track_usage(tweet_reads=context_calls)
-            day_usage = json.loads(USAGE_PATH.read_text()).get(
-                datetime.now(timezone.utc).strftime("%Y-%m-%d"), {})
+            day_usage = today_usage()
 
     # Display
     header = "Your Mentions"
@@ -196,53 +262,263 @@ def cmd_recent(args):
     print("=" * 50)
 
     type_counts = {"reply": 0, "quote": 0, "mention": 0}
-    for i, m in enumerate(mentions, 1):
-        print_mention(m, i)
-        type_counts[m.get("type", "mention")] += 1
+    for m in mentions:
+        type_counts[m.kind or "mention"] += 1
+    collapsed = print_mentions(mentions, args.expand)
 
     total_calls = api_calls + context_calls
-    total_cost = total_calls * 0.005
+    total_cost = total_calls * CALL_COSTS["tweet"]
     print(f"---")
     print(f"Summary: {len(mentions)} mentions | {type_counts['reply']} replies, {type_counts['quote']} quotes, {type_counts['mention']} direct")
+    if collapsed:
+        print(f"  {collapsed} near-duplicates collapsed (--expand shows each)")
     if total_cost > 0.02:
-        print(f"Est. API cost: ~${total_cost:.3f} ({total_calls} tweet reads) [$$$ EXPENSIVE]")
+        print(f"{cost_line(total_cost, f'{total_calls} tweet reads')} [$$$ EXPENSIVE]")
         print(f"  Tip: skip --context next time to reduce cost")
     else:
-        print(f"Est. API cost: ~${total_cost:.3f} ({total_calls} tweet reads)")
+        print(cost_line(total_cost, f"{total_calls} tweet reads"))
     print(f"Today's spend: ${day_usage.get('est_cost', 0):.3f}")
+    emit_summary(total_calls, total_cost, mentions=len(mentions),
+                 replies=type_counts["reply"], quotes=type_counts["quote"], direct=type_counts["mention"],
+                 near_duplicates=collapsed)
+
+
+def seconds_to_budget_reset() -> float:
+    """Daily spend resets at UTC midnight."""
+    now = datetime.now(timezone.utc)
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (midnight - now).total_seconds()
+
+
+def budget_interval(config: dict, args) -> float | None:
+    """Slowest poll interval that keeps today's spend inside the daily budget, or None if
+    the budget doesn't constrain polling (--force/--no-budget, "unlimited" mode)."""
+    if args.force or args.no_budget or config.get("budget_mode", "guarded") == "unlimited":
+        return None
+    remaining = config.get("daily_budget", 0.25) - today_usage().get("est_cost", 0.0)
+    polls_left = int(remaining / CALL_COSTS["tweet"])
+    left = seconds_to_budget_reset()
+    return left / polls_left if polls_left > 0 else left
+
+
+def next_interval(interval: float, new: int, config: dict, args) -> tuple[float, str]:
+    """Adapt the poll interval: halve it while mentions are arriving, stretch it 1.5x
+    after an empty poll, and never poll faster than the remaining budget allows."""
+    interval = interval / 2 if new else interval * 1.5
+    interval = min(max(interval, args.min_interval), args.max_interval)
+    reason = "mentions arriving" if new else "quiet"
+    floor = budget_interval(config, args)
+    if floor is not None and floor > interval:
+        # The budget outranks --max-interval: polling on schedule would overspend
+        interval, reason = floor, "pacing to daily budget"
+    return interval, reason
+
+
+def poll_mentions(client, config: dict, args, store: dict) -> list[TweetRecord]:
+    """One since_id poll. Stores, emits and returns mentions not seen before."""
+    params = {
+        "id": config["user_id"],
+        "max_results": min(args.max, 100),
+        **fields_for("mentions"),
+        "user_auth": True,
+    }
+    since_id = config.get("last_mention_id")
+    if since_id:
+        params["since_id"] = since_id
+    resp = client.get_users_mentions(**params)
+    track_usage(tweet_reads=1)
+    if not resp.data:
+        return []
+
+    authors = remember_users(load_users(), resp)
+    save_users(authors)
+    stored_ts = now_epoch()
+    # Oldest first, so the stream reads in the order things happened
+    new = [mention_record(t, authors, stored_ts) for t in reversed(resp.data) if str(t.id) not in store]
+    for m in new:
+        merge_record(store, m, "mentions")
+    save_store(store)
+    for m in new:
+        emit("mention", m)
+        text = m.text if len(m.text) <= 80 else m.text[:77] + "..."
+        print(f"  @{m.author_username} ({m.kind}): {text}")
 
+    max_id = max(str(t.id) for t in resp.data)
+    if not since_id or int(max_id) > int(since_id):
+        config["last_mention_id"] = max_id
+        save_config(config)
+    return new
 
-def print_mention(m: dict, index: int):
-    """Print a single mention."""
-    author = f"@{m.get('author_username', 'unknown')}"
-    followers = m.get("author_followers", 0)
-    mtype = m.get("type", "mention")
 
-    text = m["text"]
+def cmd_watch(args):
+    """Poll mentions in one long-lived process and stream new ones as NDJSON."""
+    config = load_config()
+    if not config:
+        return
+
+    if args.offline:
+        print("Error: watch needs the API — drop --offline (or use `recent --offline`).")
+        return
+
+    if args.dry_run:
+        print_plan(plan_recent(config, args, label="x_mentions.py watch (one poll)"))
+        floor = budget_interval(config, args)
+        start = max(args.interval, floor or 0)
+        polls = seconds_to_budget_reset() / start
+        print(f"  Polling every {start:.0f}s (adapts between {args.min_interval}s and {args.max_interval}s)")
+        print(f"  Until the budget resets: up to {polls:.0f} polls, ~${polls * CALL_COSTS['tweet']:.3f}")
+        budget_warning(config, suppress=args.no_budget)
+        return
+
+    force = args.force or args.no_budget
+    client = get_client(config)
+    store = load_store()
+    interval = args.interval
+    polls = api_calls = total = 0
+    print(f"Watching mentions of @{config.get('handle', '?')} — "
+          f"{args.min_interval}-{args.max_interval}s adaptive interval, Ctrl-C to stop")
+    try:
+        while True:
+            # Re-read config each round: other commands move since_id and the budget
+            config = load_config() or config
+            new = []
+            if not check_budget(config, force, CALL_COSTS["tweet"]):
+                reason = budget_refusal()
+                # Other runs' holds clear as they finish; a spent budget only at UTC midnight
+                if not budget_freed_by_others():
+                    interval = seconds_to_budget_reset()
+            else:
+                # In watch mode the deadline bounds each poll, not the whole session
+                restart_deadline()
+                try:
+                    new = poll_mentions(client, config, args, store)
+                    api_calls += 1
+                    interval, reason = next_interval(interval, len(new), config, args)
+                except API_ERRORS as e:
+                    handle_api_error(e)
+                    reason = offline_reason(e)
+                    if reason is None:
+                        break
+                    # Transient (network, 5xx, credits): back off. 429s are slept out by the client.
+                    interval = min(interval * 2, args.max_interval)
+            total += len(new)
+            polls += 1
+            spend = today_usage().get("est_cost", 0.0)
+            print(f"[{time.strftime('%H:%M:%S')}] {len(new)} new | next poll in {interval:.0f}s "
+                  f"({reason}) | today ${spend:.3f}")
+            emit("poll", new=len(new), next_poll_s=round(interval), reason=reason, today_spend=round(spend, 4))
+            if args.polls and polls >= args.polls:
+                break
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print()
+
+    cost = api_calls * CALL_COSTS["tweet"]
+    print(f"---\n{polls} polls, {total} new mentions")
+    print(cost_line(cost, f"{api_calls} tweet reads"))
+    print(f"Today's spend: ${today_usage().get('est_cost', 0):.3f}")
+    emit_summary(api_calls, cost, mentions=total, polls=polls)
+
+
+def print_mentions(mentions: list[TweetRecord], expand: bool, label=None) -> int:
+    """Print mentions with near-duplicates folded into the first of each cluster
+    (unless `expand`). `label(m)` gives a staleness label. Returns how many were folded."""
+    groups = [[m] for m in mentions] if expand else group_near_duplicates(mentions)
+    for i, group in enumerate(groups, 1):
+        print_mention(group[0], i, label=label(group[0]) if label else None, duplicates=group[1:])
+    return len(mentions) - len(groups)
+
+
+def print_mention(m: TweetRecord, index: int, label: str | None = None,
+                  duplicates: list[TweetRecord] | None = None):
+    """Print a single mention. `label` marks served-from-store staleness; `duplicates`
+    are near-identical mentions shown as one count line."""
+    author = f"@{m.author_username or 'unknown'}"
+    followers = m.author_followers or 0
+    mtype = m.kind or "mention"
+
+    text = m.text
     if len(text) > 200:
         text = text[:197] + "..."
 
     type_label = {"reply": "replied to your post", "quote": "quoted your post", "mention": "mentioned you"}
     print(f"{index}. {author} {type_label.get(mtype, 'mentioned you')}:")
     print(f"   \"{text}\"")
-    print(f"   Posted: {format_time(m['created_at'])} ({time_ago(m['created_at'])})")
+    print(f"   Posted: {format_time(m.created_ts)} ({time_ago(m.created_ts)})")
     print(f"   Their followers: {format_number(followers)}")
-
-    if "context_text" in m:
-        ctx = m["context_text"]
+    if label:
+        print(f"   ({label})")
+    if duplicates:
+        authors = list(dict.fromkeys(f"@{d.author_username or 'unknown'}" for d in duplicates))
+        more = f" and {len(authors) - 3} more" if len(authors) > 3 else ""
+        print(f"   + {len(duplicates)} near-identical mention(s) from {', '.join(authors[:3])}{more}")
+
+    if m.context_text is not None:
+        ctx = m.context_text
         if len(ctx) > 100:
             ctx = ctx[:97] + "..."
         print(f"   In reply to: \"{ctx}\"")
 
-    print(f"   https://x.com/{m.get('author_username', 'i')}/status/{m['id']}")
+    print(f"   https://x.com/{m.author_username or 'i'}/status/{m.id}")
     print()
 
 
+def cmd_triage(args):
+    """Top mentions to respond to, from the priority queue ($0)."""
+    queue = load_triage()
+    now = now_epoch()
+    top = triage_top(queue, args.top)
+    print(f"Mentions to respond to (top {len(top)} of {len(queue['order'])} unhandled)")
+    print("=" * 50)
+    type_label = {"reply": "replied to your post", "quote": "quoted your post", "mention": "mentioned you"}
+    for i, row in enumerate(top, 1):
+        score = triage_score(row, now)
+        text = row["text"] if len(row["text"]) <= 200 else row["text"][:197] + "..."
+        author = row["author_username"] or "unknown"
+        print(f"{i}. @{author} {type_label.get(row['kind'], 'mentioned you')} · priority {score:.1f}")
+        print(f"   \"{text}\"")
+        print(f"   {time_ago(row['created_ts'])} · {format_number(row['followers'])} followers · "
+              f"{row['velocity']:g} engagements/h")
+        print(f"   https://x.com/{author}/status/{row['id']}")
+        print()
+        emit("mention", row, rank=i, priority=round(score, 2))
+    if not top:
+        print("Nothing waiting. New mentions are queued as x_mentions.py or x_briefing.py stores them.")
+    else:
+        print(f"Done with one? x_mentions.py handle {top[0]['id']}")
+    print("---\n(From the triage queue — 0 API calls)")
+    emit_summary(source="local", unhandled=len(queue["order"]))
+
+
+def cmd_handle(args):
+    """Mark mentions handled: off the triage queue, and not queued again if re-fetched."""
+    queue = load_triage()
+    if args.all:
+        ids = list(queue["order"])
+    else:
+        ids = []
+        for value in args.mentions:
+            match = re.search(r"(\d+)/?$", value)
+            if not match:
+                print(f"Error: Could not parse a mention ID from '{value}'")
+                continue
+            ids.append(match.group(1))
+    removed = triage_handle(queue, ids)
+    save_triage(queue)
+    for mention_id in ids:
+        state = "handled" if mention_id in removed else "marked handled (wasn't queued)"
+        print(f"{mention_id}: {state}")
+        emit("handled", id=mention_id, queued=mention_id in removed)
+    print(f"---\n{len(queue['order'])} unhandled mention(s) left")
+    emit_summary(source="local", handled=len(removed), unhandled=len(queue["order"]))
+
+
 def main():
     parser = argparse.ArgumentParser(description="X mentions — replies & mentions")
     parser.add_argument("--force", action="store_true", help="Override daily budget guard")
     parser.add_argument("--no-budget", action="store_true", help="Skip all budget checks and warnings")
     parser.add_argument("--no-cache", action="store_true", help="Skip local store")
+    parser.add_argument("--offline", action="store_true", help="Serve from local store only, no API calls")
     parser.add_argument("--dry-run", action="store_true", help="Show estimated cost without making API calls")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
@@ -250,10 +526,49 @@ def main():
     recent_p.add_argument("--max", type=int, default=100, help="Max mentions (default: 100)")
     recent_p.add_argument("--hours", type=int, help="Only mentions from last N hours")
     recent_p.add_argument("--context", action="store_true", help="Fetch parent tweet for replies (costs extra)")
-
+    recent_p.add_argument("--expand", action="store_true", help="Show each near-duplicate mention instead of a count")
+
+    watch_p = subparsers.add_parser("watch", help="Poll for new mentions and stream them as NDJSON")
+    watch_p.add_argument("--interval", type=int, default=WATCH_INTERVAL,
+                         help=f"Starting poll interval in seconds (default: {WATCH_INTERVAL})")
+    watch_p.add_argument("--min-interval", type=int, default=WATCH_MIN_INTERVAL,
+                         help=f"Fastest poll interval (default: {WATCH_MIN_INTERVAL})")
+    watch_p.add_argument("--max-interval", type=int, default=WATCH_MAX_INTERVAL,
+                         help=f"Slowest poll interval while within budget (default: {WATCH_MAX_INTERVAL})")
+    watch_p.add_argument("--polls", type=int, default=0, help="Stop after N polls (default: run until Ctrl-C)")
+    watch_p.add_argument("--max", type=int, default=100, help="Max mentions per poll (default: 100)")
+    watch_p.set_defaults(hours=None, context=False, expand=False)
+
+    triage_p = subparsers.add_parser("triage", help="Mentions most worth responding to, by priority ($0)")
+    triage_p.add_argument("--top", type=int, default=10, help="How many to show (default: 10)")
+
+    handle_p = subparsers.add_parser("handle", help="Mark mentions handled, dropping them from triage ($0)")
+    handle_p.add_argument("mentions", nargs="*", metavar="ID", help="Mention IDs or URLs")
+    handle_p.add_argument("--all", action="store_true", help="Clear the whole queue")
+
+    add_output_args(parser)
+    add_account_args(parser)
+    add_profile_args(parser)
+    add_cassette_args(parser)
+    add_deadline_args(parser)
     args = parser.parse_args()
+    if args.command == "watch":
+        # The watcher is a stream: NDJSON on stdout, status lines on stderr
+        args.json = True
+    setup_output(args)
+    setup_profiling(args)
+    setup_cassette(args)
+    setup_deadline(args)
     if args.command == "recent":
         cmd_recent(args)
+    elif args.command == "watch":
+        cmd_watch(args)
+    elif args.command == "triage":
+        cmd_triage(args)
+    elif args.command == "handle":
+        if not args.mentions and not args.all:
+            parser.error("handle needs mention IDs (or --all)")
+        cmd_handle(args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,615 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = []
+# ///
+"""Local stand-in for the X API v2 endpoints the skill uses — for offline testing and benchmarks.
+
+Serves deterministic synthetic data with realistic payload shapes, pagination,
+rate-limit headers, and injectable latency and errors. Point the scripts at it
+with X_API_BASE_URL (see x_common.http_session).
+
+    uv run scripts/x_mock_api.py --port 8787 --latency 80
+    X_API_BASE_URL=http://127.0.0.1:8787 uv run scripts/x_timeline.py recent
+
+GET /__stats returns per-endpoint call counts and bytes; POST /__reset clears them.
+"""
+
+import argparse
+import gzip
+import json
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Own account; the access token must look like "<user_id>-..." for tweepy's OAuth 1.0a user lookup
+OWN_ID = "42"
+OWN_HANDLE = "bench"
+ACCESS_TOKEN = f"{OWN_ID}-benchtoken"
+
+TWITTER_EPOCH_MS = 1288834974657
+RATE_WINDOW = 15 * 60
+GZIP_MIN_BYTES = 1024
+
+WORDS = (
+    "ship build launch agent model latency cache budget thread reply api python rust "
+    "tweet metrics growth product design startup founder weekend coffee bug deploy "
+    "benchmark release feedback users pricing data open source docs roadmap"
+).split()
+
+
+def snowflake(ts: float, seq: int) -> str:
+    """X-style ID: ordering by ID is ordering by time."""
+    return str(((int(ts * 1000) - TWITTER_EPOCH_MS) << 22) | (seq & 0x3FFFFF))
+
+
+def iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def parse_iso(value: str) -> float:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+class Dataset:
+    """Synthetic users, posts, mentions, threads and bookmarks, reproducible from a seed."""
+
+    def __init__(self, seed: int = 1, posts: int = 300, mentions: int = 500,
+                 others: int = 2000, users: int = 200, now: float | None = None):
+        rng = random.Random(seed)
+        self.now = now or time.time()
+        self.users = {}
+        self.tweets = {}
+        self.timeline = []      # own post IDs, newest first
+        self.mentions = []      # mention IDs, newest first
+        self.bookmarks = []
+        self.followers = []
+        self._seq = 0
+
+        self.users[OWN_ID] = self._user(rng, OWN_ID, OWN_HANDLE, "Bench Account", followers=4800)
+        other_ids = []
+        for i in range(users):
+            uid = str(1000 + i)
+            # Heavy-tailed follower counts: most small, a few large accounts
+            followers = int(rng.paretovariate(1.1) * 80)
+            self.users[uid] = self._user(rng, uid, f"user{i}", f"User {i}", followers=followers)
+            other_ids.append(uid)
+        self.followers = other_ids[: users // 2]
+
+        # Own posts over the last 30 days, denser recently; every 5th continues a self-thread
+        own = []
+        for _ in range(posts):
+            age = rng.expovariate(1 / (3 * 86400)) % (30 * 86400)
+            own.append(self.now - age)
+        own.sort()
+        prev = None
+        for ts in own:
+            reply_to = prev if prev and rng.random() < 0.2 and ts - self.tweets[prev]["_ts"] < 3600 * 6 else None
+            tid = self._tweet(rng, ts, OWN_ID, reply_to=reply_to)
+            self.timeline.append(tid)
+            prev = tid
+        self.timeline.reverse()
+
+        # Mentions: replies to own posts, quotes, and plain @mentions
+        for _ in range(mentions):
+            ts = self.now - rng.expovariate(1 / (2 * 86400)) % (14 * 86400)
+            author = rng.choice(other_ids)
+            kind = rng.random()
+            eligible = [t for t in self.timeline if self.tweets[t]["_ts"] < ts]
+            if kind < 0.6 and eligible:
+                tid = self._tweet(rng, ts, author, reply_to=rng.choice(eligible[:50]), mention=True)
+            elif kind < 0.75 and eligible:
+                tid = self._tweet(rng, ts, author, quote=rng.choice(eligible[:50]), mention=True)
+            else:
+                tid = self._tweet(rng, ts, author, mention=True)
+            self.mentions.append(tid)
+        self.mentions.sort(key=int, reverse=True)
+
+        # Unrelated tweets from other accounts, for search and bookmarks
+        others_ids = []
+        for _ in range(others):
+            ts = self.now - rng.random() * 6 * 86400
+            others_ids.append(self._tweet(rng, ts, rng.choice(other_ids)))
+        self.bookmarks = rng.sample(others_ids, min(50, len(others_ids)))
+
+    def _user(self, rng, uid, username, name, followers):
+        return {
+            "id": uid,
+            "username": username,
+            "name": name,
+            "description": f"{rng.choice(WORDS)} and {rng.choice(WORDS)}",
+            "location": rng.choice(["", "Berlin", "SF", "London", "Remote"]),
+            "created_at": iso(self.now - rng.randint(400, 4000) * 86400),
+            "url": "",
+            "verified": followers > 50000,
+            "verified_type": "blue" if followers > 50000 else "none",
+            "profile_image_url": f"https://pbs.twimg.com/profile_images/{uid}/avatar.jpg",
+            "public_metrics": {
+                "followers_count": followers,
+                "following_count": rng.randint(50, 2000),
+                "tweet_count": rng.randint(100, 40000),
+                "listed_count": rng.randint(0, 300),
+            },
+        }
+
+    def _tweet(self, rng, ts, author, reply_to=None, quote=None, mention=False):
+        self._seq += 1
+        tid = snowflake(ts, self._seq)
+        words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 40)))
+        text = f"@{OWN_HANDLE} {words}" if mention and not reply_to else words
+        age = max(self.now - ts, 60)
+        impressions = int(rng.lognormvariate(6, 1.2) * min(age / 3600, 48) ** 0.5)
+        tweet = {
+            "id": tid,
+            "text": text[:280],
+            "created_at": iso(ts),
+            "author_id": author,
+            "conversation_id": tid,
+            "edit_history_tweet_ids": [tid],
+            "lang": "en",
+            "public_metrics": {
+                "retweet_count": int(impressions * rng.random() * 0.004),
+                "reply_count": int(impressions * rng.random() * 0.003),
+                "like_count": int(impressions * rng.random() * 0.02),
+                "quote_count": int(impressions * rng.random() * 0.001),
+                "bookmark_count": int(impressions * rng.random() * 0.002),
+                "impression_count": impressions,
+            },
+            "_ts": ts,
+        }
+        if reply_to:
+            parent = self.tweets[reply_to]
+            tweet["referenced_tweets"] = [{"type": "replied_to", "id": reply_to}]
+            tweet["conversation_id"] = parent["conversation_id"]
+            tweet["in_reply_to_user_id"] = parent["author_id"]
+        elif quote:
+            tweet["referenced_tweets"] = [{"type": "quoted", "id": quote}]
+        self.tweets[tid] = tweet
+        return tid
+
+
+# Fields the API returns without being asked; the rest only when listed in tweet.fields / user.fields
+DEFAULT_TWEET_FIELDS = frozenset({"id", "text", "edit_history_tweet_ids"})
+DEFAULT_USER_FIELDS = frozenset({"id", "name", "username"})
+
+
+def public(tweet: dict, fields: set) -> dict:
+    keep = DEFAULT_TWEET_FIELDS | fields
+    return {k: v for k, v in tweet.items() if k in keep}
+
+
+def public_user(user: dict, fields: set) -> dict:
+    keep = DEFAULT_USER_FIELDS | fields
+    return {k: v for k, v in user.items() if k in keep}
+
+
+def match_query(query: str, tweet: dict, users: dict) -> bool:
+    """Enough of the search syntax for the skill: OR of AND-ed terms, key:value operators, -negation."""
+    for clause in re.split(r"\s+OR\s+", query.replace("(", " ").replace(")", " ")):
+        terms = re.findall(r'-?"[^"]*"|\S+', clause)
+        if terms and all(_match_term(t, tweet, users) for t in terms):
+            return True
+    return False
+
+
+def _match_term(term: str, tweet: dict, users: dict) -> bool:
+    negate = term.startswith("-")
+    term = term.lstrip("-")
+    author = users.get(tweet["author_id"], {})
+    if term.startswith('"'):
+        hit = term.strip('"').lower() in tweet["text"].lower()
+    elif ":" in term:
+        key, _, value = term.partition(":")
+        value = value.lower()
+        if key == "conversation_id":
+            hit = tweet["conversation_id"] == value
+        elif key == "from":
+            hit = author.get("username", "").lower() == value.lstrip("@")
+        elif key == "to":
+            parent = users.get(tweet.get("in_reply_to_user_id", ""), {})
+            hit = parent.get("username", "").lower() == value.lstrip("@")
+        elif key == "is":
+            refs = {r["type"] for r in tweet.get("referenced_tweets", [])}
+            hit = {"reply": "replied_to", "quote": "quoted", "retweet": "retweeted"}.get(value) in refs
+        elif key == "lang":
+            hit = tweet.get("lang") == value
+        else:
+            hit = True
+    else:
+        hit = term.lower() in tweet["text"].lower()
+    return hit != negate
+
+
+class MockState:
+    """Dataset plus server behaviour knobs and request statistics."""
+
+    def __init__(self, dataset: Dataset, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 503, rate_limit: int = 900,
+                 seed: int = 1):
+        self.data = dataset
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rate_limit = rate_limit
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.windows = {}
+        self.stats = {}
+
+    def record(self, endpoint: str, status: int, nbytes: int):
+        with self.lock:
+            s = self.stats.setdefault(endpoint, {"calls": 0, "errors": 0, "bytes_out": 0})
+            s["calls"] += 1
+            s["bytes_out"] += nbytes
+            if status >= 400:
+                s["errors"] += 1
+
+    def take_quota(self, endpoint: str) -> tuple[int, int]:
+        """Consume one request from the endpoint's 15-minute window -> (remaining, reset)."""
+        now = time.time()
+        with self.lock:
+            remaining, reset = self.windows.get(endpoint, (self.rate_limit, int(now) + RATE_WINDOW))
+            if now >= reset:
+                remaining, reset = self.rate_limit, int(now) + RATE_WINDOW
+            remaining -= 1
+            self.windows[endpoint] = (remaining, reset)
+        return remaining, reset
+
+
+ROUTES = [
+    ("GET", re.compile(r"^/2/users/me$"), "users_me"),
+    ("GET", re.compile(r"^/2/users/by/username/(?P<username>\w+)$"), "user_by_username"),
+    ("GET", re.compile(r"^/2/users/by$"), "users_by"),
+    ("GET", re.compile(r"^/2/users/(?P<id>\d+)/tweets$"), "users_tweets"),
+    ("GET", re.compile(r"^/2/users/(?P<id>\d+)/mentions$"), "users_mentions"),
+    ("GET", re.compile(r"^/2/users/(?P<id>\d+)/followers$"), "followers"),
+    ("GET", re.compile(r"^/2/users/(?P<id>\d+)/bookmarks$"), "bookmarks"),
+    ("POST", re.compile(r"^/2/users/(?P<id>\d+)/bookmarks$"), "bookmark_add"),
+    ("DELETE", re.compile(r"^/2/users/(?P<id>\d+)/bookmarks/(?P<tweet_id>\d+)$"), "bookmark_remove"),
+    ("GET", re.compile(r"^/2/users/(?P<id>\d+)$"), "user_by_id"),
+    ("GET", re.compile(r"^/2/tweets/search/recent$"), "search_recent"),
+    ("GET", re.compile(r"^/2/tweets/(?P<id>\d+)$"), "tweet"),
+    ("GET", re.compile(r"^/2/tweets$"), "tweets"),
+]
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "x-mock-api/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _send(self, status: int, body: dict, endpoint: str, headers: dict | None = None):
+        raw = json.dumps(body, separators=(",", ":")).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        # Like the real API, compress anything worth it when the client accepts gzip
+        if len(raw) >= GZIP_MIN_BYTES and "gzip" in self.headers.get("Accept-Encoding", ""):
+            raw = gzip.compress(raw, compresslevel=5)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(raw)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, str(v))
+        self.end_headers()
+        self.wfile.write(raw)
+        if endpoint:
+            self.server.state.record(endpoint, status, len(raw))
+
+    def _dispatch(self, method: str):
+        state = self.server.state
+        url = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if url.path == "/__stats":
+            self._send(200, state.stats, "")
+            return
+        if url.path == "/__reset" and method == "POST":
+            with state.lock:
+                state.stats.clear()
+                state.windows.clear()
+            self._send(200, {"ok": True}, "")
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length)) if length else {}
+
+        for route_method, pattern, name in ROUTES:
+            match = pattern.match(url.path)
+            if match and route_method == method:
+                break
+        else:
+            self._send(404, {"title": "Not Found Error", "detail": f"no route for {method} {url.path}",
+                             "type": "https://api.twitter.com/2/problems/resource-not-found"}, "unknown")
+            return
+
+        if state.latency_ms or state.jitter_ms:
+            time.sleep(max(0.0, state.latency_ms + state.rng.uniform(-state.jitter_ms, state.jitter_ms)) / 1000)
+
+        remaining, reset = state.take_quota(name)
+        headers = {"x-rate-limit-limit": state.rate_limit, "x-rate-limit-remaining": max(remaining, 0),
+                   "x-rate-limit-reset": reset}
+        if remaining < 0:
+            self._send(429, {"title": "Too Many Requests", "detail": "Too Many Requests", "status": 429},
+                       name, headers)
+            return
+        if state.error_rate and state.rng.random() < state.error_rate:
+            status = state.error_status
+            if status == 429:
+                # Reset almost immediately so tweepy's wait_on_rate_limit sleep stays short
+                headers["x-rate-limit-remaining"] = 0
+                headers["x-rate-limit-reset"] = int(time.time()) + 1
+            self._send(status, {"title": "Injected Error", "detail": f"injected {status}", "status": status},
+                       name, headers)
+            return
+
+        status, body = getattr(self, f"route_{name}")(query, payload, **match.groupdict())
+        self._send(status, body, name, headers)
+
+    # === Helpers ===
+
+    def _fields(self, query: dict, key: str) -> set:
+        return set(filter(None, query.get(key, "").split(",")))
+
+    def _includes(self, tweets: list[dict], query: dict) -> dict:
+        data = self.server.state.data
+        expansions = self._fields(query, "expansions")
+        includes = {}
+        if "referenced_tweets.id" in expansions:
+            refs = []
+            for t in tweets:
+                for r in t.get("referenced_tweets", []):
+                    if r["id"] in data.tweets:
+                        refs.append(data.tweets[r["id"]])
+            if refs:
+                includes["tweets"] = [public(t, self._fields(query, "tweet.fields")) for t in refs]
+        if "author_id" in expansions or "referenced_tweets.id.author_id" in expansions:
+            author_ids = {t["author_id"] for t in tweets}
+            if "referenced_tweets.id.author_id" in expansions:
+                author_ids |= {t["author_id"] for t in includes.get("tweets", [])}
+            includes["users"] = [public_user(data.users[a], self._fields(query, "user.fields"))
+                                 for a in sorted(author_ids) if a in data.users]
+        return includes
+
+    def _page(self, ids: list[str], query: dict, default_max: int = 10) -> tuple[int, dict]:
+        """Filter newest-first IDs by the time/ID bounds in `query` and return one page."""
+        data = self.server.state.data
+        try:
+            max_results = max(5, min(int(query.get("max_results", default_max)), 100))
+        except ValueError:
+            return 400, {"title": "Invalid Request", "detail": "max_results must be an integer"}
+        start = parse_iso(query["start_time"]) if "start_time" in query else None
+        end = parse_iso(query["end_time"]) if "end_time" in query else None
+        since_id = int(query["since_id"]) if "since_id" in query else None
+        until_id = int(query["until_id"]) if "until_id" in query else None
+        excluded = self._fields(query, "exclude")
+
+        selected = []
+        for tid in ids:
+            t = data.tweets[tid]
+            if start and t["_ts"] < start or end and t["_ts"] > end:
+                continue
+            if since_id and int(tid) <= since_id or until_id and int(tid) >= until_id:
+                continue
+            refs = {r["type"] for r in t.get("referenced_tweets", [])}
+            if "replies" in excluded and "replied_to" in refs or "retweets" in excluded and "retweeted" in refs:
+                continue
+            selected.append(t)
+
+        # Timelines page with pagination_token, search with next_token
+        offset = int(query.get("pagination_token") or query.get("next_token") or 0)
+        page = selected[offset:offset + max_results]
+        meta = {"result_count": len(page)}
+        if page:
+            meta["newest_id"] = page[0]["id"]
+            meta["oldest_id"] = page[-1]["id"]
+        if offset + max_results < len(selected):
+            meta["next_token"] = str(offset + max_results)
+        if offset:
+            meta["previous_token"] = str(max(offset - max_results, 0))
+        body = {"meta": meta}
+        if page:
+            body["data"] = [public(t, self._fields(query, "tweet.fields")) for t in page]
+            includes = self._includes(page, query)
+            if includes:
+                body["includes"] = includes
+        return 200, body
+
+    def _not_found(self, what: str, value: str) -> tuple[int, dict]:
+        return 200, {"errors": [{"value": value, "detail": f"Could not find {what} with id: [{value}].",
+                                 "title": "Not Found Error", "resource_type": what,
+                                 "type": "https://api.twitter.com/2/problems/resource-not-found"}]}
+
+    # === Routes ===
+
+    def route_users_me(self, query, payload):
+        user = self.server.state.data.users[OWN_ID]
+        return 200, {"data": public_user(user, self._fields(query, "user.fields"))}
+
+    def route_user_by_id(self, query, payload, id):
+        user = self.server.state.data.users.get(id)
+        if not user:
+            return self._not_found("user", id)
+        return 200, {"data": public_user(user, self._fields(query, "user.fields"))}
+
+    def route_user_by_username(self, query, payload, username):
+        for user in self.server.state.data.users.values():
+            if user["username"].lower() == username.lower():
+                return 200, {"data": public_user(user, self._fields(query, "user.fields"))}
+        return self._not_found("user", username)
+
+    def route_users_by(self, query, payload):
+        wanted = [u.lower() for u in query.get("usernames", "").split(",") if u]
+        if not wanted or len(wanted) > 100:
+            return 400, {"title": "Invalid Request", "detail": "usernames must contain 1-100 names"}
+        by_name = {u["username"].lower(): u for u in self.server.state.data.users.values()}
+        body = {}
+        found = [by_name[u] for u in wanted if u in by_name]
+        if found:
+            body["data"] = [public_user(u, self._fields(query, "user.fields")) for u in found]
+        missing = [u for u in wanted if u not in by_name]
+        if missing:
+            body["errors"] = [self._not_found("user", u)[1]["errors"][0] for u in missing]
+        return 200, body
+
+    def route_users_tweets(self, query, payload, id):
+        data = self.server.state.data
+        ids = data.timeline if id == OWN_ID else [t["id"] for t in sorted(
+            (t for t in data.tweets.values() if t["author_id"] == id), key=lambda t: -int(t["id"]))]
+        return self._page(ids, query)
+
+    def route_users_mentions(self, query, payload, id):
+        data = self.server.state.data
+        return self._page(data.mentions if id == OWN_ID else [], query)
+
+    def route_followers(self, query, payload, id):
+        data = self.server.state.data
+        ids = data.followers if id == OWN_ID else []
+        max_results = max(1, min(int(query.get("max_results", 100)), 1000))
+        offset = int(query.get("pagination_token", "0") or 0)
+        page = ids[offset:offset + max_results]
+        meta = {"result_count": len(page)}
+        if offset + max_results < len(ids):
+            meta["next_token"] = str(offset + max_results)
+        body = {"meta": meta}
+        if page:
+            body["data"] = [public_user(data.users[u], self._fields(query, "user.fields")) for u in page]
+        return 200, body
+
+    def route_bookmarks(self, query, payload, id):
+        return self._page(list(self.server.state.data.bookmarks), query, default_max=100)
+
+    def route_bookmark_add(self, query, payload, id):
+        data = self.server.state.data
+        tweet_id = str(payload.get("tweet_id", ""))
+        if tweet_id and tweet_id not in data.bookmarks:
+            data.bookmarks.insert(0, tweet_id)
+        return 200, {"data": {"bookmarked": True}}
+
+    def route_bookmark_remove(self, query, payload, id, tweet_id):
+        data = self.server.state.data
+        if tweet_id in data.bookmarks:
+            data.bookmarks.remove(tweet_id)
+        return 200, {"data": {"bookmarked": False}}
+
+    def route_search_recent(self, query, payload):
+        data = self.server.state.data
+        q = query.get("query", "")
+        if not q:
+            return 400, {"title": "Invalid Request", "detail": "query is required"}
+        cutoff = data.now - 7 * 86400
+        ids = [t["id"] for t in sorted(data.tweets.values(), key=lambda t: -int(t["id"]))
+               if t["_ts"] >= cutoff and match_query(q, t, data.users)]
+        return self._page(ids, query)
+
+    def route_tweet(self, query, payload, id):
+        tweet = self.server.state.data.tweets.get(id)
+        if not tweet:
+            return self._not_found("tweet", id)
+        body = {"data": public(tweet, self._fields(query, "tweet.fields"))}
+        includes = self._includes([tweet], query)
+        if includes:
+            body["includes"] = includes
+        return 200, body
+
+    def route_tweets(self, query, payload):
+        data = self.server.state.data
+        ids = [i for i in query.get("ids", "").split(",") if i]
+        if not ids or len(ids) > 100:
+            return 400, {"title": "Invalid Request", "detail": "ids must contain 1-100 IDs"}
+        found = [data.tweets[i] for i in ids if i in data.tweets]
+        body = {}
+        if found:
+            body["data"] = [public(t, self._fields(query, "tweet.fields")) for t in found]
+            includes = self._includes(found, query)
+            if includes:
+                body["includes"] = includes
+        missing = [i for i in ids if i not in data.tweets]
+        if missing:
+            body["errors"] = [self._not_found("tweet", i)[1]["errors"][0] for i in missing]
+        return 200, body
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, state: MockState, verbose: bool = False):
+        super().__init__(address, Handler)
+        self.state = state
+        self.verbose = verbose
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_server(state: MockState, host: str = "127.0.0.1", port: int = 0) -> MockServer:
+    """Start a mock server on a background thread (port 0 = pick a free port)."""
+    server = MockServer((host, port), state)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_mock_args(parser):
+    """Dataset and behaviour options, shared with x_bench.py."""
+    parser.add_argument("--seed", type=int, default=1, help="Dataset seed (default: 1)")
+    parser.add_argument("--posts", type=int, default=300, help="Own posts over 30 days (default: 300)")
+    parser.add_argument("--mentions", type=int, default=500, help="Mentions over 14 days (default: 500)")
+    parser.add_argument("--others", type=int, default=2000, help="Other accounts' tweets (default: 2000)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Added latency per request in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random +/- latency in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail (0-1)")
+    parser.add_argument("--error-status", type=int, default=503, help="Status for injected failures (default: 503)")
+    parser.add_argument("--rate-limit", type=int, default=900,
+                        help="Requests per endpoint per 15-minute window (default: 900)")
+
+
+def state_from_args(args) -> MockState:
+    dataset = Dataset(seed=args.seed, posts=args.posts, mentions=args.mentions, others=args.others)
+    return MockState(dataset, latency_ms=args.latency, jitter_ms=args.jitter, error_rate=args.error_rate,
+                     error_status=args.error_status, rate_limit=args.rate_limit, seed=args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the X API v2 endpoints used by the skill")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8787, help="Port (default: 8787)")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    add_mock_args(parser)
+    args = parser.parse_args()
+
+    state = state_from_args(args)
+    server = MockServer((args.host, args.port), state, verbose=args.verbose)
+    data = state.data
+    print(f"Mock X API on {server.base_url} — @{OWN_HANDLE} (id {OWN_ID}), {len(data.timeline)} posts, "
+          f"{len(data.mentions)} mentions, {len(data.tweets)} tweets total")
+    print(f"  export X_API_BASE_URL={server.base_url}")
+    print(f"  config: user_id {OWN_ID}, handle {OWN_HANDLE}, access_token {ACCESS_TOKEN}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
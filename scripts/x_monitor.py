@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "tweepy>=4.14.0",
+# ]
+# ///
+"""X (Twitter) keyword monitors — track brand keywords, hashtags and searches.
+
+Saved monitors are OR'd together into as few recent-search calls as the query
+length limit allows, and each result is matched back to its monitors locally,
+so N keywords cost about one call per poll instead of N.
+"""
+
+import argparse
+import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from x_common import (
+    TweetRecord, load_record_store, save_record_store, tweet_to_record, now_epoch,
+    fields_for, merge_record,
+    load_json_store, save_json_store, load_users, save_users, remember_users, join_authors,
+    add_account_args, add_profile_args, setup_profiling, add_cassette_args, setup_cassette,
+    add_deadline_args, setup_deadline, DeadlineExceeded,
+    add_output_args, setup_output, emit, emit_summary,
+    DATA_DIR, RECORD_STORES, API_ERRORS, CALL_COSTS, load_config, get_client,
+    track_usage, today_usage, budget_warning, check_budget, budget_refusal,
+    offline_reason, staleness_label, print_offline_header,
+    new_plan, plan_step, print_plan, plan_cost, record_pages, expected_pages,
+    time_ago, handle_api_error, cost_line,
+)
+
+MONITORS_PATH = DATA_DIR / "monitors.json"
+
+# Recent-search query length limit (1024 on Pro access); override with config "search_query_limit"
+QUERY_LIMIT = 512
+
+# Result pages (100 each) per combined search per poll
+MAX_PAGES = 3
+
+# Hit IDs remembered per monitor
+HIT_LIMIT = 500
+
+
+# === Local query matching ===
+#
+# Enough of the search syntax to tell which monitor a result belongs to: keywords,
+# "phrases", #hashtags, @mentions, $cashtags, -negation, OR, parentheses and the
+# from:/is:/lang:/has: operators. A monitor using anything else still works, but
+# gets a search call of its own since its results can't be told apart locally.
+
+TOKEN_RE = re.compile(r'"[^"]*"|\(|\)|-|[^\s()"]+')
+WORD_RE = re.compile(r"\w+")
+TAG_RE = re.compile(r"[#@$]\w+")
+
+HAS_CHECKS = {
+    "links": lambda doc: "http" in doc["text"],
+    "mentions": lambda doc: any(t[0] == "@" for t in doc["tags"]),
+    "hashtags": lambda doc: any(t[0] == "#" for t in doc["tags"]),
+}
+
+
+class Unsupported(ValueError):
+    """The query uses syntax the local matcher can't evaluate."""
+
+
+def tweet_doc(record: TweetRecord) -> dict:
+    text = record.text.lower()
+    return {
+        "text": text,
+        "words": set(WORD_RE.findall(text)),
+        "tags": set(TAG_RE.findall(text)),
+        "author": (record.author_username or "").lower(),
+        "refs": {t for t, _ in record.referenced or ()},
+        "lang": record.get("lang"),
+    }
+
+
+def compile_query(query: str):
+    """Search query -> predicate over `tweet_doc`s. AND binds tighter than OR, as on X.
+
+    Raises Unsupported for syntax the matcher doesn't cover, ValueError if malformed.
+    """
+    tokens = TOKEN_RE.findall(query)
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else None
+
+    def disjunction():
+        nonlocal pos
+        terms = [conjunction()]
+        while peek() == "OR":
+            pos += 1
+            terms.append(conjunction())
+        return terms[0] if len(terms) == 1 else (lambda doc: any(t(doc) for t in terms))
+
+    def conjunction():
+        terms = []
+        while peek() not in (None, ")", "OR"):
+            terms.append(unary())
+        if not terms:
+            raise ValueError(f"empty clause in query: {query}")
+        return terms[0] if len(terms) == 1 else (lambda doc: all(t(doc) for t in terms))
+
+    def unary():
+        nonlocal pos
+        if peek() == "-":
+            pos += 1
+            term = atom()
+            return lambda doc: not term(doc)
+        return atom()
+
+    def atom():
+        nonlocal pos
+        tok = peek()
+        pos += 1
+        if tok == "(":
+            inner = disjunction()
+            if peek() != ")":
+                raise ValueError(f"unbalanced parentheses in query: {query}")
+            pos += 1
+            return inner
+        if tok == ")":
+            raise ValueError(f"unbalanced parentheses in query: {query}")
+        if tok.startswith('"'):
+            phrase = tok.strip('"').lower()
+            return lambda doc: phrase in doc["text"]
+        if tok[0] in "#@$":
+            tag = tok.lower()
+            return lambda doc: tag in doc["tags"]
+        if ":" in tok:
+            return operator(*tok.lower().split(":", 1))
+        word = tok.lower()
+        if WORD_RE.fullmatch(word):
+            return lambda doc: word in doc["words"]
+        return lambda doc: word in doc["text"]
+
+    def operator(key: str, value: str):
+        if key == "from":
+            value = value.lstrip("@")
+            return lambda doc: doc["author"] == value
+        if key == "is" and value in ("reply", "quote", "retweet"):
+            ref = {"reply": "replied_to", "quote": "quoted", "retweet": "retweeted"}[value]
+            return lambda doc: ref in doc["refs"]
+        if key == "lang":
+            return lambda doc: doc["lang"] == value
+        if key == "has" and value in HAS_CHECKS:
+            return HAS_CHECKS[value]
+        raise Unsupported(f"{key}:{value}")
+
+    predicate = disjunction()
+    if pos != len(tokens):
+        raise ValueError(f"unbalanced parentheses in query: {query}")
+    return predicate
+
+
+def matchable(query: str) -> bool:
+    try:
+        compile_query(query)
+        return True
+    except Unsupported:
+        return False
+
+
+# === Monitors ===
+
+def load_monitors() -> dict:
+    """name -> {"query", "since_id", "hits" (newest first), "added_at"}"""
+    return load_json_store(MONITORS_PATH)
+
+
+def save_monitors(monitors: dict):
+    save_json_store(MONITORS_PATH, monitors)
+
+
+def query_limit(config: dict) -> int:
+    return config.get("search_query_limit", QUERY_LIMIT)
+
+
+def combined_query(queries: list[str]) -> str:
+    if len(queries) == 1:
+        return queries[0]
+    return " OR ".join(f"({q})" for q in queries)
+
+
+def pack_monitors(monitors: dict, limit: int) -> list[list[str]]:
+    """Group monitors into as few OR'd queries as fit under `limit` (first-fit decreasing).
+    Monitors the local matcher can't evaluate get a group to themselves."""
+    groups, sizes = [], []
+    ordered = sorted(monitors, key=lambda name: -len(monitors[name]["query"]))
+    for name in ordered:
+        query = monitors[name]["query"]
+        if not matchable(query):
+            groups.append([name])
+            sizes.append(None)
+            continue
+        cost = len(query) + 2  # wrapped in parentheses
+        for i, group in enumerate(groups):
+            if sizes[i] is not None and sizes[i] + 4 + cost <= limit:  # " OR "
+                group.append(name)
+                sizes[i] += 4 + cost
+                break
+        else:
+            groups.append([name])
+            sizes.append(cost)
+    return groups
+
+
+def group_since_id(monitors: dict, group: list[str]) -> str | None:
+    """A shared call starts from the oldest cursor in the group; a monitor with none means none."""
+    cursors = [monitors[name].get("since_id") for name in group]
+    if not all(cursors):
+        return None
+    return min(cursors, key=int)
+
+
+def plan_poll(config: dict, monitors: dict, args) -> dict:
+    plan = new_plan("x_monitor.py poll")
+    limit = query_limit(config)
+    for i, group in enumerate(pack_monitors(monitors, limit)):
+        query = combined_query([monitors[name]["query"] for name in group])
+        params = {
+            "query": query,
+            "max_results": 100,
+            **fields_for("monitor"),
+            "user_auth": True,
+        }
+        since_id = group_since_id(monitors, group)
+        note = f"{', '.join(group)} ({len(query)}/{limit} chars)"
+        if since_id:
+            params["since_id"] = since_id
+        else:
+            note += ", backfilling the last 7 days"
+        step = plan_step(plan, f"search{i}", "GET /2/tweets/search/recent", calls=0,
+                         expected=min(expected_pages("monitor.search", 1), args.max_pages),
+                         max_calls=args.max_pages, note=note, params=params)
+        step["monitors"] = group
+    return plan
+
+
+# === Commands ===
+
+def print_hit(t: TweetRecord, label: str | None = None):
+    text = t.text.replace("\n", " ")
+    if len(text) > 140:
+        text = text[:137] + "..."
+    print(f"  @{t.author_username or 'unknown'} · {time_ago(t.created_ts)}: {text}")
+    if label:
+        print(f"    ({label})")
+    print(f"    https://x.com/{t.author_username or 'i'}/status/{t.id}")
+
+
+def cmd_add(args):
+    config = load_config()
+    if not config:
+        return
+    monitors = load_monitors()
+    if args.name in monitors:
+        print(f"Error: monitor '{args.name}' already exists — remove it first to change its query.")
+        return
+    try:
+        compile_query(args.query)
+        shared = True
+    except Unsupported as e:
+        shared = False
+        reason = str(e)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    if len(args.query) > query_limit(config):
+        print(f"Error: query is {len(args.query)} chars; the search limit is {query_limit(config)}.")
+        return
+    monitors[args.name] = {"query": args.query, "since_id": None, "hits": [], "added_at": now_epoch()}
+    save_monitors(monitors)
+    groups = pack_monitors(monitors, query_limit(config))
+    print(f"Added monitor '{args.name}': {args.query}")
+    if not shared:
+        print(f"  Note: '{reason}' can't be matched locally, so this monitor gets its own search call.")
+    print(f"  {len(monitors)} monitor(s) now poll in {len(groups)} search call(s).")
+    emit("monitor", name=args.name, query=args.query, shared=shared, calls_per_poll=len(groups))
+
+
+def cmd_remove(args):
+    monitors = load_monitors()
+    if monitors.pop(args.name, None) is None:
+        print(f"Error: no monitor named '{args.name}'.")
+        return
+    save_monitors(monitors)
+    print(f"Removed monitor '{args.name}'.")
+    emit("monitor_removed", name=args.name)
+
+
+def cmd_list(args):
+    config = load_config()
+    if not config:
+        return
+    monitors = load_monitors()
+    if not monitors:
+        print("No monitors yet. Add one: x_monitor.py add NAME \"QUERY\"")
+        return
+    groups = pack_monitors(monitors, query_limit(config))
+    print(f"Monitors ({len(monitors)}, {len(groups)} search call(s) per poll)")
+    print("=" * 50)
+    for i, group in enumerate(groups, 1):
+        for name in group:
+            m = monitors[name]
+            cursor = f"since {m['since_id']}" if m.get("since_id") else "not polled yet"
+            print(f"  [{i}] {name}: {m['query']}  ({len(m.get('hits', []))} hits, {cursor})")
+            emit("monitor", name=name, query=m["query"], call=i, hits=len(m.get("hits", [])),
+                 since_id=m.get("since_id"))
+
+
+def show_hits(monitors: dict, names: list[str], max_hits: int, reason: str | None = None):
+    """Print stored hits per monitor from the local store ($0)."""
+    if reason:
+        print_offline_header(reason)
+    store = load_record_store(RECORD_STORES["monitor"])
+    users = load_users()
+    for name in names:
+        hits = [store[i] for i in monitors[name].get("hits", []) if i in store][:max_hits]
+        join_authors(hits, users)
+        print(f"{name} — {monitors[name]['query']} ({len(hits)} stored)")
+        for t in hits:
+            print_hit(t, label=staleness_label(t))
+            emit("hit", t, monitor=name, label=staleness_label(t))
+        print()
+    print("---\n(Served from local store — 0 API calls)")
+    print(f"Today's spend: ${today_usage().get('est_cost', 0):.3f}")
+    emit_summary(source="local")
+
+
+def cmd_show(args):
+    monitors = load_monitors()
+    if args.name not in monitors:
+        print(f"Error: no monitor named '{args.name}'.")
+        return
+    show_hits(monitors, [args.name], args.max)
+
+
+def cmd_poll(args):
+    config = load_config()
+    if not config:
+        return
+    monitors = load_monitors()
+    if not monitors:
+        print("No monitors yet. Add one: x_monitor.py add NAME \"QUERY\"")
+        return
+
+    force = args.force or args.no_budget
+    suppress = args.no_budget
+    plan = plan_poll(config, monitors, args)
+
+    if args.dry_run:
+        print_plan(plan)
+        print(f"  {len(monitors)} monitors in {len(plan['steps'])} search call(s) "
+              f"instead of {len(monitors)}")
+        budget_warning(config, suppress=suppress)
+        return
+
+    if args.offline:
+        show_hits(monitors, list(monitors), args.max, "--offline")
+        return
+
+    if not check_budget(config, force, plan_cost(plan)):
+        show_hits(monitors, list(monitors), args.max, budget_refusal())
+        return
+
+    client = get_client(config)
+    store = load_record_store(RECORD_STORES["monitor"])
+    users = load_users()
+    matchers = {name: compile_query(m["query"]) if matchable(m["query"]) else None
+                for name, m in monitors.items()}
+    new_hits = {name: [] for name in monitors}
+    api_calls = 0
+    truncated = []
+    cut_short = []
+
+    for step in plan["steps"]:
+        group = step["monitors"]
+        params = dict(step["params"])
+        newest_id = None
+        pages = 0
+        results = {}
+        try:
+            while pages < args.max_pages:
+                resp = client.search_recent_tweets(**params)
+                pages += 1
+                remember_users(users, resp)
+                newest_id = newest_id or resp.meta.get("newest_id")
+                results.update((str(t.id), t) for t in resp.data or [])
+                next_token = resp.meta.get("next_token")
+                if not next_token:
+                    break
+                params["next_token"] = next_token
+            else:
+                truncated.append(", ".join(group))
+        except DeadlineExceeded as e:
+            # Keep the pages we got but leave the cursors alone, so the next run
+            # fetches again from where these monitors last finished
+            handle_api_error(e)
+            newest_id = None
+            if pages:
+                cut_short.append(", ".join(group))
+        except API_ERRORS as e:
+            handle_api_error(e)
+            api_calls += pages
+            if offline_reason(e) is None:
+                break
+            continue
+        finally:
+            record_pages("monitor.search", pages)
+        api_calls += pages
+
+        # Demultiplex: each result goes to every monitor in the group it matches and is
+        # newer than that monitor's own cursor
+        for t in results.values():
+            record = tweet_to_record(t, users, "monitor")
+            if getattr(t, "lang", None):
+                record["lang"] = t.lang
+            record = merge_record(store, record, "monitor")
+            doc = tweet_doc(record) if len(group) > 1 else None
+            for name in group:
+                since_id = monitors[name].get("since_id")
+                if since_id and int(record.id) <= int(since_id):
+                    continue
+                if doc is None or matchers[name] is None or matchers[name](doc):
+                    new_hits[name].append(record)
+        if newest_id:
+            for name in group:
+                since_id = monitors[name].get("since_id")
+                if not since_id or int(newest_id) > int(since_id):
+                    monitors[name]["since_id"] = newest_id
+
+    if api_calls:
+        track_usage(tweet_reads=api_calls)
+    budget_warning(config, suppress=suppress)
+
+    for name, hits in new_hits.items():
+        ids = [t.id for t in hits]
+        monitors[name]["hits"] = (ids + [i for i in monitors[name].get("hits", []) if i not in set(ids)])[:HIT_LIMIT]
+    save_record_store(RECORD_STORES["monitor"], store)
+    save_users(users)
+    save_monitors(monitors)
+
+    total = 0
+    print(f"Monitors ({len(monitors)}, {len(plan['steps'])} search call(s))")
+    print("=" * 50)
+    for name, hits in new_hits.items():
+        print(f"{name} — {monitors[name]['query']}: {len(hits)} new")
+        for t in hits[:args.max]:
+            print_hit(t)
+        if len(hits) > args.max:
+            print(f"  … {len(hits) - args.max} more (x_monitor.py show {name})")
+        for t in hits:
+            emit("hit", t, monitor=name)
+        total += len(hits)
+        print()
+    for group in truncated:
+        print(f"[!] More results than --max-pages {args.max_pages} for {group}; older matches were skipped.")
+    for group in cut_short:
+        print(f"[!] Deadline reached mid-search for {group}; the next run fetches the rest.")
+
+    cost = api_calls * CALL_COSTS["tweet"]
+    separate = len(monitors) * CALL_COSTS["tweet"]
+    print("---")
+    print(f"Summary: {total} new hits across {len(monitors)} monitors")
+    calls = f"{api_calls} search call{'s' if api_calls != 1 else ''}; ~${separate:.3f} polled one by one"
+    print(cost_line(cost, calls))
+    print(f"Today's spend: ${today_usage().get('est_cost', 0):.3f}")
+    emit_summary(api_calls, cost, hits=total, monitors=len(monitors))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="X keyword monitors — track keywords and hashtags")
+    parser.add_argument("--force", action="store_true", help="Override daily budget guard")
+    parser.add_argument("--no-budget", action="store_true", help="Skip all budget checks and warnings")
+    parser.add_argument("--offline", action="store_true", help="Serve from local store only, no API calls")
+    parser.add_argument("--dry-run", action="store_true", help="Show estimated cost without making API calls")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add_p = subparsers.add_parser("add", help="Save a monitor")
+    add_p.add_argument("name", help="Monitor name")
+    add_p.add_argument("query", help='Search query, e.g. \'acme OR #acmeapp -is:retweet\'')
+
+    remove_p = subparsers.add_parser("remove", help="Delete a monitor")
+    remove_p.add_argument("name", help="Monitor name")
+
+    subparsers.add_parser("list", help="List monitors and how they share search calls")
+
+    poll_p = subparsers.add_parser("poll", help="Fetch new matches for every monitor")
+    poll_p.add_argument("--max", type=int, default=5, help="Hits shown per monitor (default: 5)")
+    poll_p.add_argument("--max-pages", type=int, default=MAX_PAGES,
+                        help=f"Result pages per search call (default: {MAX_PAGES})")
+
+    show_p = subparsers.add_parser("show", help="Stored hits for one monitor ($0)")
+    show_p.add_argument("name", help="Monitor name")
+    show_p.add_argument("--max", type=int, default=20, help="Max hits (default: 20)")
+
+    add_output_args(parser)
+    add_account_args(parser)
+    add_profile_args(parser)
+    add_cassette_args(parser)
+    add_deadline_args(parser)
+    args = parser.parse_args()
+    setup_output(args)
+    setup_profiling(args)
+    setup_cassette(args)
+    setup_deadline(args)
+    if args.command == "add":
+        cmd_add(args)
+    elif args.command == "remove":
+        cmd_remove(args)
+    elif args.command == "list":
+        cmd_list(args)
+    elif args.command == "poll":
+        cmd_poll(args)
+    elif args.command == "show":
+        cmd_show(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,731 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "tweepy>=4.14.0",
+# ]
+# ///
+"""X (Twitter) query — filter, group and sort the local store. No API calls, $0.
+
+    mentions where type = reply group by author order by count desc limit 10
+    mentions where age < 7d group by hour
+    posts where rate > 5 order by rate desc select id, rate, impressions, text
+    tweets where text ~ "launch" and created >= 2026-10-01 limit 20
+    followers order by date desc limit 14
+
+Sources: tweets, posts (your own tweets), mentions, bookmarks, followers (follower
+history) and usage (daily spend). Clauses after the source may come in any order.
+"""
+
+import argparse
+import bisect
+import heapq
+import marshal
+import re
+import sys
+import time
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from x_common import (
+    add_account_args, add_profile_args, setup_profiling,
+    add_output_args, setup_output, emit, emit_summary,
+    DATA_DIR, USAGE_PATH, RECORD_STORES, load_config, load_record_store, load_json_store, load_users,
+    retention_days, cold_segments, load_cold_records, now_epoch, timed, stat_count,
+)
+
+INDEX_DIR = DATA_DIR / "index"
+INDEX_VERSION = 1
+
+# Columns kept in the per-store index, rows sorted by created time
+INDEX_COLUMNS = (
+    "id", "text", "created", "stored", "author_id", "type", "conversation_id",
+    "likes", "retweets", "replies", "quotes", "bookmarks", "impressions",
+)
+
+NUMERIC_COLUMNS = {"created", "stored", "likes", "retweets", "replies", "quotes", "bookmarks", "impressions"}
+# Fields a comparison literal must be a number for (created/stored/age take dates/durations)
+NUMBER_FIELDS = {
+    "likes", "retweets", "replies", "quotes", "bookmarks", "impressions", "engagement", "rate", "hour",
+    "followers", "following", "posts", "delta", "est_cost", "tweet_reads", "user_reads", "posts_created",
+}
+
+# Computed from index columns when a query mentions them
+DERIVED = {
+    "engagement": ("likes", "retweets", "replies", "quotes"),
+    "rate": ("likes", "retweets", "replies", "quotes", "impressions"),
+    "hour": ("created",), "day": ("created",), "weekday": ("created",), "month": ("created",),
+    "age": ("created",), "author": ("author_id",),
+}
+
+RECORD_SOURCES = {"tweets": "tweets", "posts": "tweets", "mentions": "mentions", "bookmarks": "bookmarks",
+                  "hits": "monitor"}
+HISTORY_SOURCES = {
+    "followers": ("date", "followers", "following", "posts", "delta"),
+    "usage": ("date", "est_cost", "tweet_reads", "user_reads", "posts_created"),
+}
+
+DEFAULT_SELECT = {
+    "tweets": ["id", "created", "likes", "retweets", "replies", "impressions", "rate", "text"],
+    "posts": ["id", "created", "likes", "retweets", "replies", "impressions", "rate", "text"],
+    "mentions": ["id", "created", "author", "type", "likes", "text"],
+    "bookmarks": ["id", "created", "author", "likes", "text"],
+    "hits": ["id", "created", "author", "likes", "text"],
+}
+
+AGGREGATES = ("count", "sum", "avg", "min", "max")
+OPS = ("=", "!=", ">", ">=", "<", "<=", "~")
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+TOKEN_RE = re.compile(r'"[^"]*"|\'[^\']*\'|>=|<=|!=|[=<>~,()]|[^\s=<>~!,()]+')
+
+
+class QueryError(Exception):
+    pass
+
+
+# === Parsing ===
+
+def parse_query(text: str) -> dict:
+    """Parse the query string into {source, where, group, select, order, limit}."""
+    tokens = TOKEN_RE.findall(text)
+    if not tokens:
+        raise QueryError("empty query")
+    q = {"source": tokens[0].lower(), "where": [], "group": None, "select": None,
+         "order": None, "limit": None}
+    if q["source"] not in RECORD_SOURCES and q["source"] not in HISTORY_SOURCES:
+        sources = ", ".join([*RECORD_SOURCES, *HISTORY_SOURCES])
+        raise QueryError(f"unknown source '{tokens[0]}' (expected one of: {sources})")
+
+    pos = 1
+
+    def take(what: str = "", keyword: str | None = None) -> str:
+        nonlocal pos
+        if pos >= len(tokens):
+            expected = f"'{keyword}'" if keyword else what
+            raise QueryError(f"query ends early{f', expected {expected}' if expected else ''}")
+        tok = tokens[pos]
+        pos += 1
+        if keyword and tok.lower() != keyword:
+            raise QueryError(f"expected '{keyword}', got '{tok}'")
+        return tok
+
+    def peek() -> str:
+        return tokens[pos].lower() if pos < len(tokens) else ""
+
+    while pos < len(tokens):
+        keyword = take().lower()
+        if keyword == "where":
+            while True:
+                field, op, value = take("field").lower(), take("operator"), take("value")
+                if op not in OPS:
+                    raise QueryError(f"unknown operator '{op}' (expected one of: {' '.join(OPS)})")
+                value = unquote(value)
+                if op != "~":
+                    coerce(field, value)  # reject a literal the field can't compare with, before any data loads
+                q["where"].append((field, op, value))
+                if peek() != "and":
+                    break
+                take()
+        elif keyword == "group":
+            take(keyword="by")
+            q["group"] = take("field").lower()
+        elif keyword == "order":
+            take(keyword="by")
+            key = take("field").lower()
+            if peek() == "(":
+                take()
+                key = f"{key}({take('field').lower()})"
+                take(keyword=")")
+            desc = False
+            if peek() in ("asc", "desc"):
+                desc = take().lower() == "desc"
+            q["order"] = (key, desc)
+        elif keyword == "select":
+            q["select"] = []
+            while True:
+                item = take("field").lower()
+                if peek() == "(":
+                    take()
+                    item = f"{item}({take('field').lower()})"
+                    take(keyword=")")
+                q["select"].append(item)
+                if peek() != ",":
+                    break
+                take()
+        elif keyword == "limit":
+            value = take("number")
+            if not value.isdigit():
+                raise QueryError(f"limit must be a number, got '{value}'")
+            q["limit"] = int(value)
+        else:
+            raise QueryError(f"unexpected '{keyword}' (expected where, group by, select, order by or limit)")
+    return q
+
+
+def unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+def coerce(field: str, value: str):
+    """Turn a literal into the type its field compares as."""
+    if field == "age":
+        match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhdw]?)", value)
+        if not match:
+            raise QueryError(f"age needs a duration like 30m, 24h or 7d, got '{value}'")
+        return float(match.group(1)) * DURATION_UNITS[match.group(2) or "s"]
+    if field in ("created", "stored"):
+        try:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            raise QueryError(f"{field} needs a date like 2026-10-01, got '{value}'")
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+    try:
+        return float(value) if "." in value else int(value)
+    except ValueError:
+        if field in NUMBER_FIELDS:
+            raise QueryError(f"{field} needs a number, got '{value}'")
+        return value
+
+
+# === Index ===
+
+def index_dir(name: str) -> Path:
+    return INDEX_DIR / name
+
+
+def record_columns(records) -> dict:
+    """Columns for a list of TweetRecords, sorted by created time."""
+    records = sorted(records, key=lambda r: r.created_ts or 0)
+    return {
+        "id": [r.id for r in records],
+        "text": [r.text for r in records],
+        "created": [r.created_ts or 0 for r in records],
+        "stored": [r.stored_ts or 0 for r in records],
+        "author_id": [r.author_id or "" for r in records],
+        "type": [r.kind or "" for r in records],
+        "conversation_id": [r.conversation_id or "" for r in records],
+        "likes": [r.likes for r in records],
+        "retweets": [r.retweets for r in records],
+        "replies": [r.replies for r in records],
+        "quotes": [r.quotes for r in records],
+        "bookmarks": [r.bookmarks for r in records],
+        "impressions": [r.impressions for r in records],
+    }
+
+
+def build_index(name: str, source: Path) -> dict:
+    """Rebuild the column index for a store, one file per column so a query reads only
+    the columns it touches. Numbers are raw int64 arrays; strings are one NUL-joined
+    UTF-8 blob plus an offsets array, so single rows decode without loading the rest."""
+    stat = source.stat()
+    columns = record_columns(load_record_store(source).values())
+    path = index_dir(name)
+    path.mkdir(parents=True, exist_ok=True)
+    meta = {"version": INDEX_VERSION, "source": [stat.st_mtime_ns, stat.st_size], "count": len(columns["id"])}
+    with timed("save_index"):
+        # Columns first, meta last: a reader that sees matching meta sees complete columns
+        for col, values in columns.items():
+            if col in NUMERIC_COLUMNS:
+                files = {".i64": array("q", values).tobytes()}
+            else:
+                encoded = [v.encode() for v in values]
+                offsets = array("Q", [0])
+                for b in encoded:
+                    offsets.append(offsets[-1] + len(b) + 1)
+                files = {".str": b"\0".join(encoded), ".off": offsets.tobytes()}
+            for suffix, data in files.items():
+                tmp = path / f"{col}{suffix}.tmp"
+                tmp.write_bytes(data)
+                tmp.replace(path / f"{col}{suffix}")
+        (path / "_meta.tmp").write_bytes(marshal.dumps(meta))
+        (path / "_meta.tmp").replace(path / "_meta")
+    return {**meta, "columns": columns}
+
+
+def open_index(name: str) -> tuple[dict, bool]:
+    """(index, rebuilt). The index is rebuilt whenever the store file has changed."""
+    source = RECORD_STORES[name]
+    if not source.exists():
+        return {"count": 0, "columns": {col: [] for col in INDEX_COLUMNS}}, False
+    path = index_dir(name)
+    if (path / "_meta").exists():
+        meta = marshal.loads((path / "_meta").read_bytes())
+        stat = source.stat()
+        if meta.get("version") == INDEX_VERSION and meta.get("source") == [stat.st_mtime_ns, stat.st_size]:
+            return {**meta, "columns": {col: path / col for col in INDEX_COLUMNS}}, False
+    return build_index(name, source), True
+
+
+class StrColumn:
+    """A string column read from the index: rows decode on access."""
+
+    def __init__(self, blob: bytes, offsets: array):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.blob[self.offsets[i]:self.offsets[i + 1] - 1].decode()
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def values(self) -> list:
+        """Every row at once — one split beats a decode per row for full scans."""
+        return self.blob.decode().split("\0") if len(self) else []
+
+    def contains(self, needle: str):
+        """Row number -> whether it contains `needle`, case-insensitively (ASCII folding).
+        Rows are tested as byte slices of one lowered blob, never decoded."""
+        blob, offsets, target = self.blob.lower(), self.offsets, needle.lower().encode()
+        return lambda i: blob.find(target, offsets[i], offsets[i + 1] - 1) != -1
+
+    def index(self, value: str, start: int, stop: int) -> int:
+        """Row holding exactly `value` in [start, stop) — a bytes search, not a Python loop."""
+        needle, offsets = value.encode(), self.offsets
+        end = offsets[stop] if stop < len(offsets) else len(self.blob)
+        pos = self.blob.find(needle, offsets[start], end)
+        while pos != -1:
+            row = bisect.bisect_right(offsets, pos) - 1
+            if offsets[row] == pos and offsets[row + 1] - 1 == pos + len(needle):
+                return row
+            pos = self.blob.find(needle, pos + 1, end)
+        raise ValueError(value)
+
+
+def read_column(path: Path):
+    with timed("load_index"):
+        if path.name in NUMERIC_COLUMNS:
+            raw = path.with_name(path.name + ".i64").read_bytes()
+            col = array("q")
+            col.frombytes(raw)
+        else:
+            raw = path.with_name(path.name + ".str").read_bytes()
+            offsets = array("Q")
+            offsets.frombytes(path.with_name(path.name + ".off").read_bytes())
+            col = StrColumn(raw, offsets)
+        stat_count("bytes_read", len(raw))
+        return col
+
+
+class Table:
+    """Columns of one source, loaded or derived on first use."""
+
+    def __init__(self, count: int, columns: dict, users: dict | None = None):
+        self.count = count
+        self._raw = columns
+        self._cols = {}
+        self._read = {}
+        self._users = users
+
+    def has(self, name: str) -> bool:
+        return name in self._raw or name in self._cols or name in DERIVED
+
+    def __getitem__(self, name: str) -> list:
+        col = self._cols.get(name)
+        if col is None:
+            col = self._load(name)
+            self._cols[name] = col
+        return col
+
+    def column(self, name: str):
+        """The column as read from the index (string columns stay encoded)."""
+        if name in self._cols:
+            return self._cols[name]
+        raw = self._raw.get(name)
+        if not isinstance(raw, Path):
+            return self[name]
+        if name not in self._read:
+            self._read[name] = read_column(raw)
+        return self._read[name]
+
+    def getter(self, name: str):
+        """Row number -> value. Derived fields not already materialized are computed per
+        row, so output-only columns cost just the rows actually shown."""
+        if name in self._raw:
+            return self.column(name).__getitem__
+        if name in self._cols or name not in DERIVED or name in ("day", "month", "weekday"):
+            return self[name].__getitem__
+        if name == "engagement":
+            likes, rts, replies, quotes = self["likes"], self["retweets"], self["replies"], self["quotes"]
+            return lambda i: likes[i] + rts[i] + replies[i] + quotes[i]
+        if name == "rate":
+            engagement, impressions = self.getter("engagement"), self["impressions"]
+            return lambda i: round(engagement(i) / impressions[i] * 100, 2) if impressions[i] else 0.0
+        if name == "hour":
+            created = self["created"]
+            return lambda i: created[i] // 3600 % 24
+        if name == "age":
+            created, now = self["created"], now_epoch()
+            return lambda i: now - created[i]
+        users, author_ids = self._users or {}, self["author_id"]
+        return lambda i: users.get(author_ids[i], {}).get("username", author_ids[i])
+
+    def _load(self, name: str) -> list:
+        raw = self._raw.get(name)
+        if raw is not None:
+            if not isinstance(raw, Path):
+                return raw
+            col = self._read.pop(name, None) or read_column(raw)
+            return col.values() if isinstance(col, StrColumn) else col
+        if name not in DERIVED:
+            raise QueryError(f"unknown field '{name}'")
+        if name == "engagement":
+            return [a + b + c + d for a, b, c, d in zip(self["likes"], self["retweets"], self["replies"], self["quotes"])]
+        if name == "rate":
+            return [round(e / i * 100, 2) if i else 0.0 for e, i in zip(self["engagement"], self["impressions"])]
+        if name == "hour":
+            return [ts // 3600 % 24 for ts in self["created"]]
+        if name == "weekday":
+            # 1970-01-01 was a Thursday
+            return [WEEKDAYS[(ts // 86400 + 3) % 7] for ts in self["created"]]
+        if name in ("day", "month"):
+            days = {}
+            out = []
+            for ts in self["created"]:
+                d = ts // 86400
+                label = days.get(d)
+                if label is None:
+                    label = days[d] = time.strftime("%Y-%m-%d", time.gmtime(d * 86400))
+                out.append(label if name == "day" else label[:7])
+            return out
+        if name == "age":
+            now = now_epoch()
+            return [now - ts for ts in self["created"]]
+        if name == "author":
+            users = self._users or {}
+            return [users.get(a, {}).get("username", a) for a in self["author_id"]]
+        raise QueryError(f"unknown field '{name}'")
+
+
+def history_table(source: str, config: dict) -> Table:
+    if source == "followers":
+        rows = config.get("follower_history", [])
+        columns = {key: [r.get(key, 0) for r in rows] for key in ("date", "followers", "following", "posts")}
+        f = columns["followers"]
+        columns["delta"] = [f[i] - f[i - 1] if i else 0 for i in range(len(f))]
+    else:
+        usage = load_json_store(USAGE_PATH)
+        dates = sorted(usage)
+        columns = {"date": dates}
+        for key in HISTORY_SOURCES["usage"][1:]:
+            columns[key] = [usage[d].get(key, 0) for d in dates]
+    return Table(len(columns["date"]), columns)
+
+
+# === Planning & execution ===
+
+def time_bounds(where: list) -> tuple[list, tuple | None, tuple | None]:
+    """Split out created/age range predicates, which the time-sorted index answers by bisection.
+
+    Returns (remaining predicates, lower bound, upper bound). Bounds are (timestamp, flag)
+    pairs — strict for the lower bound, inclusive for the upper — read by `index_range`.
+    """
+    now = now_epoch()
+    rest, lo, hi = [], None, None
+    for field, op, value in where:
+        if field == "age" and op in ("<", "<=", ">", ">="):
+            # age < D  <=>  created > now - D
+            field, op, value = "created", {"<": ">", "<=": ">=", ">": "<", ">=": "<="}[op], now - coerce("age", value)
+        elif field == "created" and op in ("<", "<=", ">", ">="):
+            value = coerce("created", value)
+        else:
+            rest.append((field, op, value))
+            continue
+        if op in (">", ">="):
+            bound = (value, op == ">")
+            lo = bound if lo is None or bound > lo else lo
+        else:
+            bound = (value, op == "<=")
+            hi = bound if hi is None or bound < hi else hi
+    return rest, lo, hi
+
+
+def index_range(created: list, lo, hi) -> range:
+    start, stop = 0, len(created)
+    if lo is not None:
+        value, strict = lo
+        start = (bisect.bisect_right if strict else bisect.bisect_left)(created, value)
+    if hi is not None:
+        value, inclusive = hi
+        stop = (bisect.bisect_right if inclusive else bisect.bisect_left)(created, value)
+    return range(start, max(start, stop))
+
+
+def filter_rows(table: Table, rows, where: list, users: dict):
+    """Chain one generator per predicate over the candidate row numbers."""
+    for field, op, literal in where:
+        if field == "author" and op in ("=", "!="):
+            # Resolve the handle to ids once and compare author_id, instead of joining every row
+            wanted = {uid for uid, u in users.items() if u.get("username", "").lower() == literal.lower()}
+            col = table["author_id"]
+            rows = (i for i in rows if (col[i] in wanted) == (op == "="))
+            continue
+        if not table.has(field):
+            raise QueryError(f"unknown field '{field}'")
+        if op == "~" and isinstance(table.column(field), StrColumn):
+            test = table.column(field).contains(literal)
+            rows = (i for i in rows if test(i))
+            continue
+        col = table[field]
+        value = literal if op == "~" else coerce(field, literal)
+        if col and isinstance(col[0], str) and not isinstance(value, str):
+            value = literal  # ids, dates: compare as written
+        if op == "~":
+            needle = str(value).lower()
+            rows = (i for i in rows if needle in str(col[i]).lower())
+        elif op == "=":
+            rows = (i for i in rows if col[i] == value)
+        elif op == "!=":
+            rows = (i for i in rows if col[i] != value)
+        elif op == ">":
+            rows = (i for i in rows if col[i] > value)
+        elif op == ">=":
+            rows = (i for i in rows if col[i] >= value)
+        elif op == "<":
+            rows = (i for i in rows if col[i] < value)
+        else:
+            rows = (i for i in rows if col[i] <= value)
+    return rows
+
+
+def split_agg(item: str) -> tuple[str, str | None]:
+    match = re.fullmatch(r"(\w+)\((\w+)\)", item)
+    if match:
+        if match.group(1) not in AGGREGATES:
+            raise QueryError(f"unknown aggregate '{match.group(1)}' (expected one of: {', '.join(AGGREGATES)})")
+        return match.group(1), match.group(2)
+    return item, None
+
+
+def group_rows(table: Table, rows, group: str, select: list) -> list[dict]:
+    key_col = table[group]
+    aggs = [split_agg(item) for item in select if item != group]
+    for fn, field in aggs:
+        if field is None and fn != "count":
+            raise QueryError(f"'{fn}' in a grouped query needs an aggregate, e.g. sum(likes)")
+    value_cols = {field: table[field] for _, field in aggs if field}
+    # Bucket row numbers first, then aggregate each bucket with builtins over map()
+    groups = {}
+    for i in rows:
+        groups.setdefault(key_col[i], []).append(i)
+    reducers = {"sum": sum, "min": min, "max": max}
+    out = []
+    for key, members in groups.items():
+        row = {group: key}
+        for fn, field in aggs:
+            if fn == "count":
+                row["count"] = len(members)
+                continue
+            values = map(value_cols[field].__getitem__, members)
+            if fn == "avg":
+                row[f"avg({field})"] = round(sum(values) / len(members), 2)
+            else:
+                row[f"{fn}({field})"] = reducers[fn](values)
+        out.append(row)
+    return out
+
+
+def run_query(q: dict, config: dict, explain: list):
+    """Yield result rows (dicts) for a parsed query, streaming where the query allows."""
+    source = q["source"]
+    users = load_users() if source in RECORD_SOURCES else {}
+    where = list(q["where"])
+    lo = hi = None
+
+    if source in HISTORY_SOURCES:
+        table = history_table(source, config)
+        rows = range(table.count)
+        default_select = list(HISTORY_SOURCES[source])
+    else:
+        name = RECORD_SOURCES[source]
+        index, rebuilt = open_index(name)
+        explain.append(f"index: {name} ({index['count']:,} hot records{', rebuilt' if rebuilt else ''})")
+        columns = index["columns"]
+        count = index["count"]
+        where, lo, hi = time_bounds(where)
+
+        # Reach into cold segments only when the range goes past the hot window
+        days = retention_days(config, name)
+        if days and cold_segments(name):
+            since = lo[0] if lo else None
+            if since is None or since < now_epoch() - days * 86400:
+                cold = load_cold_records(name, int(since) if since is not None else None)
+                if cold:
+                    hot = {col: read_column(v) if isinstance(v, Path) else v for col, v in columns.items()}
+                    merged = record_columns(cold.values())
+                    columns = {col: merged[col] + list(hot[col]) for col in INDEX_COLUMNS}
+                    count = len(columns["id"])
+                    explain.append(f"cold: {len(cold):,} archived records")
+
+        table = Table(count, columns, users)
+        rows = index_range(table["created"], lo, hi)
+        if lo or hi:
+            explain.append(f"time range: rows {rows.start:,}-{rows.stop:,} of {count:,} by bisection")
+        for pred in where:
+            if pred[0] == "id" and pred[1] == "=":
+                # Exact id: one C-level search of the id column instead of a Python scan
+                where.remove(pred)
+                try:
+                    pos = table.column("id").index(pred[2], rows.start, rows.stop)
+                    rows = range(pos, pos + 1)
+                except ValueError:
+                    rows = range(0)
+                explain.append(f"id lookup: {pred[2]}")
+                break
+        if source == "posts":
+            own = str(config.get("user_id", ""))
+            author_ids = table["author_id"]
+            rows = (i for i in rows if author_ids[i] in ("", own))
+        default_select = DEFAULT_SELECT[source]
+        if not q["order"] and not q["group"]:
+            # Newest first unless asked otherwise
+            rows = reversed(rows) if isinstance(rows, range) else reversed(list(rows))
+
+    if where:
+        explain.append("scan: " + " and ".join(f"{f} {op} {v}" for f, op, v in where))
+    rows = filter_rows(table, rows, where, users)
+
+    if q["group"]:
+        select = q["select"] or [q["group"], "count"]
+        if not table.has(q["group"]):
+            raise QueryError(f"unknown field '{q['group']}'")
+        result = group_rows(table, rows, q["group"], select)
+        order = q["order"] or ("count", True)
+        if result and order[0] not in result[0]:
+            raise QueryError(f"can't order by '{order[0]}' — select it or order by one of: {', '.join(result[0])}")
+        result.sort(key=lambda r: (r[order[0]] is None, r[order[0]]), reverse=order[1])
+        yield from result[:q["limit"]] if q["limit"] else result
+        return
+
+    select = q["select"] or default_select
+    for item in select:
+        if split_agg(item)[1] or item == "count":
+            raise QueryError(f"'{item}' needs a group by")
+        if not table.has(item):
+            raise QueryError(f"unknown field '{item}'")
+    getters = [(item, table.getter(item)) for item in select]
+
+    if q["order"]:
+        key, desc = q["order"]
+        if not table.has(key):
+            raise QueryError(f"unknown field '{key}'")
+        key_of = table.getter(key)
+        rows = list(rows)
+        if q["limit"]:
+            pick = heapq.nlargest if desc else heapq.nsmallest
+            rows = pick(q["limit"], rows, key=key_of)
+        else:
+            rows.sort(key=key_of, reverse=desc)
+
+    for n, i in enumerate(rows):
+        if q["limit"] and n >= q["limit"]:
+            break
+        yield {item: get(i) for item, get in getters}
+
+
+# === Output ===
+
+def display(field: str, value) -> str:
+    if field in ("created", "stored"):
+        return time.strftime("%Y-%m-%d %H:%M", time.gmtime(value)) if value else "-"
+    if field == "rate" or field.endswith("(rate)"):
+        return f"{value:.1f}%"
+    if field == "age":
+        return f"{value / 86400:.1f}d"
+    if field == "text":
+        text = " ".join(str(value).split())
+        return text[:77] + "..." if len(text) > 80 else text
+    if isinstance(value, float):
+        return f"{value:,.3f}".rstrip("0").rstrip(".")
+    if isinstance(value, int) and field not in ("hour", "date"):
+        return f"{value:,}"
+    return str(value)
+
+
+def json_value(field: str, value):
+    if field in ("created", "stored") and value:
+        return datetime.fromtimestamp(value, timezone.utc).isoformat()
+    return value
+
+
+def width(field: str) -> int:
+    if field in ("id", "conversation_id", "author_id"):
+        return 19
+    if field in ("created", "stored"):
+        return 16
+    if field in ("author", "date", "day"):
+        return 15
+    return max(len(field), 8)
+
+
+def cmd_query(args):
+    config = load_config()
+    if not config:
+        return
+
+    try:
+        q = parse_query(" ".join(args.query))
+    except QueryError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    explain = []
+    start = time.perf_counter()
+    n = 0
+    header = None
+    try:
+        with timed("query"):
+            for row in run_query(q, config, explain):
+                if header is None:
+                    header = list(row)
+                    if args.explain:
+                        for line in explain:
+                            print(f"[plan] {line}")
+                    print("  ".join(f if f == "text" else f.ljust(width(f)) for f in header))
+                    print("-" * min(sum(width(f) + 2 for f in header), 120))
+                print("  ".join(display(f, v) if f == "text" else display(f, v).ljust(width(f))
+                                for f, v in row.items()))
+                emit("row", {f: json_value(f, v) for f, v in row.items()})
+                n += 1
+    except QueryError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    elapsed = (time.perf_counter() - start) * 1000
+    if header is None:
+        if args.explain:
+            for line in explain:
+                print(f"[plan] {line}")
+        print("No matching records.")
+    print(f"---\n{n} row{'s' if n != 1 else ''} in {elapsed:.0f} ms (local store — 0 API calls)")
+    emit_summary(source="local", rows=n, elapsed_ms=round(elapsed, 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="X query — filter, group and sort the local store ($0)",
+        epilog="Example: x_query.py mentions where type = reply group by author order by count desc limit 10",
+    )
+    parser.add_argument("query", nargs="+", help="Query, e.g. \"posts where rate > 5 order by rate desc\"")
+    parser.add_argument("--explain", action="store_true", help="Show how the query uses the index")
+    add_output_args(parser)
+    add_account_args(parser)
+    add_profile_args(parser)
+    args = parser.parse_args()
+    setup_output(args)
+    setup_profiling(args)
+    cmd_query(args)
+
+
+if __name__ == "__main__":
+    main()
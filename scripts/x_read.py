@@ -8,37 +8,28 @@
 """X (Twitter) read — fetch any tweet or thread by URL or ID."""
 
 import argparse
-import json
 import re
 import sys
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from pathlib import Path
 
-import tweepy
-
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 from x_common import (
-    DATA_DIR, load_config, save_config, get_client,
-    track_usage, budget_warning, check_budget,
-    format_time, time_ago, format_number, handle_api_error,
+    TweetRecord, load_record_store, save_record_store, now_epoch,
+    tweet_to_record, load_users, save_users, remember_users, join_authors, cold_record,
+    fields_for, merge_record, RECORD_STORES, load_graph, save_graph, replied_to, thread_nodes,
+    add_account_args, add_profile_args, setup_profiling, add_cassette_args, setup_cassette,
+    add_deadline_args, setup_deadline,
+    add_output_args, setup_output, emit, emit_summary,
+    DATA_DIR, API_ERRORS, load_config, get_client,
+    track_usage, budget_warning, check_budget, CALL_COSTS, budget_refusal,
+    offline_reason, staleness_label, print_offline_header,
+    new_plan, plan_step, plan_hit, plan_served, get_step, print_plan, plan_cost,
+    time_ago, format_number, handle_api_error, cost_line,
 )
 
 TWEETS_PATH = DATA_DIR / "tweets.json"
 
-TWEET_FIELDS = [
-    "created_at", "public_metrics", "text", "conversation_id",
-    "in_reply_to_user_id", "referenced_tweets", "author_id",
-    "note_tweet",
-]
-
-USER_FIELDS = ["username", "name", "public_metrics"]
-
-EXPANSIONS = [
-    "author_id",
-    "referenced_tweets.id",
-    "referenced_tweets.id.author_id",
-]
-
 
 def parse_tweet_id(url_or_id: str) -> str | None:
     """Extract tweet ID from URL or bare ID."""
@@ -53,48 +44,33 @@ def parse_tweet_id(url_or_id: str) -> str | None:
 
 
 def load_store() -> dict:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    if TWEETS_PATH.exists():
-        return json.loads(TWEETS_PATH.read_text())
-    return {}
+    return load_record_store(TWEETS_PATH)
 
 
 def save_store(store: dict):
-    TWEETS_PATH.write_text(json.dumps(store, indent=2))
+    save_record_store(TWEETS_PATH, store)
 
 
-def format_tweet_display(tweet_data: dict, authors: dict, indent: str = "") -> str:
+def format_tweet_display(tweet_data: TweetRecord, authors: dict, indent: str = "") -> str:
     """Format a tweet for display with author info."""
-    author_id = tweet_data.get("author_id", "")
-    author = authors.get(author_id, {})
-    handle = author.get("username", "unknown")
-    created = tweet_data.get("created_at", "")
+    author = authors.get(tweet_data.author_id or "", {})
+    handle = author.get("username") or tweet_data.author_username or "unknown"
 
     lines = []
     # Header
     date_str = ""
-    if created:
-        try:
-            dt = datetime.fromisoformat(created.replace("Z", "+00:00"))
-            date_str = dt.strftime("%b %d, %Y")
-        except (ValueError, TypeError):
-            date_str = created
+    if tweet_data.created_ts is not None:
+        date_str = datetime.fromtimestamp(tweet_data.created_ts, timezone.utc).strftime("%b %d, %Y")
     lines.append(f"{indent}@{handle} · {date_str}")
 
     # Text — use note_tweet for long-form posts (>280 chars)
-    note = tweet_data.get("note_tweet", {})
-    text = note.get("text", "") if note else ""
-    if not text:
-        text = tweet_data.get("text", "")
+    text = tweet_data.note_text or tweet_data.text
     for text_line in text.split("\n"):
         lines.append(f"{indent}{text_line}")
 
     # Metrics
-    pm = tweet_data.get("metrics", {})
-    likes = pm.get("like_count", 0)
-    retweets = pm.get("retweet_count", 0)
-    replies = pm.get("reply_count", 0)
-    impressions = pm.get("impression_count", 0)
+    t = tweet_data
+    likes, retweets, replies, impressions = t.likes, t.retweets, t.replies, t.impressions
 
     metrics_parts = []
     if likes:
@@ -109,12 +85,189 @@ def format_tweet_display(tweet_data: dict, authors: dict, indent: str = "") -> s
         lines.append(f"{indent}{'  '.join(metrics_parts)}")
 
     # URL
-    tweet_id = tweet_data.get("id", "")
-    lines.append(f"{indent}https://x.com/{handle}/status/{tweet_id}")
+    lines.append(f"{indent}https://x.com/{handle}/status/{tweet_data.id}")
 
     return "\n".join(lines)
 
 
+def local_lookup(store: dict, graph: dict):
+    """id -> stored record from any record store, hot or archived; each store loads once."""
+    stores = {"tweets": store}
+
+    def lookup(tweet_id: str) -> TweetRecord | None:
+        if tweet_id in store:
+            return store[tweet_id]
+        # Unindexed tweets (stored without thread fields) can still be a mention
+        name = graph["located"].get(tweet_id, "mentions")
+        if name not in stores:
+            stores[name] = load_record_store(RECORD_STORES[name])
+        return stores[name].get(tweet_id) or cold_record(name, tweet_id)
+
+    return lookup
+
+
+def thread_tree(found: dict, missing: dict) -> list[tuple[int, str]]:
+    """(depth, id) in reading order: replies under their parent, oldest first.
+
+    Missing parents appear as their own nodes, with the replies they're missing above.
+    """
+    children = {}
+    roots = []
+    for tid, t in found.items():
+        parent = replied_to(t)
+        if parent:
+            children.setdefault(parent, []).append(tid)
+        else:
+            roots.append(tid)
+    # Every parent that isn't stored is in `missing`, so these cover the orphans
+    roots.extend(missing)
+
+    def ts(tid: str) -> int:
+        if tid in found:
+            return found[tid].created_ts or 0
+        return min((ts(c) for c in children.get(tid, ())), default=0)
+
+    order = []
+    stack = [(0, tid) for tid in sorted(roots, key=ts, reverse=True)]
+    while stack:
+        depth, tid = stack.pop()
+        order.append((depth, tid))
+        stack.extend((depth + 1, c) for c in sorted(children.get(tid, ()), key=ts, reverse=True))
+    return order
+
+
+def serve_read_offline(args, tweet_id: str, store: dict, reason: str):
+    """Render a tweet (or its locally known thread) from the store, no API calls."""
+    print_offline_header(reason)
+    graph = load_graph()
+    lookup = local_lookup(store, graph)
+    # Not just tweets.json: a mention or bookmark is a tweet too
+    tweet_data = lookup(tweet_id)
+    if not tweet_data:
+        print(f"Tweet {tweet_id} is not in the local store.")
+        return
+
+    authors = load_users()
+
+    if args.thread:
+        conv_id = tweet_data.conversation_id or tweet_id
+        found, missing = thread_nodes(graph, tweet_id, conv_id, lookup)
+        join_authors(found.values(), authors)
+        print(f"Thread ({len(found)} posts known locally"
+              + (f", {len(missing)} missing" if missing else "") + ")")
+        print("=" * 50)
+        position = 0
+        for depth, tid in thread_tree(found, missing):
+            indent = "  " * min(depth, 8)
+            t = found.get(tid)
+            if t is None:
+                print(f"{indent}[missing: {tid} — not in the local store]\n")
+                emit("missing", id=tid, depth=depth, root=tid == conv_id)
+                continue
+            position += 1
+            here = "  ◀ this post" if tid == tweet_id else ""
+            print(format_tweet_display(t, authors, indent=indent))
+            print(f"{indent}({staleness_label(t)}){here}\n")
+            emit("tweet", t, position=position, depth=depth, parent_id=replied_to(t),
+                 label=staleness_label(t))
+        # Reply counts say how many replies exist; the ones not stored have no ID to name
+        known = {}
+        for t in found.values():
+            parent = replied_to(t)
+            known[parent] = known.get(parent, 0) + 1
+        unstored = sum(max((t.replies or 0) - known.get(tid, 0), 0) for tid, t in found.items())
+        if missing:
+            parts = []
+            for m, replies in missing.items():
+                what = ["thread root"] if m == conv_id else []
+                if replies:
+                    what.append(f"parent of {replies[0]}" if len(replies) == 1
+                                else f"parent of {len(replies)} stored posts")
+                parts.append(f"{m} ({', '.join(what)})")
+            print(f"Missing locally: {', '.join(parts)}")
+        if unstored:
+            print(f"Not stored: ~{unstored} more repl{'y' if unstored == 1 else 'ies'} (from reply counts)")
+        if missing:
+            print(f"x_read.py {tweet_id} --thread fetches only what's missing (--dry-run shows the calls)")
+        print(f"\n---\n(Served from local store — 0 API calls)")
+        emit_summary(source="local", posts=len(found), missing=list(missing), unstored_replies=unstored)
+        return
+    print(format_tweet_display(tweet_data, authors))
+    print(f"({staleness_label(tweet_data)})")
+    emit("tweet", tweet_data, role="target", label=staleness_label(tweet_data))
+    print(f"\n---\n(Served from local store — 0 API calls)")
+    emit_summary(source="local")
+
+
+def is_complete(tweet_data: TweetRecord | None) -> bool:
+    """A stored tweet can be served without a re-fetch if it has the thread fields."""
+    return tweet_data is not None and tweet_data.referenced is not None and bool(tweet_data.conversation_id)
+
+
+def plan_read(args, tweet_id: str, local: TweetRecord | None, store: dict) -> dict:
+    """`local` is the tweet as found in any local store, hot or archived."""
+    label = f"x_read.py {tweet_id}" + (" --thread" if args.thread else "")
+    plan = new_plan(label)
+    cached = None if args.no_cache else local
+    if is_complete(cached):
+        plan_hit(plan, f"tweet {tweet_id} ({staleness_label(cached)})")
+        if args.thread:
+            plan_thread(plan, cached, store)
+    else:
+        plan_step(plan, "tweet", "GET /2/tweets/:id", note="with parent/quoted tweets expanded",
+                  params=dict(id=tweet_id, **fields_for("read"), user_auth=True))
+        if args.thread:
+            plan_step(plan, "thread", "GET /2/tweets/search/recent or /2/tweets", calls=0, expected=1,
+                      note="search (<7 days) or batch lookup, decided once the tweet is fetched")
+    return plan
+
+
+def plan_thread(plan: dict, tweet_data: TweetRecord, store: dict):
+    """Plan the calls needed to complete a thread, given what the reply graph has stored."""
+    tweet_id = tweet_data.id
+    conv_id = tweet_data.conversation_id or tweet_id
+    author_username = tweet_data.author_username
+    graph = load_graph()
+
+    # Check if tweet is within 7 days (can use search)
+    within_7_days = False
+    if tweet_data.created_ts is not None:
+        within_7_days = now_epoch() - tweet_data.created_ts < 7 * 86400
+
+    if within_7_days and author_username:
+        # Use search for recent threads — one call gets all parts
+        params = dict(query=f"conversation_id:{conv_id} from:{author_username}",
+                      **fields_for("read.thread"), max_results=100)
+        note = f"conversation {conv_id} from @{author_username}"
+        searched = graph["searched"].get(conv_id)
+        if searched and searched["author"] == author_username:
+            # Searched before: the posts up to then are stored, ask only for newer ones
+            params["since_id"] = searched["newest_id"]
+            note += f", only newer than {searched['newest_id']}"
+            plan_hit(plan, f"thread posts up to {searched['newest_id']} (searched {time_ago(searched['at'])})")
+        plan_step(plan, "search", "GET /2/tweets/search/recent", note=note, params=params)
+        # If the original tweet isn't the root, fetch the root too
+        if tweet_id != conv_id:
+            if conv_id in store:
+                plan_hit(plan, f"thread root {conv_id}")
+            else:
+                plan_step(plan, "root", "GET /2/tweets/:id", calls=0, expected=1,
+                          note="thread root, skipped if search returns it",
+                          params=dict(id=conv_id, **fields_for("read.thread"), user_auth=True))
+        return
+
+    # Older thread — whatever the stores have comes free; batch fetch just the missing nodes
+    found, missing = thread_nodes(graph, tweet_id, conv_id, local_lookup(store, graph))
+    if len(found) > 1:
+        plan_hit(plan, f"{len(found) - 1} other post(s) of the conversation")
+    missing_ids = list(missing)
+    # Batch up to 100 IDs per call
+    for batch_start in range(0, len(missing_ids), 100):
+        batch = missing_ids[batch_start:batch_start + 100]
+        plan_step(plan, f"batch{batch_start // 100}", "GET /2/tweets", note=f"{len(batch)} missing ID(s)",
+                  params=dict(ids=batch, **fields_for("read.thread"), user_auth=True))
+
+
 def cmd_read(args):
     config = load_config()
     if not config:
@@ -129,89 +282,98 @@ def cmd_read(args):
         print("Expected: tweet URL (https://x.com/user/status/ID) or bare ID")
         return
 
-    if args.dry_run:
-        cost = "$0.005" if not args.thread else "$0.005-0.010"
-        print(f"[DRY RUN] x_read.py {tweet_id}")
-        if args.thread:
-            print(f"  Would cost: ~{cost} (1-2 tweet reads for thread)")
+    store = load_store()
+    local = store.get(tweet_id)
+    if local is None:
+        # Stored as a mention or bookmark, or archived past the retention window
+        # (its ID says which month to read). Read-only: it stays in the store
+        # it came from, never copied into tweets.json
+        graph = load_graph()
+        if tweet_id in graph["located"]:
+            local = local_lookup(store, graph)(tweet_id)
         else:
-            print(f"  Would cost: ~{cost} (1 tweet read)")
+            local = cold_record("tweets", tweet_id)
+    authors = load_users()
+    if local:
+        join_authors([local], authors)
+    plan = plan_read(args, tweet_id, local, store)
+
+    if args.dry_run:
+        print_plan(plan)
         budget_warning(config, suppress=suppress)
         return
 
-    if not check_budget(config, force):
+    if args.offline:
+        serve_read_offline(args, tweet_id, store, "--offline")
         return
 
-    client = get_client(config)
-    store = load_store()
     api_calls = 0
+    tweet_step = get_step(plan, "tweet")
+    client = None
+    thread = args.thread
 
-    # Fetch the target tweet
-    try:
-        resp = client.get_tweet(
-            id=tweet_id,
-            tweet_fields=TWEET_FIELDS,
-            expansions=EXPANSIONS,
-            user_fields=USER_FIELDS,
-            user_auth=True,
-        )
-        api_calls += 1
-    except tweepy.errors.TweepyException as e:
-        handle_api_error(e)
-        return
+    if not tweet_step:
+        # Served from the local stores
+        tweet_data = local
+    else:
+        if not check_budget(config, force, plan_cost(plan)):
+            serve_read_offline(args, tweet_id, store, budget_refusal())
+            return
 
-    if not resp.data:
-        day_usage = track_usage(tweet_reads=api_calls)
-        budget_warning(config, suppress=suppress)
-        print(f"Tweet {tweet_id} not found.")
-        print(f"\n---\nEst. API cost: ~${api_calls * 0.005:.3f}")
-        print(f"Today's spend: ${day_usage['est_cost']:.3f}")
-        return
+        client = get_client(config)
 
-    tweet = resp.data
-
-    # Build author lookup from includes
-    authors = {}
-    if resp.includes and "users" in resp.includes:
-        for user in resp.includes["users"]:
-            authors[str(user.id)] = {
-                "username": user.username,
-                "name": user.name,
-                "followers": user.public_metrics["followers_count"] if user.public_metrics else 0,
-            }
-
-    # Build referenced tweets lookup from includes
-    ref_tweets = {}
-    if resp.includes and "tweets" in resp.includes:
-        for rt in resp.includes["tweets"]:
-            rt_note = getattr(rt, "note_tweet", None)
-            ref_tweets[str(rt.id)] = {
-                "id": str(rt.id),
-                "text": rt.text,
-                "created_at": rt.created_at.isoformat() if rt.created_at else None,
-                "author_id": str(rt.author_id) if rt.author_id else "",
-                "metrics": dict(rt.public_metrics) if rt.public_metrics else {},
-                **({"note_tweet": rt_note} if rt_note else {}),
-            }
-
-    # Store the tweet
-    note_tweet = getattr(tweet, "note_tweet", None)
-    tweet_data = {
-        "id": str(tweet.id),
-        "text": tweet.text,
-        "created_at": tweet.created_at.isoformat() if tweet.created_at else None,
-        "author_id": str(tweet.author_id) if tweet.author_id else "",
-        "conversation_id": str(tweet.conversation_id) if tweet.conversation_id else None,
-        "metrics": dict(tweet.public_metrics) if tweet.public_metrics else {},
-        **({"note_tweet": note_tweet} if note_tweet else {}),
-        "stored_at": datetime.now(timezone.utc).isoformat(),
-    }
-    store[str(tweet.id)] = tweet_data
-    save_store(store)
+        # Fetch the target tweet
+        try:
+            resp = client.get_tweet(**tweet_step["params"])
+            api_calls += 1
+        except API_ERRORS as e:
+            handle_api_error(e)
+            reason = offline_reason(e)
+            if reason:
+                serve_read_offline(args, tweet_id, store, reason)
+            return
+
+        if not resp.data:
+            day_usage = track_usage(tweet_reads=api_calls)
+            budget_warning(config, suppress=suppress)
+            print(f"Tweet {tweet_id} not found.")
+            print(f"\n---\n{cost_line(api_calls * CALL_COSTS['tweet'])}")
+            print(f"Today's spend: ${day_usage['est_cost']:.3f}")
+            emit("not_found", id=tweet_id)
+            emit_summary(api_calls, api_calls * CALL_COSTS["tweet"])
+            return
+
+        # Build author lookup from includes
+        remember_users(authors, resp)
+
+        # Store the tweet and the referenced (parent/quoted) tweets from includes
+        tweet_data = merge_record(store, tweet_to_record(resp.data, authors, "read"), "read")
+        if resp.includes and "tweets" in resp.includes:
+            for rt in resp.includes["tweets"]:
+                if not is_complete(store.get(str(rt.id))):
+                    merge_record(store, tweet_to_record(rt, authors, "read"), "read")
+        save_store(store)
+        save_users(authors)
+
+        if thread:
+            # Now that the tweet is known, plan the thread calls against the store
+            # and reserve their cost; the tweet's own call is already spent
+            plan["steps"] = [s for s in plan["steps"] if s["name"] != "thread"]
+            plan_thread(plan, tweet_data, store)
+            thread_cost = sum(s["expected"] * CALL_COSTS[s["kind"]] for s in plan["steps"] if s["name"] != "tweet")
+            if thread_cost and not check_budget(config, force, thread_cost):
+                print(f"Thread not fetched: {budget_refusal()}\n")
+                thread = False
+
+    if thread:
+        if client is None and plan["steps"]:
+            if not check_budget(config, force, plan_cost(plan)):
+                serve_read_offline(args, tweet_id, store, budget_refusal())
+                return
+            client = get_client(config)
 
-    if args.thread:
         # Thread mode — fetch all tweets in the conversation
-        thread_tweets = fetch_thread(client, tweet, tweet_data, authors, ref_tweets, store)
+        thread_tweets = fetch_thread(client, plan, tweet_data, authors, store)
         api_calls += thread_tweets["api_calls"]
 
         day_usage = track_usage(tweet_reads=api_calls)
@@ -223,183 +385,137 @@ def cmd_read(args):
             print(format_tweet_display(t, authors))
             if i < len(thread_tweets["tweets"]):
                 print("  |")
-        print(f"\n---\nEst. API cost: ~${api_calls * 0.005:.3f} ({api_calls} tweet reads)")
+            emit("tweet", t, position=i)
+        if api_calls:
+            print(f"\n---\n{cost_line(api_calls * CALL_COSTS['tweet'], f'{api_calls} tweet reads')}")
+        else:
+            print(f"\n---\n(Served from local store — 0 API calls)")
         print(f"Today's spend: ${day_usage['est_cost']:.3f}")
+        plan_served(plan)
+        emit_summary(api_calls, api_calls * CALL_COSTS["tweet"], posts=len(thread_tweets["tweets"]))
     else:
         day_usage = track_usage(tweet_reads=api_calls)
         budget_warning(config, suppress=suppress)
 
         # Single tweet display
         print(format_tweet_display(tweet_data, authors))
-
-        # Show parent if this is a reply (from expansion, no extra cost)
-        if tweet.referenced_tweets:
-            for ref in tweet.referenced_tweets:
-                ref_id = str(ref.id)
-                if ref.type == "replied_to" and ref_id in ref_tweets:
-                    parent = ref_tweets[ref_id]
-                    parent_author = authors.get(parent.get("author_id", ""), {})
-                    parent_handle = parent_author.get("username", "unknown")
-                    parent_text = parent.get("text", "")
-                    if len(parent_text) > 280:
-                        parent_text = parent_text[:277] + "..."
-                    print(f"\n↩️ Replying to @{parent_handle}: {parent_text}")
-                elif ref.type == "quoted" and ref_id in ref_tweets:
-                    quoted = ref_tweets[ref_id]
-                    print(f"\n📎 Quoting:")
-                    print(format_tweet_display(quoted, authors, indent="  "))
-
-        print(f"\n---\nEst. API cost: ~${api_calls * 0.005:.3f} ({api_calls} tweet read)")
+        if not tweet_step:
+            print(f"({staleness_label(tweet_data)})")
+            emit("tweet", tweet_data, role="target", label=staleness_label(tweet_data))
+        else:
+            emit("tweet", tweet_data, role="target")
+
+        # Show parent if this is a reply (from expansion or store, no extra cost)
+        for ref_type, ref_id in tweet_data.referenced or ():
+            if ref_type == "replied_to" and ref_id in store:
+                parent = store[ref_id]
+                parent_author = authors.get(parent.author_id or "", {})
+                parent_handle = parent_author.get("username", "unknown")
+                parent_text = parent.text
+                if len(parent_text) > 280:
+                    parent_text = parent_text[:277] + "..."
+                print(f"\n↩️ Replying to @{parent_handle}: {parent_text}")
+                emit("tweet", parent, role="parent")
+            elif ref_type == "quoted" and ref_id in store:
+                quoted = store[ref_id]
+                print(f"\n📎 Quoting:")
+                print(format_tweet_display(quoted, authors, indent="  "))
+                emit("tweet", quoted, role="quoted")
+
+        if api_calls:
+            print(f"\n---\n{cost_line(api_calls * CALL_COSTS['tweet'], f'{api_calls} tweet read')}")
+        else:
+            print(f"\n---\n(Served from local store — 0 API calls)")
         print(f"Today's spend: ${day_usage['est_cost']:.3f}")
+        plan_served(plan)
+        emit_summary(api_calls, api_calls * CALL_COSTS["tweet"])
 
 
-def fetch_thread(client, tweet, tweet_data, authors, ref_tweets, store) -> dict:
-    """Fetch all tweets in a thread/conversation."""
-    conv_id = str(tweet.conversation_id) if tweet.conversation_id else str(tweet.id)
-    author_id = str(tweet.author_id) if tweet.author_id else ""
-    author_info = authors.get(author_id, {})
-    author_username = author_info.get("username", "")
+def fetch_thread(client, plan: dict, tweet_data: TweetRecord, authors: dict, store: dict) -> dict:
+    """Execute the planned thread calls; cache hits come straight from the store."""
+    tweet_id = tweet_data.id
+    conv_id = tweet_data.conversation_id or tweet_id
 
     extra_calls = 0
-    thread_tweets = [tweet_data]
-
-    # Check if tweet is within 7 days (can use search)
-    tweet_dt = tweet.created_at if tweet.created_at else None
-    within_7_days = False
-    if tweet_dt:
-        within_7_days = (datetime.now(timezone.utc) - tweet_dt).days < 7
-
-    if within_7_days and author_username:
-        # Use search for recent threads — one call gets all parts
+    thread_tweets = {tweet_id: tweet_data}
+    graph = load_graph()
+    searched = None
+
+    search_step = get_step(plan, "search")
+    if search_step:
+        since_id = search_step["params"].get("since_id")
+        if since_id:
+            # What the earlier search returned is stored; take it from the graph
+            found, _ = thread_nodes(graph, tweet_id, conv_id, local_lookup(store, graph))
+            thread_tweets.update((tid, t) for tid, t in found.items() if t.author_id == tweet_data.author_id)
         try:
-            query = f"conversation_id:{conv_id} from:{author_username}"
-            search_resp = client.search_recent_tweets(
-                query=query,
-                tweet_fields=TWEET_FIELDS,
-                expansions=EXPANSIONS,
-                user_fields=USER_FIELDS,
-                max_results=100,
-            )
+            search_resp = client.search_recent_tweets(**search_step["params"])
             extra_calls += 1
 
             # Add authors from search includes
-            if search_resp.includes and "users" in search_resp.includes:
-                for user in search_resp.includes["users"]:
-                    authors[str(user.id)] = {
-                        "username": user.username,
-                        "name": user.name,
-                        "followers": user.public_metrics["followers_count"] if user.public_metrics else 0,
-                    }
+            remember_users(authors, search_resp)
 
+            newest = int(since_id or 0)
             if search_resp.data:
                 for t in search_resp.data:
                     tid = str(t.id)
-                    if tid == str(tweet.id):
+                    newest = max(newest, int(tid))
+                    if tid == tweet_id:
                         continue  # Skip the original tweet
-                    t_data = {
-                        "id": tid,
-                        "text": t.text,
-                        "created_at": t.created_at.isoformat() if t.created_at else None,
-                        "author_id": str(t.author_id) if t.author_id else "",
-                        "conversation_id": str(t.conversation_id) if t.conversation_id else None,
-                        "metrics": dict(t.public_metrics) if t.public_metrics else {},
-                        "stored_at": datetime.now(timezone.utc).isoformat(),
-                    }
-                    store[tid] = t_data
-                    thread_tweets.append(t_data)
-
-        except tweepy.errors.TweepyException as e:
+                    t_data = merge_record(store, tweet_to_record(t, authors, "read.thread"), "read.thread")
+                    thread_tweets[tid] = t_data
+            if newest:
+                searched = {"author": tweet_data.author_username, "newest_id": str(newest), "at": now_epoch()}
+        except API_ERRORS as e:
             handle_api_error(e)
 
-        # If the original tweet isn't the root, fetch the root too
-        if str(tweet.id) != conv_id and conv_id not in {t["id"] for t in thread_tweets}:
+        root_step = get_step(plan, "root")
+        if conv_id in store and conv_id not in thread_tweets:
+            thread_tweets[conv_id] = store[conv_id]
+        elif root_step and conv_id not in thread_tweets:
             try:
-                root_resp = client.get_tweet(
-                    id=conv_id,
-                    tweet_fields=TWEET_FIELDS,
-                    expansions=EXPANSIONS,
-                    user_fields=USER_FIELDS,
-                    user_auth=True,
-                )
+                root_resp = client.get_tweet(**root_step["params"])
                 extra_calls += 1
                 if root_resp.data:
-                    if root_resp.includes and "users" in root_resp.includes:
-                        for user in root_resp.includes["users"]:
-                            authors[str(user.id)] = {
-                                "username": user.username,
-                                "name": user.name,
-                                "followers": user.public_metrics["followers_count"] if user.public_metrics else 0,
-                            }
-                    root_data = {
-                        "id": str(root_resp.data.id),
-                        "text": root_resp.data.text,
-                        "created_at": root_resp.data.created_at.isoformat() if root_resp.data.created_at else None,
-                        "author_id": str(root_resp.data.author_id) if root_resp.data.author_id else "",
-                        "conversation_id": conv_id,
-                        "metrics": dict(root_resp.data.public_metrics) if root_resp.data.public_metrics else {},
-                        "stored_at": datetime.now(timezone.utc).isoformat(),
-                    }
-                    store[conv_id] = root_data
-                    thread_tweets.append(root_data)
-            except tweepy.errors.TweepyException:
+                    remember_users(authors, root_resp)
+                    root_data = merge_record(store, tweet_to_record(root_resp.data, authors, "read.thread"),
+                                             "read.thread")
+                    thread_tweets[conv_id] = root_data
+            except API_ERRORS:
                 pass
     else:
-        # Older thread — follow referenced_tweets chain upward, batch fetch
-        chain_ids = set()
-        # Collect IDs from referenced tweets
-        if tweet.referenced_tweets:
-            for ref in tweet.referenced_tweets:
-                if ref.type == "replied_to":
-                    chain_ids.add(str(ref.id))
-        # Add any referenced tweets we already have
-        for ref_id, ref_data in ref_tweets.items():
-            chain_ids.add(ref_id)
-            if ref_id not in {t["id"] for t in thread_tweets}:
-                thread_tweets.append(ref_data)
-
-        # Batch fetch any chain IDs we don't have yet
-        missing_ids = [cid for cid in chain_ids if cid not in {t["id"] for t in thread_tweets}]
-        if missing_ids:
-            # Batch up to 100 IDs per call
-            for batch_start in range(0, len(missing_ids), 100):
-                batch = missing_ids[batch_start:batch_start + 100]
-                try:
-                    batch_resp = client.get_tweets(
-                        ids=batch,
-                        tweet_fields=TWEET_FIELDS,
-                        expansions=EXPANSIONS,
-                        user_fields=USER_FIELDS,
-                        user_auth=True,
-                    )
-                    extra_calls += 1
-                    if batch_resp.includes and "users" in batch_resp.includes:
-                        for user in batch_resp.includes["users"]:
-                            authors[str(user.id)] = {
-                                "username": user.username,
-                                "name": user.name,
-                                "followers": user.public_metrics["followers_count"] if user.public_metrics else 0,
-                            }
-                    if batch_resp.data:
-                        for t in batch_resp.data:
-                            t_data = {
-                                "id": str(t.id),
-                                "text": t.text,
-                                "created_at": t.created_at.isoformat() if t.created_at else None,
-                                "author_id": str(t.author_id) if t.author_id else "",
-                                "metrics": dict(t.public_metrics) if t.public_metrics else {},
-                                "stored_at": datetime.now(timezone.utc).isoformat(),
-                            }
-                            store[str(t.id)] = t_data
-                            thread_tweets.append(t_data)
-                except tweepy.errors.TweepyException as e:
-                    handle_api_error(e)
+        # Older thread — the stored part of the conversation, then batch-fetch the missing nodes
+        found, _ = thread_nodes(graph, tweet_id, conv_id, local_lookup(store, graph))
+        thread_tweets.update(found)
+        for _, ref_id in tweet_data.referenced or ():
+            if ref_id in store:
+                thread_tweets[ref_id] = store[ref_id]
+        for step in plan["steps"]:
+            if not step["name"].startswith("batch"):
+                continue
+            try:
+                batch_resp = client.get_tweets(**step["params"])
+                extra_calls += 1
+                remember_users(authors, batch_resp)
+                if batch_resp.data:
+                    for t in batch_resp.data:
+                        t_data = merge_record(store, tweet_to_record(t, authors, "read.thread"), "read.thread")
+                        thread_tweets[t_data.id] = t_data
+            except API_ERRORS as e:
+                handle_api_error(e)
 
     save_store(store)
+    save_users(authors)
+    if searched:
+        # Re-read: saving the store just folded the new posts into the graph
+        graph = load_graph()
+        graph["searched"][conv_id] = searched
+        save_graph(graph)
 
     # Sort by created_at ascending for reading order
-    thread_tweets.sort(key=lambda t: t.get("created_at", "") or "")
+    ordered = sorted(thread_tweets.values(), key=lambda t: t.created_ts or 0)
 
-    return {"tweets": thread_tweets, "api_calls": extra_calls}
+    return {"tweets": ordered, "api_calls": extra_calls}
 
 
 def main():
@@ -408,8 +524,19 @@ def main():
     parser.add_argument("--thread", action="store_true", help="Fetch full thread/conversation")
     parser.add_argument("--force", action="store_true", help="Override daily budget guard")
     parser.add_argument("--no-budget", action="store_true", help="Skip all budget checks and warnings")
+    parser.add_argument("--no-cache", action="store_true", help="Re-fetch even if the tweet is stored locally")
+    parser.add_argument("--offline", action="store_true", help="Serve from local store only, no API calls")
     parser.add_argument("--dry-run", action="store_true", help="Show estimated cost without making API calls")
+    add_output_args(parser)
+    add_account_args(parser)
+    add_profile_args(parser)
+    add_cassette_args(parser)
+    add_deadline_args(parser)
     args = parser.parse_args()
+    setup_output(args)
+    setup_profiling(args)
+    setup_cassette(args)
+    setup_deadline(args)
     cmd_read(args)
 
 
@@ -17,9 +17,18 @@ from pathlib import Path
 import tweepy
 
 sys.path.insert(0, str(Path(__file__).resolve().parent))
-from x_common import CONFIG_DIR, CONFIG_PATH, DATA_DIR, USAGE_PATH, VERSION
-
-ENV_PATH = Path.home() / ".openclaw" / ".env"
+from x_common import (
+    add_account_args, add_profile_args, setup_profiling, add_cassette_args, setup_cassette,
+    add_deadline_args, setup_deadline,
+    add_output_args, setup_output, emit,
+    CONFIG_DIR, CONFIG_PATH, USAGE_PATH, VERSION, PROFILE_FIELDS, DEFAULT_PROFILE_TTL,
+    profile_to_dict, load_cached_profile, save_cached_profile, time_ago, get_client,
+    RECORD_STORES, CALL_COSTS, retention_days, compact_store,
+    ACCOUNT, DEFAULT_ACCOUNT, account_dir, list_accounts,
+)
+
+# Named accounts read credentials from .env.<name>
+ENV_PATH = Path.home() / ".openclaw" / (".env" if ACCOUNT == DEFAULT_ACCOUNT else f".env.{ACCOUNT}")
 
 BUDGET_TIERS = {
     "lite": {"daily_budget": 0.03, "desc": "Morning brief only, ~$0.50/mo"},
@@ -51,18 +60,19 @@ def load_env(path: Path) -> dict[str, str]:
 
 def validate_credentials(api_key: str, api_secret: str, access_token: str,
                          access_secret: str, bearer_token: str) -> dict | None:
-    """Validate credentials by calling get_me(). Returns user data or None."""
+    """Validate credentials by calling get_me(). Returns user data or None.
+
+    The profile is written to the shared profile cache so the next
+    `x_user.py me` or briefing doesn't pay for another user read.
+    """
     try:
-        client = tweepy.Client(
-            bearer_token=bearer_token,
-            consumer_key=api_key,
-            consumer_secret=api_secret,
-            access_token=access_token,
-            access_token_secret=access_secret,
-            wait_on_rate_limit=True,
-        )
-        resp = client.get_me(user_fields=["public_metrics", "created_at", "description"])
+        client = get_client({
+            "api_key": api_key, "api_secret": api_secret, "access_token": access_token,
+            "access_secret": access_secret, "bearer_token": bearer_token,
+        })
+        resp = client.get_me(user_fields=PROFILE_FIELDS)
         if resp.data:
+            save_cached_profile(profile_to_dict(resp.data))
             return {
                 "user_id": str(resp.data.id),
                 "username": resp.data.username,
@@ -164,15 +174,45 @@ def cmd_setup(args):
     print(f"  Config: {CONFIG_PATH}")
     print(f"  Tier: {tier} (${budget['daily_budget']}/day cap)")
     print(f"  Handle: @{user['username']}")
+    if ACCOUNT != DEFAULT_ACCOUNT:
+        print(f"  Account: {ACCOUNT} (pass --account {ACCOUNT} to any script)")
 
     # First-run sizing info
     if user["tweets"] > 100:
-        est_cost = (user["tweets"] / 100) * 0.005
+        est_cost = (user["tweets"] / 100) * CALL_COSTS["tweet"]
         print(f"\n  Note: You have {user['tweets']:,} tweets.")
         print(f"  Pulling all would cost ~${est_cost:.2f}.")
         print(f"  The skill pulls incrementally (newest first), so daily use is ~$0.02/day.")
 
 
+def cmd_accounts(args):
+    """List configured accounts with today's spend and local data size."""
+    names = list_accounts()
+    if not names:
+        print("No accounts configured. Run setup first.")
+        return
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    print(f"Accounts ({len(names)})")
+    print("=" * 50)
+    for name in names:
+        root = account_dir(name)
+        config = json.loads((root / "config.json").read_text())
+        usage_path = root / "data" / "usage.json"
+        usage = json.loads(usage_path.read_text()) if usage_path.exists() else {}
+        spend = usage.get(today, {}).get("est_cost", 0.0)
+        data_bytes = sum(f.stat().st_size for f in (root / "data").rglob("*") if f.is_file()) \
+            if (root / "data").exists() else 0
+        marker = " *" if name == ACCOUNT else ""
+        print(f"  {name}{marker}: @{config.get('handle', '?')} — {config.get('tier', '?')} tier, "
+              f"${spend:.3f} / ${config.get('daily_budget', 0.25):.2f} today, "
+              f"{data_bytes / 1e6:.1f} MB local data")
+        emit("account", name=name, handle=config.get("handle"), tier=config.get("tier"),
+             today_spend=round(spend, 4), daily_budget=config.get("daily_budget"), data_bytes=data_bytes,
+             current=name == ACCOUNT)
+    print("---")
+    print("Use --account NAME (or X_ACCOUNT=NAME) with any script; x_briefing.py --all covers every account.")
+
+
 def cmd_spend_report(args):
     """Show weekly spend summary."""
     if not CONFIG_PATH.exists():
@@ -218,8 +258,10 @@ def cmd_spend_report(args):
             pct = (cost / daily_budget * 100) if daily_budget > 0 else 0
             bar = "#" * min(int(pct / 5), 20)
             print(f"  {day}: ${cost:.3f} / ${daily_budget:.2f} ({pct:.0f}%) {bar}")
+            emit("day", date=day, est_cost=cost, tweet_reads=tr, user_reads=ur, posts_created=pc)
         else:
             print(f"  {day}: $0.000 / ${daily_budget:.2f} (0%)")
+            emit("day", date=day, est_cost=0.0, tweet_reads=0, user_reads=0, posts_created=0)
 
     print()
     print(f"Total:     ${total_cost:.3f}")
@@ -232,9 +274,13 @@ def cmd_spend_report(args):
     print(f"Budget mode: {mode}")
 
     # Monthly projection
+    monthly = None
     if day_count > 0:
         monthly = (total_cost / day_count) * 30
         print(f"\nProjected monthly: ~${monthly:.2f}")
+    emit("spend", days=days, total_cost=round(total_cost, 4), daily_budget=daily_budget,
+         budget_mode=mode, tweet_reads=total_tweet_reads, user_reads=total_user_reads,
+         posts_created=total_posts_created, projected_monthly=monthly)
 
 
 def cmd_budget_mode(args):
@@ -254,6 +300,57 @@ def cmd_budget_mode(args):
     print(f"  {BUDGET_MODES[new_mode]}")
 
 
+def cmd_retention(args):
+    """Set how many days of records stay in the hot stores (0 = keep everything hot)."""
+    if not CONFIG_PATH.exists():
+        print(f"No config found. Run setup first.")
+        sys.exit(1)
+
+    config = json.loads(CONFIG_PATH.read_text())
+    if args.retention_days:
+        config["retention_days"] = args.retention_days
+    else:
+        config.pop("retention_days", None)
+    CONFIG_PATH.write_text(json.dumps(config, indent=2))
+
+    if args.retention_days:
+        print(f"Retention: {args.retention_days} days hot, older records archived on --compact")
+    else:
+        print("Retention: off (everything stays in the hot stores)")
+
+
+def cmd_compact(args):
+    """Archive records past the retention window and rewrite the hot stores."""
+    if not CONFIG_PATH.exists():
+        print(f"No config found. Run setup first.")
+        sys.exit(1)
+
+    config = json.loads(CONFIG_PATH.read_text())
+    print("Compacting local stores")
+    print("=" * 45)
+    total_reclaimed = 0
+    for name in RECORD_STORES:
+        days = retention_days(config, name)
+        r = compact_store(name, days)
+        reclaimed = r["bytes_before"] - r["bytes_after"]
+        total_reclaimed += reclaimed
+        window = f"{days}d hot" if days else "no retention"
+        if not r["records_before"] and not r["cold_segments"]:
+            print(f"  {name}: empty")
+            continue
+        print(f"  {name} ({window}): {r['records_before']:,} -> {r['records_after']:,} records"
+              f" ({r['moved']:,} archived)")
+        print(f"    hot file: {r['bytes_before'] / 1e6:.2f} MB -> {r['bytes_after'] / 1e6:.2f} MB"
+              f" ({reclaimed / 1e6:.2f} MB reclaimed)")
+        print(f"    load: {r['load_ms_before']:.1f} ms -> {r['load_ms_after']:.1f} ms")
+        if r["cold_segments"]:
+            print(f"    cold: {r['cold_segments']} monthly segment(s), {r['cold_bytes'] / 1e6:.2f} MB compressed")
+        emit("compact", r, retention_days=days, bytes_reclaimed=reclaimed)
+    print(f"\nReclaimed {total_reclaimed / 1e6:.2f} MB from the hot stores.")
+    if not config.get("retention_days"):
+        print("Tip: set a retention window with --retention-days N to archive old records.")
+
+
 def cmd_check(args):
     """Validate existing credentials."""
     if not CONFIG_PATH.exists():
@@ -267,6 +364,10 @@ def cmd_check(args):
     print(f"Tier: {config.get('tier', '?')} (${config.get('daily_budget', '?')}/day)")
     print(f"Budget mode: {config.get('budget_mode', 'guarded')}")
     print(f"Setup: {config.get('setup_at', '?')}")
+    cached, fresh = load_cached_profile(config)
+    if cached:
+        state = "fresh" if fresh else "expired"
+        print(f"Profile cache: {time_ago(cached['fetched_at'])} ({state}, TTL {config.get('profile_ttl', DEFAULT_PROFILE_TTL)}s)")
     print()
 
     print("Validating credentials...")
@@ -277,8 +378,10 @@ def cmd_check(args):
     )
     if user:
         print(f"Credentials valid. @{user['username']} — {user['followers']:,} followers, {user['tweets']:,} tweets")
+        emit("credentials", valid=True, **user)
     else:
         print("Credentials INVALID. Re-run setup or check your API keys.")
+        emit("credentials", valid=False)
         sys.exit(1)
 
 
@@ -296,6 +399,7 @@ def cmd_show(args):
             redacted[key] = val[:8] + "..." + val[-4:] if len(val) > 12 else "****"
 
     print(json.dumps(redacted, indent=2))
+    emit("config", redacted)
 
 
 def main():
@@ -310,11 +414,27 @@ def main():
     parser.add_argument("--budget-mode", dest="budget_mode",
                         choices=["guarded", "relaxed", "unlimited"],
                         help="Set budget enforcement mode")
+    parser.add_argument("--retention-days", dest="retention_days", type=int,
+                        help="Days of records to keep in the hot stores (0 = all)")
+    parser.add_argument("--compact", action="store_true",
+                        help="Archive records past the retention window and rewrite the hot stores")
+    parser.add_argument("--accounts", action="store_true", help="List configured accounts")
     parser.add_argument("--version", action="store_true", help="Print version")
+    add_output_args(parser)
+    add_account_args(parser)
+    add_profile_args(parser)
+    add_cassette_args(parser)
+    add_deadline_args(parser)
     args = parser.parse_args()
+    setup_output(args)
+    setup_profiling(args)
+    setup_cassette(args)
+    setup_deadline(args)
 
     if args.version:
         print(f"x-twitter v{VERSION}")
+    elif args.accounts:
+        cmd_accounts(args)
     elif args.spend_report:
         cmd_spend_report(args)
     elif args.budget_mode:
@@ -322,6 +442,10 @@ def main():
         class ModeArgs:
             mode = args.budget_mode
         cmd_budget_mode(ModeArgs())
+    elif args.retention_days is not None:
+        cmd_retention(args)
+    elif args.compact:
+        cmd_compact(args)
     elif args.check:
         cmd_check(args)
     elif args.show:
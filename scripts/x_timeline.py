@@ -8,82 +8,115 @@
 """X (Twitter) timeline — your posts, engagement metrics, and accountability checks."""
 
 import argparse
-import json
+import heapq
 import sys
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
-import tweepy
-
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 from x_common import (
-    DATA_DIR, load_config, save_config, get_client,
-    track_usage, budget_warning, check_budget,
-    format_time, time_ago, handle_api_error,
+    TweetRecord, load_record_store, save_record_store, to_epoch, epoch_to_iso, now_epoch,
+    with_cold, fields_for, merge_record,
+    add_account_args, add_profile_args, setup_profiling, add_cassette_args, setup_cassette,
+    add_deadline_args, setup_deadline,
+    add_output_args, setup_output, emit, emit_summary,
+    DATA_DIR, API_ERRORS, load_config, save_config, get_client,
+    track_usage, today_usage, budget_warning, check_budget, CALL_COSTS, budget_refusal,
+    offline_reason, local_records, own_posts, staleness_label, print_offline_header,
+    new_plan, plan_step, get_step, print_plan, plan_cost,
+    format_time, time_ago, handle_api_error, cost_line,
 )
 
 TWEETS_PATH = DATA_DIR / "tweets.json"
 
-TWEET_FIELDS = [
-    "created_at", "public_metrics", "text", "conversation_id",
-    "in_reply_to_user_id", "referenced_tweets",
-]
-
 
 def load_store() -> dict:
     """Load persistent tweet store."""
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    if TWEETS_PATH.exists():
-        return json.loads(TWEETS_PATH.read_text())
-    return {}
+    return load_record_store(TWEETS_PATH)
 
 
 def save_store(store: dict):
-    TWEETS_PATH.write_text(json.dumps(store, indent=2))
+    save_record_store(TWEETS_PATH, store)
 
 
-def format_tweet(tweet_data: dict, index: int, handle: str) -> str:
+def format_tweet(t: TweetRecord, index: int, handle: str) -> str:
     """Format a single tweet for display."""
-    text = tweet_data["text"]
+    text = t.text
     if len(text) > 200:
         text = text[:197] + "..."
 
-    pm = tweet_data.get("metrics", {})
-    impressions = pm.get("impression_count", 0)
-    likes = pm.get("like_count", 0)
-    retweets = pm.get("retweet_count", 0)
-    replies = pm.get("reply_count", 0)
-    quotes = pm.get("quote_count", 0)
-    bookmarks = pm.get("bookmark_count", 0)
-
-    engagement = likes + retweets + replies + quotes
+    impressions = t.impressions
+    engagement = t.engagement
     rate = f"{(engagement / impressions * 100):.1f}%" if impressions > 0 else "N/A"
 
     lines = [f"{index}. {text}"]
-    lines.append(f"   Posted: {format_time(tweet_data['created_at'])} ({time_ago(tweet_data['created_at'])})")
-    lines.append(f"   Impressions: {impressions:,} | Likes: {likes:,} | RTs: {retweets:,} | Replies: {replies:,} | Quotes: {quotes:,} | Bookmarks: {bookmarks:,}")
+    lines.append(f"   Posted: {format_time(t.created_ts)} ({time_ago(t.created_ts)})")
+    lines.append(f"   Impressions: {impressions:,} | Likes: {t.likes:,} | RTs: {t.retweets:,} | Replies: {t.replies:,} | Quotes: {t.quotes:,} | Bookmarks: {t.bookmarks:,}")
     lines.append(f"   Engagement rate: {rate}")
-    lines.append(f"   https://x.com/{handle}/status/{tweet_data['id']}")
+    lines.append(f"   https://x.com/{handle}/status/{t.id}")
     return "\n".join(lines)
 
 
-def store_tweets(tweets, store: dict) -> list[dict]:
-    """Store tweets and return as list of dicts."""
+def store_tweets(tweets, store: dict, command: str) -> list[TweetRecord]:
+    """Store tweets fetched with `command`'s fields and return them as records."""
     results = []
+    stored_ts = now_epoch()
     for tweet in tweets:
-        tid = str(tweet.id)
-        data = {
-            "id": tid,
-            "text": tweet.text,
-            "created_at": tweet.created_at.isoformat() if tweet.created_at else None,
-            "metrics": dict(tweet.public_metrics) if tweet.public_metrics else {},
-            "stored_at": datetime.now(timezone.utc).isoformat(),
-        }
-        store[tid] = data
-        results.append(data)
+        record = TweetRecord(str(tweet.id), tweet.text, to_epoch(tweet.created_at), stored_ts,
+                             metrics=tweet.public_metrics)
+        results.append(merge_record(store, record, command))
     return results
 
 
+def serve_recent_offline(args, store: dict, config: dict, reason: str | None = None) -> bool:
+    """Answer `recent` from the local store. Returns False if there was nothing to show."""
+    handle, own_id = config["handle"], config["user_id"]
+    if reason:
+        print_offline_header(reason)
+    if args.hours:
+        store = with_cold(store, "tweets", config, now_epoch() - args.hours * 3600)
+    stored = local_records(store, hours=args.hours, limit=args.max, own_id=own_id)
+    if not stored:
+        if reason:
+            print("No posts in local store yet.")
+        return False
+    print(f"Your Recent Posts (from local store, {len(stored)} posts)")
+    print("=" * 50)
+    for i, t in enumerate(stored, 1):
+        print(format_tweet(t, i, handle))
+        print(f"   ({staleness_label(t)})")
+        print()
+        emit("tweet", t, label=staleness_label(t))
+    print(f"---\n(Served from local store — 0 API calls)")
+    print(f"Today's spend: ${today_usage().get('est_cost', 0):.3f}")
+    emit_summary(source="local")
+    return True
+
+
+def plan_recent(config: dict, args) -> dict:
+    plan = new_plan("x_timeline.py recent")
+    kwargs = {
+        "id": config["user_id"],
+        "max_results": min(args.max, 100),
+        **fields_for("timeline.recent"),
+        "exclude": ["retweets"],
+        "user_auth": True,
+    }
+    note = f"up to {kwargs['max_results']} posts"
+
+    if args.hours:
+        kwargs["start_time"] = datetime.now(timezone.utc) - timedelta(hours=args.hours)
+        note += f" from the last {args.hours}h"
+
+    since_id = config.get("last_timeline_id")
+    if since_id and not args.hours and not args.no_cache:
+        kwargs["since_id"] = since_id
+        note += f", only newer than {since_id}"
+
+    plan_step(plan, "timeline", "GET /2/users/:id/tweets", note=note, params=kwargs)
+    return plan
+
+
 def cmd_recent(args):
     config = load_config()
     if not config:
@@ -92,42 +125,38 @@ def cmd_recent(args):
     force = args.force or args.no_budget
     suppress = args.no_budget
 
+    handle = config["handle"]
+    plan = plan_recent(config, args)
+
     if args.dry_run:
-        print("[DRY RUN] x_timeline.py recent")
-        print(f"  Would cost: ~$0.005 (1 tweet read)")
+        print_plan(plan)
         print(f"  Cheaper alternative: 'top' reads from local cache for free")
         budget_warning(config, suppress=suppress)
         return
 
-    if not check_budget(config, force):
-        return
-
     store = load_store()
-    client = get_client(config)
-    user_id = config["user_id"]
-    handle = config["handle"]
 
-    kwargs = {
-        "id": user_id,
-        "max_results": min(args.max, 100),
-        "tweet_fields": TWEET_FIELDS,
-        "exclude": ["retweets"],
-        "user_auth": True,
-    }
+    if args.offline:
+        serve_recent_offline(args, store, config, "--offline")
+        return
 
-    if args.hours:
-        kwargs["start_time"] = datetime.now(timezone.utc) - timedelta(hours=args.hours)
+    if not check_budget(config, force, plan_cost(plan)):
+        serve_recent_offline(args, store, config, budget_refusal())
+        return
 
+    client = get_client(config)
+    step = get_step(plan, "timeline")
     since_id = config.get("last_timeline_id")
-    if since_id and not args.hours and not args.no_cache:
-        kwargs["since_id"] = since_id
 
     api_calls = 0
     try:
-        resp = client.get_users_tweets(**kwargs)
+        resp = client.get_users_tweets(**step["params"])
         api_calls = 1
-    except tweepy.errors.TweepyException as e:
+    except API_ERRORS as e:
         handle_api_error(e)
+        reason = offline_reason(e)
+        if reason:
+            serve_recent_offline(args, store, config, reason)
         return
 
     day_usage = track_usage(tweet_reads=api_calls)
@@ -135,32 +164,20 @@ def cmd_recent(args):
 
     if not resp.data:
         # Show from store if available
-        if not args.no_cache and store:
-            stored = sorted(store.values(), key=lambda t: t.get("created_at", ""), reverse=True)
-            if args.hours:
-                cutoff = (datetime.now(timezone.utc) - timedelta(hours=args.hours)).isoformat()
-                stored = [t for t in stored if t.get("created_at", "") >= cutoff]
-            stored = stored[:args.max]
-            if stored:
-                print(f"Your Recent Posts (from local store, {len(stored)} posts)")
-                print("=" * 50)
-                for i, t in enumerate(stored, 1):
-                    print(format_tweet(t, i, handle))
-                    print()
-                print(f"---\n(Served from local store — 0 API calls)")
-                print(f"Today's spend: ${day_usage['est_cost']:.3f}")
-                return
+        if not args.no_cache and serve_recent_offline(args, store, config):
+            return
         print("No new posts found.")
-        print(f"---\nEst. API cost: ~${api_calls * 0.005:.3f} ({api_calls} tweet read)")
+        print(f"---\n{cost_line(api_calls * CALL_COSTS['tweet'], f'{api_calls} tweet read')}")
         print(f"Today's spend: ${day_usage['est_cost']:.3f}")
+        emit_summary(api_calls, api_calls * CALL_COSTS["tweet"], posts=0)
         return
 
-    new_tweets = store_tweets(resp.data, store)
+    new_tweets = store_tweets(resp.data, store, "timeline.recent")
     save_store(store)
 
     # Update since_id
     if new_tweets:
-        max_id = max(t["id"] for t in new_tweets)
+        max_id = max(t.id for t in new_tweets)
         if not since_id or int(max_id) > int(since_id):
             config["last_timeline_id"] = max_id
             save_config(config)
@@ -177,16 +194,17 @@ def cmd_recent(args):
     for i, t in enumerate(new_tweets, 1):
         print(format_tweet(t, i, handle))
         print()
-        pm = t.get("metrics", {})
-        total_impressions += pm.get("impression_count", 0)
-        total_engagement += (pm.get("like_count", 0) + pm.get("retweet_count", 0) +
-                            pm.get("reply_count", 0) + pm.get("quote_count", 0))
+        emit("tweet", t)
+        total_impressions += t.impressions
+        total_engagement += t.engagement
 
     rate = f"{(total_engagement / total_impressions * 100):.1f}%" if total_impressions > 0 else "N/A"
     print(f"---")
     print(f"Summary: {len(new_tweets)} posts | {total_impressions:,} impressions | {total_engagement:,} engagements | {rate} rate")
-    print(f"Est. API cost: ~${api_calls * 0.005:.3f} ({api_calls} tweet read)")
+    print(cost_line(api_calls * CALL_COSTS["tweet"], f"{api_calls} tweet read"))
     print(f"Today's spend: ${day_usage['est_cost']:.3f}")
+    emit_summary(api_calls, api_calls * CALL_COSTS["tweet"], posts=len(new_tweets),
+                 impressions=total_impressions, engagements=total_engagement)
 
 
 def cmd_top(args):
@@ -202,20 +220,17 @@ def cmd_top(args):
         print("No posts in local store yet. Run 'recent' first to fetch posts.")
         return
 
-    tweets = list(store.values())
-
+    # Archived months are read only when --days reaches past the hot window (0 = all time)
     if args.days:
-        cutoff = (datetime.now(timezone.utc) - timedelta(days=args.days)).isoformat()
-        tweets = [t for t in tweets if t.get("created_at", "") >= cutoff]
-
-    # Sort by total engagement
-    def engagement(t):
-        pm = t.get("metrics", {})
-        return (pm.get("like_count", 0) + pm.get("retweet_count", 0) +
-                pm.get("reply_count", 0) + pm.get("quote_count", 0))
+        cutoff = now_epoch() - args.days * 86400
+        tweets = [t for t in with_cold(store, "tweets", config, cutoff).values() if (t.created_ts or 0) >= cutoff]
+    else:
+        tweets = list(with_cold(store, "tweets", config, None).values())
+    # The store also caches other accounts' posts (read, watchlist)
+    tweets = own_posts(tweets, config["user_id"])
 
-    tweets.sort(key=engagement, reverse=True)
-    tweets = tweets[:args.max]
+    # Top N by total engagement
+    tweets = heapq.nlargest(args.max, tweets, key=lambda t: t.engagement)
 
     header = "Top Posts by Engagement"
     if args.days:
@@ -226,9 +241,26 @@ def cmd_top(args):
     for i, t in enumerate(tweets, 1):
         print(format_tweet(t, i, handle))
         print()
+        emit("tweet", t, engagement=t.engagement)
 
     print("---")
     print("(Served from local store — 0 API calls)")
+    emit_summary(source="local")
+
+
+def serve_refresh_offline(args, store: dict, handle: str, reason: str):
+    """Show the last stored metrics for a tweet when it can't be re-fetched."""
+    print_offline_header(reason)
+    data = store.get(args.tweet_id)
+    if not data:
+        print(f"Tweet {args.tweet_id} is not in the local store.")
+        return
+    print(f"Last Known Metrics ({staleness_label(data)})")
+    print("=" * 50)
+    print(format_tweet(data, 1, handle))
+    print(f"\n---\n(Served from local store — 0 API calls)")
+    emit("tweet", data, label=staleness_label(data))
+    emit_summary(source="local")
 
 
 def cmd_refresh(args):
@@ -240,27 +272,35 @@ def cmd_refresh(args):
     force = args.force or args.no_budget
     suppress = args.no_budget
 
+    handle = config["handle"]
+    plan = new_plan(f"x_timeline.py refresh {args.tweet_id}")
+    plan_step(plan, "tweet", "GET /2/tweets/:id", note="fresh metrics (a cached copy would be stale)",
+              params={"id": args.tweet_id, **fields_for("timeline.refresh"), "user_auth": True})
+
     if args.dry_run:
-        print(f"[DRY RUN] x_timeline.py refresh {args.tweet_id}")
-        print(f"  Would cost: ~$0.005 (1 tweet read)")
+        print_plan(plan)
         budget_warning(config, suppress=suppress)
         return
 
-    if not check_budget(config, force):
+    store = load_store()
+
+    if args.offline:
+        serve_refresh_offline(args, store, handle, "--offline")
+        return
+
+    if not check_budget(config, force, plan_cost(plan)):
+        serve_refresh_offline(args, store, handle, budget_refusal())
         return
 
     client = get_client(config)
-    handle = config["handle"]
-    store = load_store()
 
     try:
-        resp = client.get_tweet(
-            id=args.tweet_id,
-            tweet_fields=TWEET_FIELDS,
-            user_auth=True,
-        )
-    except tweepy.errors.TweepyException as e:
+        resp = client.get_tweet(**get_step(plan, "tweet")["params"])
+    except API_ERRORS as e:
         handle_api_error(e)
+        reason = offline_reason(e)
+        if reason:
+            serve_refresh_offline(args, store, handle, reason)
         return
 
     day_usage = track_usage(tweet_reads=1)
@@ -270,22 +310,64 @@ def cmd_refresh(args):
         print(f"Tweet {args.tweet_id} not found.")
         return
 
-    tweet = resp.data
-    data = {
-        "id": str(tweet.id),
-        "text": tweet.text,
-        "created_at": tweet.created_at.isoformat() if tweet.created_at else None,
-        "metrics": dict(tweet.public_metrics) if tweet.public_metrics else {},
-        "stored_at": datetime.now(timezone.utc).isoformat(),
-    }
-    store[str(tweet.id)] = data
+    data = store_tweets([resp.data], store, "timeline.refresh")[0]
     save_store(store)
 
     print("Refreshed Metrics")
     print("=" * 50)
     print(format_tweet(data, 1, handle))
-    print(f"\n---\nEst. API cost: ~$0.005 (1 tweet read)")
+    print(f"\n---\n{cost_line(CALL_COSTS['tweet'], '1 tweet read')}")
     print(f"Today's spend: ${day_usage['est_cost']:.3f}")
+    emit("tweet", data)
+    emit_summary(1, CALL_COSTS["tweet"])
+
+
+def print_activity(tweets: list[TweetRecord], now: datetime):
+    """Activity summary + nudge for the posts of the last 24h."""
+    now_ts = now.timestamp()
+    midnight_ts = now.replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+    posts_24h = len(tweets)
+    posts_1h = sum(1 for t in tweets if t.created_ts > now_ts - 3600)
+    posts_today = sum(1 for t in tweets if t.created_ts >= midnight_ts)
+
+    latest = max(tweets, key=lambda t: t.created_ts)
+    latest_text = latest.text
+    if len(latest_text) > 80:
+        latest_text = latest_text[:77] + "..."
+
+    print("Activity Check")
+    print("=" * 40)
+    print(f"Last post: {time_ago(latest.created_ts)} — \"{latest_text}\"")
+    print(f"Posts today: {posts_today}")
+    print(f"Posts this hour: {posts_1h}")
+    print(f"Posts last 24h: {posts_24h}")
+
+    # Nudge thresholds
+    minutes_since = (now_ts - latest.created_ts) / 60
+    emit("activity", last_post_id=latest.id, last_post_at=epoch_to_iso(latest.created_ts),
+         minutes_since_last_post=int(minutes_since), posts_today=posts_today,
+         posts_last_hour=posts_1h, posts_last_24h=posts_24h)
+    if minutes_since < 10:
+        print(f"\n** You posted {int(minutes_since)} minutes ago. Back to work? **")
+    elif posts_1h >= 3:
+        print(f"\n** {posts_1h} posts in the last hour. That's a lot of X time. **")
+    elif posts_today >= 10:
+        print(f"\n** {posts_today} posts today. Heavy X day. **")
+    else:
+        print(f"\n(Looks manageable.)")
+
+
+def serve_activity_offline(store: dict, own_id: str, reason: str):
+    """Activity check from locally stored posts — only as current as the last fetch."""
+    print_offline_header(reason)
+    tweets = local_records(store, hours=24, own_id=own_id)
+    if not tweets:
+        print("No posts from the last 24 hours in the local store.")
+        return
+    newest_fetch = max(tweets, key=lambda t: t.stored_ts or 0)
+    print_activity(tweets, datetime.now(timezone.utc))
+    print(f"\n---\n(Served from local store, {staleness_label(newest_fetch)} — 0 API calls)")
+    emit_summary(source="local", label=staleness_label(newest_fetch))
 
 
 def cmd_activity(args):
@@ -297,33 +379,43 @@ def cmd_activity(args):
     force = args.force or args.no_budget
     suppress = args.no_budget
 
+    now = datetime.now(timezone.utc)
+    plan = new_plan("x_timeline.py activity")
+    plan_step(plan, "timeline", "GET /2/users/:id/tweets", note="up to 20 posts from the last 24h",
+              params=dict(
+                  id=config["user_id"],
+                  max_results=20,
+                  **fields_for("timeline.activity"),
+                  exclude=["retweets"],
+                  start_time=now - timedelta(hours=24),
+                  user_auth=True,
+              ))
+
     if args.dry_run:
-        print("[DRY RUN] x_timeline.py activity")
-        print(f"  Would cost: ~$0.005 (1 tweet read)")
+        print_plan(plan)
         budget_warning(config, suppress=suppress)
         return
 
-    if not check_budget(config, force):
+    store = load_store()
+
+    if args.offline:
+        serve_activity_offline(store, config["user_id"], "--offline")
+        return
+
+    if not check_budget(config, force, plan_cost(plan)):
+        serve_activity_offline(store, config["user_id"], budget_refusal())
         return
 
     client = get_client(config)
-    user_id = config["user_id"]
-    handle = config["handle"]
-    store = load_store()
 
     # Fetch recent tweets (last few hours)
-    now = datetime.now(timezone.utc)
     try:
-        resp = client.get_users_tweets(
-            id=user_id,
-            max_results=20,
-            tweet_fields=TWEET_FIELDS,
-            exclude=["retweets"],
-            start_time=now - timedelta(hours=24),
-            user_auth=True,
-        )
-    except tweepy.errors.TweepyException as e:
+        resp = client.get_users_tweets(**get_step(plan, "timeline")["params"])
+    except API_ERRORS as e:
         handle_api_error(e)
+        reason = offline_reason(e)
+        if reason:
+            serve_activity_offline(store, config["user_id"], reason)
         return
 
     day_usage = track_usage(tweet_reads=1)
@@ -333,47 +425,22 @@ def cmd_activity(args):
         print("Activity Check")
         print("=" * 40)
         print("No posts in the last 24 hours. You've been quiet.")
-        print(f"\n---\nEst. API cost: ~$0.005 (1 tweet read)")
+        print(f"\n---\n{cost_line(CALL_COSTS['tweet'], '1 tweet read')}")
         print(f"Today's spend: ${day_usage['est_cost']:.3f}")
+        emit("activity", posts_today=0, posts_last_hour=0, posts_last_24h=0)
+        emit_summary(1, CALL_COSTS["tweet"])
         return
 
     # Store them
-    new_tweets = store_tweets(resp.data, store)
+    new_tweets = store_tweets(resp.data, store, "timeline.activity")
     save_store(store)
 
     # Analyze activity
-    posts_24h = len(new_tweets)
-    posts_1h = sum(1 for t in new_tweets
-                   if datetime.fromisoformat(t["created_at"]) > now - timedelta(hours=1))
-    posts_today = sum(1 for t in new_tweets
-                      if datetime.fromisoformat(t["created_at"]).date() == now.date())
-
-    latest = max(new_tweets, key=lambda t: t["created_at"])
-    latest_dt = datetime.fromisoformat(latest["created_at"])
-    latest_text = latest["text"]
-    if len(latest_text) > 80:
-        latest_text = latest_text[:77] + "..."
-
-    print("Activity Check")
-    print("=" * 40)
-    print(f"Last post: {time_ago(latest_dt)} — \"{latest_text}\"")
-    print(f"Posts today: {posts_today}")
-    print(f"Posts this hour: {posts_1h}")
-    print(f"Posts last 24h: {posts_24h}")
-
-    # Nudge thresholds
-    minutes_since = (now - latest_dt).total_seconds() / 60
-    if minutes_since < 10:
-        print(f"\n** You posted {int(minutes_since)} minutes ago. Back to work? **")
-    elif posts_1h >= 3:
-        print(f"\n** {posts_1h} posts in the last hour. That's a lot of X time. **")
-    elif posts_today >= 10:
-        print(f"\n** {posts_today} posts today. Heavy X day. **")
-    else:
-        print(f"\n(Looks manageable.)")
+    print_activity(new_tweets, now)
 
-    print(f"\n---\nEst. API cost: ~$0.005 (1 tweet read)")
+    print(f"\n---\n{cost_line(CALL_COSTS['tweet'], '1 tweet read')}")
     print(f"Today's spend: ${day_usage['est_cost']:.3f}")
+    emit_summary(1, CALL_COSTS["tweet"])
 
 
 def main():
@@ -381,6 +448,7 @@ def main():
     parser.add_argument("--force", action="store_true", help="Override daily budget guard")
     parser.add_argument("--no-budget", action="store_true", help="Skip all budget checks and warnings")
     parser.add_argument("--no-cache", action="store_true", help="Skip local store, always hit API")
+    parser.add_argument("--offline", action="store_true", help="Serve from local store only, no API calls")
     parser.add_argument("--dry-run", action="store_true", help="Show estimated cost without making API calls")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
@@ -397,7 +465,16 @@ def main():
 
     subparsers.add_parser("activity", help="Accountability check — how active are you?")
 
+    add_output_args(parser)
+    add_account_args(parser)
+    add_profile_args(parser)
+    add_cassette_args(parser)
+    add_deadline_args(parser)
     args = parser.parse_args()
+    setup_output(args)
+    setup_profiling(args)
+    setup_cassette(args)
+    setup_deadline(args)
     if args.command == "recent":
         cmd_recent(args)
     elif args.command == "top":
@@ -8,79 +8,52 @@
 """X (Twitter) user profile info and follower tracking."""
 
 import argparse
-import json
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
-import tweepy
-
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 from x_common import (
-    load_config, save_config, get_client,
-    track_usage, budget_warning, check_budget,
-    format_number, handle_api_error,
+    add_account_args, add_profile_args, setup_profiling, add_cassette_args, setup_cassette,
+    add_deadline_args, setup_deadline,
+    add_output_args, setup_output, emit, emit_summary,
+    DATA_DIR, PROFILE_FIELDS, load_config, save_config, get_client,
+    CALL_COSTS, track_usage, budget_warning, check_budget, budget_refusal,
+    profile_to_dict, load_cached_profile, save_cached_profile,
+    refresh_profile_in_background, load_users, save_users, user_row,
+    API_ERRORS, offline_reason, staleness_label, print_offline_header,
+    new_plan, plan_step, plan_hit, plan_served, get_step, print_plan, plan_cost,
+    time_ago, format_number, handle_api_error, cost_line,
 )
 
-USER_FIELDS = [
-    "created_at", "description", "location", "public_metrics",
-    "profile_image_url", "url", "verified", "verified_type",
-]
+USER_FIELDS = PROFILE_FIELDS
 
 
-def cmd_me(args):
-    config = load_config()
-    if not config:
-        return
+def print_profile(u: dict, config: dict, track: bool = False) -> dict:
+    """Print a cached/fetched profile dict. Returns the public metrics."""
+    pm = u.get("public_metrics", {})
 
-    force = args.force or args.no_budget
-    suppress = args.no_budget
-
-    if args.dry_run:
-        print("[DRY RUN] x_user.py me")
-        print(f"  Would cost: ~$0.010 (1 user read)")
-        budget_warning(config, suppress=suppress)
-        return
-
-    if not check_budget(config, force):
-        return
-
-    client = get_client(config)
-    try:
-        resp = client.get_me(user_fields=USER_FIELDS, user_auth=True)
-    except tweepy.errors.TweepyException as e:
-        handle_api_error(e)
-        return
-
-    day_usage = track_usage(user_reads=1)
-    budget_warning(config, suppress=suppress)
-
-    if not resp.data:
-        print("Error: Could not retrieve profile.")
-        return
-
-    u = resp.data
-    pm = u.public_metrics
-
-    print(f"Profile: {u.name} (@{u.username})")
+    print(f"Profile: {u['name']} (@{u['username']})")
     print("=" * 40)
-    if u.description:
-        print(f"Bio: {u.description}")
-    if u.location:
-        print(f"Location: {u.location}")
-    if u.created_at:
-        print(f"Joined: {u.created_at.strftime('%B %Y')}")
-    if u.url:
-        print(f"URL: {u.url}")
+    if u.get("description"):
+        print(f"Bio: {u['description']}")
+    if u.get("location"):
+        print(f"Location: {u['location']}")
+    if u.get("created_at"):
+        joined = datetime.fromisoformat(u["created_at"].replace("Z", "+00:00"))
+        print(f"Joined: {joined.strftime('%B %Y')}")
+    if u.get("url"):
+        print(f"URL: {u['url']}")
     print()
 
-    followers = pm["followers_count"]
-    following = pm["following_count"]
-    tweets = pm["tweet_count"]
-    listed = pm["listed_count"]
+    followers = pm.get("followers_count", 0)
+    following = pm.get("following_count", 0)
+    tweets = pm.get("tweet_count", 0)
+    listed = pm.get("listed_count", 0)
 
     # Follower delta tracking
     delta_str = ""
+    diff = None
     history = config.get("follower_history", [])
     if history:
         last = history[-1]
@@ -95,10 +68,11 @@ def cmd_me(args):
     print(f"Posts:      {format_number(tweets)}")
     print(f"Listed:     {format_number(listed)}")
     print()
-    print(f"https://x.com/{u.username}")
+    print(f"https://x.com/{u['username']}")
+    emit("profile", u, follower_delta=diff, delta_since=history[-1]["date"] if history else None)
 
     # Track follower history if --track
-    if args.track:
+    if track:
         today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
         # Don't duplicate same-day entries
         if not history or history[-1]["date"] != today:
@@ -112,9 +86,102 @@ def cmd_me(args):
             config["follower_history"] = history[-90:]
             save_config(config)
             print("\n(Follower history updated)")
+    return pm
 
-    print(f"\n---\nEst. API cost: ~$0.010 (1 user read)")
+
+def serve_me_offline(cached: dict | None, config: dict, reason: str):
+    """Show the cached profile regardless of age when the API can't be used."""
+    print_offline_header(reason)
+    if not cached:
+        print("No cached profile yet.")
+        return
+    print_profile(cached, config)
+    print(f"\n---\n(Served from profile cache, {staleness_label(cached)} — 0 API calls)")
+    emit_summary(source="local", label=staleness_label(cached))
+
+
+def cmd_me(args):
+    config = load_config()
+    if not config:
+        return
+
+    force = args.force or args.no_budget
+    suppress = args.no_budget
+    stale_ok = args.stale_ok or config.get("profile_swr", False)
+
+    if args.refresh_cache:
+        # Background revalidation spawned by refresh_profile_in_background()
+        try:
+            if check_budget(config, force, CALL_COSTS["user"]):
+                resp = get_client(config).get_me(user_fields=PROFILE_FIELDS, user_auth=True)
+                track_usage(user_reads=1)
+                if resp.data:
+                    save_cached_profile(profile_to_dict(resp.data))
+        except API_ERRORS:
+            pass
+        finally:
+            (DATA_DIR / "profile.refresh.lock").unlink(missing_ok=True)
+        return
+
+    cached, fresh = load_cached_profile(config)
+    use_cache = not args.no_cache and cached is not None and (fresh or stale_ok)
+
+    plan = new_plan("x_user.py me")
+    if use_cache:
+        plan_hit(plan, f"profile (cached {time_ago(cached['fetched_at'])})")
+    else:
+        plan_step(plan, "profile", "GET /2/users/me", kind="user",
+                  params={"user_fields": PROFILE_FIELDS, "user_auth": True})
+
+    if args.dry_run:
+        print_plan(plan)
+        budget_warning(config, suppress=suppress)
+        return
+
+    if use_cache:
+        print_profile(cached, config, track=args.track)
+        note = f"cached {time_ago(cached['fetched_at'])}"
+        if not fresh:
+            note += ", stale"
+            if refresh_profile_in_background():
+                note += " — refreshing in background"
+        print(f"\n---\n(Served from profile cache, {note} — 0 API calls)")
+        plan_served(plan)
+        emit_summary(source="cache", label=note)
+        return
+
+    if args.offline:
+        serve_me_offline(cached, config, "--offline")
+        return
+
+    if not check_budget(config, force, plan_cost(plan)):
+        serve_me_offline(cached, config, budget_refusal())
+        return
+
+    client = get_client(config)
+    try:
+        resp = client.get_me(**get_step(plan, "profile")["params"])
+    except API_ERRORS as e:
+        handle_api_error(e)
+        reason = offline_reason(e)
+        if reason:
+            serve_me_offline(cached, config, reason)
+        return
+
+    day_usage = track_usage(user_reads=1)
+    budget_warning(config, suppress=suppress)
+
+    if not resp.data:
+        print("Error: Could not retrieve profile.")
+        return
+
+    profile = profile_to_dict(resp.data)
+    save_cached_profile(profile)
+    print_profile(profile, config, track=args.track)
+
+    print(f"\n---\n{cost_line(CALL_COSTS['user'], '1 user read')}")
     print(f"Today's spend: ${day_usage['est_cost']:.3f}")
+    emit_summary(1, CALL_COSTS["user"])
 
 
 def cmd_lookup(args):
@@ -125,21 +192,24 @@ def cmd_lookup(args):
     force = args.force or args.no_budget
     suppress = args.no_budget
 
+    username = args.username.lstrip("@")
+    plan = new_plan(f"x_user.py lookup {args.username}")
+    plan_step(plan, "user", "GET /2/users/by/username/:username", kind="user",
+              params={"username": username, "user_fields": USER_FIELDS})
+
     if args.dry_run:
-        print(f"[DRY RUN] x_user.py lookup {args.username}")
-        print(f"  Would cost: ~$0.010 (1 user read)")
+        print_plan(plan)
         budget_warning(config, suppress=suppress)
         return
 
-    if not check_budget(config, force):
+    if not check_budget(config, force, plan_cost(plan)):
         return
 
     client = get_client(config)
-    username = args.username.lstrip("@")
 
     try:
-        resp = client.get_user(username=username, user_fields=USER_FIELDS)
-    except tweepy.errors.TweepyException as e:
+        resp = client.get_user(**get_step(plan, "user")["params"])
+    except API_ERRORS as e:
         handle_api_error(e)
         return
 
@@ -153,6 +223,11 @@ def cmd_lookup(args):
     u = resp.data
     pm = u.public_metrics
 
+    # Keep the users table current — every stored post by this author picks it up
+    users = load_users()
+    users[str(u.id)] = user_row(u)
+    save_users(users)
+
     print(f"Profile: {u.name} (@{u.username})")
     print("=" * 40)
     if u.description:
@@ -170,24 +245,40 @@ def cmd_lookup(args):
     print(f"Listed:     {format_number(pm['listed_count'])}")
     print()
     print(f"https://x.com/{u.username}")
-    print(f"\n---\nEst. API cost: ~$0.010 (1 user read)")
+    print(f"\n---\n{cost_line(CALL_COSTS['user'], '1 user read')}")
     print(f"Today's spend: ${day_usage['est_cost']:.3f}")
+    emit("user", profile_to_dict(u))
+    emit_summary(1, CALL_COSTS["user"])
 
 
 def main():
     parser = argparse.ArgumentParser(description="X user profile info")
     parser.add_argument("--force", action="store_true", help="Override daily budget guard")
     parser.add_argument("--no-budget", action="store_true", help="Skip all budget checks and warnings")
+    parser.add_argument("--no-cache", action="store_true", help="Skip profile cache, always hit API")
+    parser.add_argument("--offline", action="store_true", help="Serve cached profile only, no API calls")
     parser.add_argument("--dry-run", action="store_true", help="Show estimated cost without making API calls")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     me_parser = subparsers.add_parser("me", help="Your profile stats")
     me_parser.add_argument("--track", action="store_true", help="Save follower count for delta tracking")
+    me_parser.add_argument("--stale-ok", action="store_true",
+                           help="Show an expired cached profile now and refresh it in the background")
+    me_parser.add_argument("--refresh-cache", action="store_true", help=argparse.SUPPRESS)
 
     lookup_parser = subparsers.add_parser("lookup", help="Look up any user")
     lookup_parser.add_argument("username", help="X handle (with or without @)")
 
+    add_output_args(parser)
+    add_account_args(parser)
+    add_profile_args(parser)
+    add_cassette_args(parser)
+    add_deadline_args(parser)
     args = parser.parse_args()
+    setup_output(args)
+    setup_profiling(args)
+    setup_cassette(args)
+    setup_deadline(args)
     if args.command == "me":
         cmd_me(args)
     elif args.command == "lookup":
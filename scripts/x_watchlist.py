@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "tweepy>=4.14.0",
+# ]
+# ///
+"""X (Twitter) watchlist — follow other accounts' posts in one merged feed.
+
+Each account keeps a since_id cursor and a posting-rate estimate. A poll fetches
+only accounts likely to have posted since their last check, concurrently, gated
+by the rate-limit quota the API reports.
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from x_common import (
+    TweetRecord, load_record_store, save_record_store, tweet_to_record, now_epoch,
+    fields_for, merge_record,
+    load_json_store, save_json_store, load_users, save_users, user_row, remember_users, join_authors,
+    add_account_args, add_profile_args, setup_profiling, add_cassette_args, setup_cassette,
+    add_deadline_args, setup_deadline, DeadlineExceeded,
+    add_output_args, setup_output, emit, emit_summary,
+    DATA_DIR, RECORD_STORES, API_ERRORS, CALL_COSTS, RateScheduler, load_config, get_client,
+    track_usage, today_usage, budget_warning, check_budget, budget_refusal,
+    staleness_label, print_offline_header,
+    new_plan, plan_step, plan_hit, plan_served, print_plan, plan_cost,
+    time_ago, format_number, handle_api_error, cost_line,
+)
+
+WATCHLIST_PATH = DATA_DIR / "watchlist.json"
+
+TIMELINE_ENDPOINT = "/2/users/:id/tweets"
+
+# Concurrent timeline fetches per poll
+WORKERS = 8
+
+# Skip an account when fewer posts than this are expected since its last poll...
+MIN_EXPECTED_POSTS = 0.5
+# ...but never leave one unchecked for longer than this (days)
+MAX_SKIP_DAYS = 7
+
+# Weight of the latest poll in the posts/day estimate
+RATE_ALPHA = 0.3
+
+# Post IDs remembered per account
+POST_LIMIT = 200
+
+# Timeline pages followed per account when it posted more than --per-account since its last poll
+MAX_PAGES = 3
+
+
+def load_watchlist() -> dict:
+    """user_id -> {"username", "since_id", "last_polled", "last_post", "rate" (posts/day), "posts"}
+
+    plus "backlog_token" and "backlog_newest" while a poll's pages past --max-pages wait.
+    """
+    return load_json_store(WATCHLIST_PATH)
+
+
+def save_watchlist(watchlist: dict):
+    save_json_store(WATCHLIST_PATH, watchlist)
+
+
+def find_account(watchlist: dict, username: str) -> str | None:
+    username = username.lstrip("@").lower()
+    for uid, account in watchlist.items():
+        if account["username"].lower() == username:
+            return uid
+    return None
+
+
+def expected_posts(account: dict, now: int) -> float | None:
+    """Posts expected since the last poll at the account's usual rate (None if never polled)."""
+    if not account.get("last_polled"):
+        return None
+    return account.get("rate", 0.0) * (now - account["last_polled"]) / 86400
+
+
+def is_due(account: dict, now: int) -> bool:
+    expected = expected_posts(account, now)
+    if expected is None or expected >= MIN_EXPECTED_POSTS:
+        return True
+    return now - account["last_polled"] >= MAX_SKIP_DAYS * 86400
+
+
+def update_rate(account: dict, posts: list[TweetRecord], now: int):
+    """Fold this poll into the account's posts/day estimate."""
+    if account.get("last_polled"):
+        days = max((now - account["last_polled"]) / 86400, 1 / 24)
+        sample = len(posts) / days
+        account["rate"] = round((1 - RATE_ALPHA) * account.get("rate", 0.0) + RATE_ALPHA * sample, 3)
+    elif posts:
+        # First poll: the backfilled page spans a known stretch of time
+        oldest = min(p.created_ts for p in posts)
+        account["rate"] = round(len(posts) / max((now - oldest) / 86400, 1), 3)
+    else:
+        account["rate"] = 0.0
+    if posts:
+        account["last_post"] = max(p.created_ts for p in posts)
+    account["last_polled"] = now
+
+
+def timeline_params(uid: str, account: dict, args) -> dict:
+    params = {
+        "id": uid,
+        "max_results": args.per_account,
+        **fields_for("watchlist"),
+        "user_auth": True,
+    }
+    if account.get("since_id"):
+        params["since_id"] = account["since_id"]
+        if account.get("backlog_token"):
+            # The last poll stopped at --max-pages; carry on where it left off
+            params["pagination_token"] = account["backlog_token"]
+    return params
+
+
+def plan_poll(watchlist: dict, due: list[str], args) -> dict:
+    plan = new_plan("x_watchlist.py poll")
+    if due:
+        plan_step(plan, "timelines", "GET /2/users/:id/tweets", calls=len(due),
+                  max_calls=len(due) * args.max_pages,
+                  note=f"{len(due)} of {len(watchlist)} accounts, up to {args.per_account} posts each "
+                       f"(x{args.max_pages} pages if there's more), {args.workers} at a time")
+    return plan
+
+
+# === Commands ===
+
+def print_post(t: TweetRecord, label: str | None = None):
+    text = t.text.replace("\n", " ")
+    if len(text) > 160:
+        text = text[:157] + "..."
+    metrics = f"♥ {format_number(t.likes)}  🔁 {format_number(t.retweets)}  💬 {format_number(t.replies)}"
+    print(f"@{t.author_username or 'unknown'} · {time_ago(t.created_ts)}")
+    print(f"   \"{text}\"")
+    print(f"   {metrics}")
+    if label:
+        print(f"   ({label})")
+    print(f"   https://x.com/{t.author_username or 'i'}/status/{t.id}")
+    print()
+
+
+def cmd_add(args):
+    config = load_config()
+    if not config:
+        return
+    force = args.force or args.no_budget
+    watchlist = load_watchlist()
+    users = load_users()
+    by_name = {u["username"].lower(): uid for uid, u in users.items() if u.get("username")}
+
+    wanted = [u.lstrip("@") for u in args.usernames if not find_account(watchlist, u)]
+    known = {u: by_name[u.lower()] for u in wanted if u.lower() in by_name}
+    unknown = [u for u in wanted if u not in known]
+
+    plan = new_plan("x_watchlist.py add")
+    if unknown:
+        plan_step(plan, "users", "GET /2/users/by", kind="user", note=f"resolve {', '.join(unknown)}")
+    if known:
+        plan_hit(plan, f"{len(known)} account(s) already in the users table")
+    if args.dry_run:
+        print_plan(plan)
+        return
+
+    resolved = dict(known)
+    user_reads = 0
+    if unknown:
+        if not check_budget(config, force, plan_cost(plan)):
+            return
+        try:
+            resp = get_client(config).get_users(usernames=unknown, **fields_for("watchlist.add"), user_auth=True)
+            user_reads = 1
+        except API_ERRORS as e:
+            handle_api_error(e)
+            return
+        for u in resp.data or []:
+            users[str(u.id)] = user_row(u)
+            resolved[u.username] = str(u.id)
+        track_usage(user_reads=user_reads)
+        save_users(users)
+
+    for name in unknown:
+        if name.lower() not in {n.lower() for n in resolved}:
+            print(f"Error: User @{name} not found.")
+    for name, uid in resolved.items():
+        watchlist[uid] = {"username": users[uid]["username"], "since_id": None, "added_at": now_epoch(),
+                          "last_polled": None, "last_post": None, "rate": 0.0, "posts": []}
+        print(f"Watching @{users[uid]['username']}")
+        emit("account", id=uid, username=users[uid]["username"])
+    save_watchlist(watchlist)
+    plan_served(plan)
+    if user_reads:
+        print(f"---\n{cost_line(user_reads * CALL_COSTS['user'], '1 user lookup')}")
+    emit_summary(user_reads, user_reads * CALL_COSTS["user"], accounts=len(watchlist))
+
+
+def cmd_remove(args):
+    watchlist = load_watchlist()
+    for name in args.usernames:
+        uid = find_account(watchlist, name)
+        if uid is None:
+            print(f"Error: @{name.lstrip('@')} is not on the watchlist.")
+            continue
+        del watchlist[uid]
+        print(f"Stopped watching @{name.lstrip('@')}")
+        emit("account_removed", id=uid, username=name.lstrip("@"))
+    save_watchlist(watchlist)
+
+
+def cmd_list(args):
+    watchlist = load_watchlist()
+    if not watchlist:
+        print("Watchlist is empty. Add accounts: x_watchlist.py add USER [USER ...]")
+        return
+    now = now_epoch()
+    print(f"Watchlist ({len(watchlist)} accounts)")
+    print("=" * 50)
+    ordered = sorted(watchlist.items(), key=lambda kv: -kv[1].get("rate", 0.0))
+    for uid, a in ordered:
+        last_post = time_ago(a["last_post"]) if a.get("last_post") else "no posts seen"
+        polled = time_ago(a["last_polled"]) if a.get("last_polled") else "never"
+        due = "due" if is_due(a, now) else "skipping (quiet)"
+        print(f"  @{a['username']}: {a.get('rate', 0.0):.1f} posts/day, last post {last_post}, "
+              f"polled {polled} — {due}")
+        emit("account", id=uid, username=a["username"], rate=a.get("rate", 0.0),
+             last_post=a.get("last_post"), last_polled=a.get("last_polled"), due=is_due(a, now))
+
+
+def show_feed(watchlist: dict, args, reason: str | None = None):
+    """Merged feed of stored posts from every watched account ($0)."""
+    if reason:
+        print_offline_header(reason)
+    store = load_record_store(RECORD_STORES["tweets"])
+    since = now_epoch() - args.hours * 3600 if args.hours else None
+    posts = [store[i] for a in watchlist.values() for i in a.get("posts", []) if i in store]
+    posts = [p for p in posts if since is None or (p.created_ts or 0) >= since]
+    posts.sort(key=lambda p: p.created_ts or 0, reverse=True)
+    posts = join_authors(posts[:args.max], load_users())
+    print(f"Watchlist feed (from local store, {len(posts)})")
+    print("=" * 50)
+    for p in posts:
+        print_post(p, label=staleness_label(p))
+        emit("post", p, label=staleness_label(p))
+    print("---\n(Served from local store — 0 API calls)")
+    print(f"Today's spend: ${today_usage().get('est_cost', 0):.3f}")
+    emit_summary(source="local")
+
+
+def cmd_feed(args):
+    show_feed(load_watchlist(), args)
+
+
+def cmd_poll(args):
+    config = load_config()
+    if not config:
+        return
+    watchlist = load_watchlist()
+    if not watchlist:
+        print("Watchlist is empty. Add accounts: x_watchlist.py add USER [USER ...]")
+        return
+
+    force = args.force or args.no_budget
+    suppress = args.no_budget
+    now = now_epoch()
+    due = [uid for uid, a in watchlist.items() if args.all or is_due(a, now)]
+    plan = plan_poll(watchlist, due, args)
+
+    if args.dry_run:
+        print_plan(plan)
+        skipped = len(watchlist) - len(due)
+        if skipped:
+            print(f"  Skipping {skipped} quiet account{'s' if skipped != 1 else ''} (posting-rate stats); "
+                  f"--all polls them too")
+        budget_warning(config, suppress=suppress)
+        return
+
+    if args.offline:
+        show_feed(watchlist, args, "--offline")
+        return
+
+    if not check_budget(config, force, plan_cost(plan)):
+        show_feed(watchlist, args, budget_refusal())
+        return
+
+    client = get_client(config)
+    scheduler = RateScheduler(reserve=args.reserve)
+
+    def fetch(uid: str):
+        """Pages since the account's cursor, up to --max-pages. A first poll backfills one page.
+
+        Returns (uid, pages, token to resume from if pages remain, error).
+        """
+        params = timeline_params(uid, watchlist[uid], args)
+        pages = []
+        try:
+            while True:
+                with scheduler.slot(TIMELINE_ENDPOINT):
+                    resp = client.get_users_tweets(**params)
+                pages.append(resp)
+                next_token = resp.meta.get("next_token")
+                if not next_token or "since_id" not in params:
+                    return uid, pages, None, None
+                if len(pages) >= args.max_pages:
+                    return uid, pages, next_token, None
+                params["pagination_token"] = next_token
+        except API_ERRORS as e:
+            return uid, pages, None, e
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(fetch, due))
+    elapsed = time.perf_counter() - start
+
+    store = load_record_store(RECORD_STORES["tweets"])
+    users = load_users()
+    feed = []
+    api_calls = failed = cancelled = 0
+    truncated = []
+    for uid, pages, backlog_token, error in results:
+        account = watchlist[uid]
+        api_calls += len(pages)
+        if isinstance(error, DeadlineExceeded):
+            # Cursor untouched: the next poll picks this account up where it left off
+            cancelled += 1
+            continue
+        if error is not None:
+            failed += 1
+            print(f"@{account['username']}:")
+            handle_api_error(error)
+            continue
+        posts = []
+        for resp in pages:
+            remember_users(users, resp)
+            posts.extend(merge_record(store, tweet_to_record(t, users, "watchlist"), "watchlist")
+                         for t in resp.data or [])
+        update_rate(account, posts, now)
+        # The cursor moves to the newest post only once the pages behind it are all
+        # fetched; until then the next poll resumes from the pagination token
+        newest = account.get("backlog_newest") or pages[0].meta.get("newest_id")
+        if backlog_token:
+            account.update(backlog_token=backlog_token, backlog_newest=newest)
+            truncated.append(f"@{account['username']}")
+        else:
+            account.pop("backlog_token", None)
+            account.pop("backlog_newest", None)
+            if newest:
+                account["since_id"] = newest
+        account["posts"] = ([p.id for p in posts] + account.get("posts", []))[:POST_LIMIT]
+        feed.extend(posts)
+
+    day_usage = track_usage(tweet_reads=api_calls)
+    budget_warning(config, suppress=suppress)
+    save_record_store(RECORD_STORES["tweets"], store)
+    save_users(users)
+    save_watchlist(watchlist)
+
+    feed.sort(key=lambda p: p.created_ts or 0, reverse=True)
+    print(f"Watchlist feed ({len(feed)} new from {len(due)} accounts)")
+    print("=" * 50)
+    for p in feed[:args.max]:
+        print_post(p)
+    for p in feed:
+        emit("post", p)
+    if len(feed) > args.max:
+        print(f"… {len(feed) - args.max} more (x_watchlist.py feed --max {len(feed)})")
+    if truncated:
+        print(f"[!] More new posts than --max-pages {args.max_pages} for {', '.join(truncated)}; "
+              f"the next poll fetches the older ones.")
+
+    skipped = len(watchlist) - len(due)
+    cost = api_calls * CALL_COSTS["tweet"]
+    print("---")
+    print(f"Polled {len(due)} of {len(watchlist)} accounts in {elapsed:.1f}s"
+          + (f", {skipped} quiet skipped" if skipped else "")
+          + (f", {failed} failed" if failed else "")
+          + (f", {cancelled} cut off by the deadline" if cancelled else "")
+          + (f", {scheduler.waited:.0f}s total rate-limit wait" if scheduler.waited >= 1 else ""))
+    print(cost_line(cost, f"{api_calls} tweet reads"))
+    print(f"Today's spend: ${day_usage['est_cost']:.3f}")
+    emit_summary(api_calls, cost, posts=len(feed), polled=len(due), skipped=skipped, failed=failed,
+                 cancelled=cancelled, truncated=truncated)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="X watchlist — other accounts' posts in one feed")
+    parser.add_argument("--force", action="store_true", help="Override daily budget guard")
+    parser.add_argument("--no-budget", action="store_true", help="Skip all budget checks and warnings")
+    parser.add_argument("--offline", action="store_true", help="Serve from local store only, no API calls")
+    parser.add_argument("--dry-run", action="store_true", help="Show estimated cost without making API calls")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add_p = subparsers.add_parser("add", help="Watch accounts")
+    add_p.add_argument("usernames", nargs="+", help="Usernames to watch")
+
+    remove_p = subparsers.add_parser("remove", help="Stop watching accounts")
+    remove_p.add_argument("usernames", nargs="+", help="Usernames to drop")
+
+    subparsers.add_parser("list", help="Watched accounts with posting-rate stats ($0)")
+
+    poll_p = subparsers.add_parser("poll", help="Fetch new posts from watched accounts")
+    poll_p.add_argument("--all", action="store_true", help="Poll quiet accounts too")
+    poll_p.add_argument("--per-account", type=int, default=20,
+                        help="Max new posts per account (5-100, default: 20)")
+    poll_p.add_argument("--max-pages", type=int, default=MAX_PAGES,
+                        help=f"Timeline pages per account when there's more than --per-account (default: {MAX_PAGES})")
+    poll_p.add_argument("--workers", type=int, default=WORKERS,
+                        help=f"Concurrent fetches (default: {WORKERS})")
+    poll_p.add_argument("--reserve", type=int, default=5,
+                        help="Timeline rate-limit calls to leave for other commands (default: 5)")
+    poll_p.add_argument("--max", type=int, default=20, help="Posts shown (default: 20)")
+    poll_p.add_argument("--hours", type=int, help="With --offline: only posts from the last N hours")
+
+    feed_p = subparsers.add_parser("feed", help="Merged feed from the local store ($0)")
+    feed_p.add_argument("--max", type=int, default=20, help="Posts shown (default: 20)")
+    feed_p.add_argument("--hours", type=int, help="Only posts from the last N hours")
+
+    add_output_args(parser)
+    add_account_args(parser)
+    add_profile_args(parser)
+    add_cassette_args(parser)
+    add_deadline_args(parser)
+    args = parser.parse_args()
+    setup_output(args)
+    setup_profiling(args)
+    setup_cassette(args)
+    setup_deadline(args)
+    if args.command == "add":
+        cmd_add(args)
+    elif args.command == "remove":
+        cmd_remove(args)
+    elif args.command == "list":
+        cmd_list(args)
+    elif args.command == "poll":
+        args.per_account = min(max(args.per_account, 5), 100)
+        cmd_poll(args)
+    elif args.command == "feed":
+        cmd_feed(args)
+
+
+if __name__ == "__main__":
+    main()